@@ -102,6 +102,65 @@ class AppSettings(object):
         """
         return self._setting("LOGIN_ON_EMAIL_CONFIRMATION", False)
 
+    @property
+    def AUTH_PROPS_CACHE_TIMEOUT(self):
+        """
+        Seconds the `auth` props, permissions and groups of a user are kept
+        in a shared cache. Entries are invalidated on change, this only
+        bounds how long unused ones live. On a local memory cache they are
+        kept LOCAL_CACHE_TIMEOUT seconds at most, see utils.cache.
+        """
+        return self._setting("AUTH_PROPS_CACHE_TIMEOUT", 60 * 60)
+
+    @property
+    def EMAIL_PURGE_BATCH_SIZE(self):
+        """
+        Expired confirmations and orphaned addresses deleted per query by
+        purge_email_confirmations
+        """
+        return self._setting("EMAIL_PURGE_BATCH_SIZE", 1000)
+
+    @property
+    def EMAIL_PURGE_MAX_BATCHES(self):
+        """Batches of each kind deleted per purge_email_confirmations run"""
+        return self._setting("EMAIL_PURGE_MAX_BATCHES", 100)
+
+    @property
+    def PASSWORD_HASHER_COSTS(self):
+        """
+        Cost parameters of the password hashers by algorithm, the Django
+        defaults for the ones missing. Argon2 runs on a single lane with
+        19 MiB, so concurrent logins don't compete for every core.
+        """
+        return self._setting(
+            "PASSWORD_HASHER_COSTS",
+            {
+                "argon2": {"time_cost": 2, "memory_cost": 19456, "parallelism": 1},
+            },
+        )
+
+    @property
+    def ACCOUNT_RATE_LIMITS(self):
+        """
+        Attempts allowed per client IP and per email in `window` seconds by
+        the login (failed attempts only), password reset and email
+        verification views. The setting overrides only the scopes and values
+        it gives
+        """
+        limits = {
+            "login": {"ip": 20, "email": 5, "window": 5 * 60},
+            "password_reset": {"ip": 10, "email": 3, "window": 60 * 60},
+            "email_verification": {"ip": 10, "email": 3, "window": 60 * 60},
+        }
+        for scope, config in self._setting("ACCOUNT_RATE_LIMITS", {}).items():
+            limits[scope] = {**limits.get(scope, {}), **config}
+        return limits
+
+    @property
+    def ACCOUNT_RATE_LIMIT_CACHE(self):
+        """Cache alias of the rate limit counters, Redis when configured"""
+        return self._setting("ACCOUNT_RATE_LIMIT_CACHE", "default")
+
     @property
     def SOCIAL_ACCOUNT_PROVIDERS(self):
         """
@@ -0,0 +1,44 @@
+from django.contrib.auth import backends
+
+from . import cache
+
+
+class ModelBackend(backends.ModelBackend):
+    """
+    ModelBackend loading the user profile together with the session user,
+    so the props middleware does not need a query of its own for it.
+    Permissions are kept in the cache across requests, see accounts.cache.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = backends.UserModel._default_manager.select_related(
+                "userprofile"
+            ).get(pk=user_id)
+        except backends.UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    def _get_permissions(self, user_obj, obj, from_name):
+        if (
+            obj is not None
+            or not user_obj.is_active
+            or user_obj.is_anonymous
+            or user_obj.is_superuser
+        ):
+            return super()._get_permissions(user_obj, obj, from_name)
+
+        perm_cache_name = "_%s_perm_cache" % from_name
+        if not hasattr(user_obj, perm_cache_name):
+            perms = cache.get_permissions(
+                user_obj.id,
+                from_name,
+                lambda: self._load_permissions(user_obj, from_name),
+            )
+            setattr(user_obj, perm_cache_name, perms)
+        return getattr(user_obj, perm_cache_name)
+
+    def _load_permissions(self, user_obj, from_name):
+        perms = getattr(self, "_get_%s_permissions" % from_name)(user_obj)
+        perms = perms.values_list("content_type__app_label", "codename").order_by()
+        return {"%s.%s" % (ct, name) for ct, name in perms}
@@ -0,0 +1,168 @@
+"""
+Cross request cache of the `auth` props shared by the props middleware and
+of the groups and permissions of each user, see backends.ModelBackend.
+
+Entries are keyed by the user id plus two version counters: one per user,
+bumped when the user, their profile, email addresses, groups or
+permissions change, and a global one bumped when any group changes its
+permissions. Bumping a version makes old entries unreachable, they simply
+expire. Versions only reach every process with a shared cache, on a local
+memory cache entries expire after LOCAL_CACHE_TIMEOUT, see utils.cache.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core import app_settings as core_app_settings
+from apps.core.models import UserProfile
+from utils.cache import get_timeout
+
+from . import app_settings, models
+
+USER_VERSION_KEY = "accounts:user_version:{0}"
+GROUPS_VERSION_KEY = "accounts:groups_version"
+AUTH_PROPS_KEY = "accounts:auth_props:{0}:{1}:{2}"
+PERMISSIONS_KEY = "accounts:permissions:{0}:{1}:{2}:{3}"
+GROUP_NAMES_KEY = "accounts:group_names:{0}:{1}:{2}"
+
+
+def _new_version():
+    # Versions start from the clock so a counter lost from the cache never
+    # comes back to a value that was already used.
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def bump_user_version(user_id):
+    """Invalidate the cached props of one user, now and after commit"""
+    key = USER_VERSION_KEY.format(user_id)
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def bump_groups_version():
+    """Invalidate the cached props of every user, now and after commit"""
+    _bump(GROUPS_VERSION_KEY)
+    transaction.on_commit(lambda: _bump(GROUPS_VERSION_KEY))
+
+
+def get_versions(user_id):
+    user_key = USER_VERSION_KEY.format(user_id)
+    versions = cache.get_many([user_key, GROUPS_VERSION_KEY])
+    missing = {
+        key: _new_version()
+        for key in (user_key, GROUPS_VERSION_KEY)
+        if key not in versions
+    }
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        versions = cache.get_many([user_key, GROUPS_VERSION_KEY])
+
+    return versions.get(user_key), versions.get(GROUPS_VERSION_KEY)
+
+
+def build_auth_props(user):
+    try:
+        email_address = models.EmailAddress.objects.get(user=user, primary=True)
+    except models.EmailAddress.DoesNotExist:
+        verified = ""
+    else:
+        verified = email_address.verified
+
+    try:
+        user_profile = UserProfile.objects.get(user=user)
+    except UserProfile.DoesNotExist:
+        avatar = "/static/img/photo_default.png"
+    else:
+        avatar = user_profile.get_photo(core_app_settings.AVATAR_SIZE)
+
+    return {
+        "user": {
+            "id": user.id,
+            "firstName": user.first_name,
+            "lastName": user.last_name,
+            "email": user.email,
+            "groups": get_group_names(user),
+            "permissions": list(user.get_group_permissions()),
+            "avatar": avatar,
+        },
+        "emailAddress": {
+            "verified": verified,
+            "emailMethod": app_settings.EMAIL_VERIFICATION,
+        },
+    }
+
+
+def get_auth_props(user):
+    """`auth` props of an authenticated user, built at most once per version"""
+    user_version, groups_version = get_versions(user.id)
+    key = AUTH_PROPS_KEY.format(user.id, user_version, groups_version)
+    props = cache.get(key)
+    if props is None:
+        props = build_auth_props(user)
+        cache.set(key, props, get_timeout(app_settings.AUTH_PROPS_CACHE_TIMEOUT))
+
+    return props
+
+
+def get_permissions(user_id, from_name, load):
+    """
+    Permission names of a user granted directly (`from_name` "user") or
+    by their groups ("group"), loaded with `load` at most once per version
+    """
+    user_version, groups_version = get_versions(user_id)
+    key = PERMISSIONS_KEY.format(from_name, user_id, user_version, groups_version)
+    perms = cache.get(key)
+    if perms is None:
+        perms = load()
+        cache.set(key, perms, get_timeout(app_settings.AUTH_PROPS_CACHE_TIMEOUT))
+
+    return perms
+
+
+def get_group_names(user):
+    """Names of the groups of a user, loaded at most once per version"""
+    user_version, groups_version = get_versions(user.id)
+    key = GROUP_NAMES_KEY.format(user.id, user_version, groups_version)
+    names = cache.get(key)
+    if names is None:
+        names = list(user.groups.values_list("name", flat=True))
+        cache.set(key, names, get_timeout(app_settings.AUTH_PROPS_CACHE_TIMEOUT))
+
+    return names
+
+
+def get_request_group_names(user):
+    """
+    Group names of `user` loaded once per request, `request.user` lives as
+    long as the request, for membership checks answered from memory
+    """
+    try:
+        return user._group_names
+    except AttributeError:
+        user._group_names = frozenset(get_group_names(user))
+        return user._group_names
+
+
+def in_groups(user, *group_names):
+    """Whether an authenticated `user` is in any of `group_names`"""
+    if not user.is_authenticated:
+        return False
+    return not get_request_group_names(user).isdisjoint(group_names)
+
+
+def get_request_email_state(request):
+    """EmailAddress.get_email_state of the request user, loaded once"""
+    try:
+        return request._email_state
+    except AttributeError:
+        request._email_state = models.EmailAddress.get_email_state(request.user)
+        return request._email_state
@@ -0,0 +1,70 @@
+"""
+Password hashers whose cost parameters are read from
+PASSWORD_HASHER_COSTS, keyed by algorithm. Hashes made with other
+parameters or by a hasher other than the first of PASSWORD_HASHERS are
+upgraded by Django on the next successful login, see `must_update`.
+
+Argon2 needs `argon2-cffi` and bcrypt needs `bcrypt` installed, they are
+only loaded when a password is hashed or checked with them.
+"""
+import base64
+import hashlib
+
+from django.contrib.auth import hashers
+
+from . import app_settings
+
+
+def cost(name, default):
+    """Hasher attribute overridable in PASSWORD_HASHER_COSTS"""
+
+    def get_cost(self):
+        costs = app_settings.PASSWORD_HASHER_COSTS.get(self.algorithm, {})
+        return costs.get(name, default)
+
+    return property(get_cost)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = cost("iterations", hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = cost("work_factor", hashers.ScryptPasswordHasher.work_factor)
+    block_size = cost("block_size", hashers.ScryptPasswordHasher.block_size)
+    parallelism = cost("parallelism", hashers.ScryptPasswordHasher.parallelism)
+
+    def get_maxmem(self, n, r):
+        # Twice the 128 * N * r bytes scrypt needs, the OpenSSL default
+        # limit of 32 MiB is too low for work factors from 2 ** 15
+        return 256 * n * r
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # As Django's, with the memory limit of the parameters of the hash
+        # rather than the configured ones, `verify` passes those of the
+        # stored hash, which may have been made with higher costs
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            maxmem=self.get_maxmem(n, r),
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode("ascii").strip()
+        return "%s$%d$%s$%d$%d$%s" % (self.algorithm, n, salt, r, p, hash_)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    time_cost = cost("time_cost", hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = cost("memory_cost", hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = cost("parallelism", hashers.Argon2PasswordHasher.parallelism)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    rounds = cost("rounds", hashers.BCryptSHA256PasswordHasher.rounds)
@@ -0,0 +1,46 @@
+"""Command to measure the password hashes per second per core of each hasher"""
+
+import os
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Hash a password repeatedly with every hasher of PASSWORD_HASHERS "
+        "and report the hashes per second of one core, the login capacity "
+        "of each worker process"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=2.0)
+        parser.add_argument("--password", default="Qwer.1234")
+
+    def handle(self, *args, **options):
+        self.stdout.write("{0} cores".format(os.cpu_count()))
+        for hasher in get_hashers():
+            try:
+                count, seconds = self.measure(hasher, options)
+            except (ImportError, ValueError) as err:
+                # The library of the hasher is not installed
+                self.stdout.write("{0:>24}: skipped, {1}".format(hasher.algorithm, err))
+                continue
+
+            self.stdout.write(
+                "{0:>24}: {1:.1f} hashes/s per core ({2:.1f} ms each)".format(
+                    hasher.algorithm, count / seconds, seconds / count * 1000
+                )
+            )
+
+    def measure(self, hasher, options):
+        salt = hasher.salt()
+        count = 0
+        start = time.perf_counter()
+        while True:
+            hasher.encode(options["password"], salt)
+            count += 1
+            seconds = time.perf_counter() - start
+            if seconds >= options["seconds"]:
+                return count, seconds
@@ -1,12 +1,24 @@
 from datetime import timedelta
 
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, Q
 from django.utils import timezone
 
 from . import app_settings
 
 
+def delete_batch(queryset, batch_size=None):
+    """
+    Delete the rows of `queryset`, at most the first `batch_size` of them,
+    with a single set-based delete. Return the number of rows deleted.
+    """
+    if batch_size:
+        pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+        queryset = queryset.model.objects.filter(pk__in=pks)
+    deleted, _ = queryset.delete()
+    return deleted
+
+
 class EmailAddressManager(models.Manager):
     def can_add_email(self, user):
         ret = True
@@ -31,6 +43,18 @@ class EmailAddressManager(models.Manager):
         except self.model.DoesNotExist:
             return None
 
+    def all_orphaned(self):
+        """
+        Unverified addresses pending a change of email whose confirmations
+        are all gone, they can no longer be confirmed
+        """
+        return self.filter(
+            verified=False, primary=False, emailconfirmation__isnull=True
+        ).exclude(email=F("user__email"))
+
+    def delete_orphaned(self, batch_size=None):
+        return delete_batch(self.all_orphaned(), batch_size)
+
     def get_users_for(self, email):
         # this is a list rather than a generator because we probably want to
         # do a len() on it right away
@@ -76,5 +100,5 @@ class EmailConfirmationManager(models.Manager):
         )
         return Q(sent__lt=sent_threshold)
 
-    def delete_expired_confirmations(self):
-        self.all_expired().delete()
+    def delete_expired_confirmations(self, batch_size=None):
+        return delete_batch(self.all_expired(), batch_size)
@@ -1,8 +1,34 @@
-from inertia import share
+from django.contrib.auth import BACKEND_SESSION_KEY
 
-from apps.core.models import UserProfile
+from utils.inertia import share_lazy
 
-from . import app_settings, models
+from . import app_settings, cache
+
+# Backends no longer in AUTHENTICATION_BACKENDS and their replacement
+REPLACED_BACKENDS = {
+    "django.contrib.auth.backends.ModelBackend": "apps.accounts.backends.ModelBackend",
+}
+
+
+def get_auth_props(request):
+    if request.user.is_authenticated:
+        return cache.get_auth_props(request.user)
+
+    return {
+        "user": {
+            "id": "",
+            "firstName": "",
+            "lastName": "",
+            "email": "",
+            "groups": [],
+            "permissions": [],
+            "avatar": None,
+        },
+        "emailAddress": {
+            "verified": "",
+            "emailMethod": app_settings.EMAIL_VERIFICATION,
+        },
+    }
 
 
 class AuthPropsMiddleware:
@@ -11,63 +37,27 @@ class AuthPropsMiddleware:
         # One-time configuration and initialization.
 
     def __call__(self, request):
+        # Evaluated only if the response renders the `auth` prop, so it sees
+        # the user as it is at render time (e.g. after a logout)
+        share_lazy(request, auth=lambda: get_auth_props(request))
 
-        if request.user.is_authenticated:
-            try:
-                email_address = models.EmailAddress.objects.get(
-                    user=request.user, primary=True
-                )
-            except models.EmailAddress.DoesNotExist:
-                verified = ""
-            else:
-                verified = email_address.verified
-
-            try:
-                user_profile = UserProfile.objects.get(user=request.user)
-            except UserProfile.DoesNotExist:
-                avatar = "/static/img/photo_default.png"
-            else:
-                avatar = user_profile.get_photo()
-
-            share(
-                request,
-                auth={
-                    "user": {
-                        "id": request.user.id,
-                        "firstName": request.user.first_name,
-                        "lastName": request.user.last_name,
-                        "email": request.user.email,
-                        "groups": [
-                            group["name"]
-                            for group in request.user.groups.all().values("name")
-                        ],
-                        "permissions": list(request.user.get_group_permissions()),
-                        "avatar": avatar,
-                    },
-                    "emailAddress": {
-                        "verified": verified,
-                        "emailMethod": app_settings.EMAIL_VERIFICATION,
-                    },
-                },
-            )
-        else:
-            share(
-                request,
-                auth={
-                    "user": {
-                        "id": "",
-                        "firstName": "",
-                        "lastName": "",
-                        "email": "",
-                        "groups": [],
-                        "permissions": [],
-                        "avatar": None,
-                    },
-                    "emailAddress": {
-                        "verified": "",
-                        "emailMethod": app_settings.EMAIL_VERIFICATION,
-                    },
-                },
-            )
         response = self.get_response(request)
         return response
+
+
+class SessionBackendMiddleware:
+    """
+    Point sessions logged in through a replaced authentication backend at
+    its replacement, `get_user` would log them out otherwise. Must come
+    before AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        backend = request.session.get(BACKEND_SESSION_KEY)
+        if backend in REPLACED_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = REPLACED_BACKENDS[backend]
+
+        return self.get_response(request)
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.7 on 2026-10-18 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="emailaddress",
+            index=models.Index(
+                fields=["user", "primary"], name="accounts_email_user_primary"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="emailconfirmation",
+            index=models.Index(
+                fields=["email_address", "sent"], name="accounts_confirm_address_sent"
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
 import datetime
+from collections import namedtuple
 
 from django.db import models
 from django.utils import timezone
@@ -8,6 +9,9 @@ from apps.core.models import CustomUser
 
 from . import app_settings, manager
 
+# Email addresses of a user, see EmailAddress.get_email_state
+EmailState = namedtuple("EmailState", ["primary", "pending", "confirmation"])
+
 
 # Create your models here.
 class EmailAddress(models.Model):
@@ -30,28 +34,71 @@ class EmailAddress(models.Model):
     class Meta:
         verbose_name = "email address"
         verbose_name_plural = "email addresses"
+        indexes = [
+            models.Index(
+                fields=["user", "primary"], name="accounts_email_user_primary"
+            ),
+        ]
         if not app_settings.UNIQUE_EMAIL:
             unique_together = [("user", "email")]
 
     def __str__(self):
         return self.email
 
+    @staticmethod
+    def pick_pending(user: CustomUser, not_primary: list):
+        """Pending address among the `not_primary` ones of a user, or None"""
+        if len(not_primary) > 1:
+            not_primary = [
+                email_address
+                for email_address in not_primary
+                if email_address.email != user.email
+            ]
+        return not_primary[0] if not_primary else None
+
     @classmethod
     def get_not_primary(cls, user: CustomUser):
-        email_address = EmailAddress.objects.filter(user=user, primary=False)
-        if not email_address:
-            return ""
-        else:
-            if email_address.count() > 1:
-                email_address = email_address.exclude(email=user.email)
-        return email_address.first().email
+        email_address = cls.pick_pending(
+            user, list(EmailAddress.objects.filter(user=user, primary=False))
+        )
+        return email_address.email if email_address else ""
 
     @classmethod
     def get_primary(cls, user: CustomUser):
-        email_address = EmailAddress.objects.filter(user=user, primary=True)
-        if not email_address:
-            return ""
-        return email_address.first().email
+        email = (
+            EmailAddress.objects.filter(user=user, primary=True)
+            .values_list("email", flat=True)
+            .first()
+        )
+        return email or ""
+
+    @classmethod
+    def get_email_state(cls, user: CustomUser):
+        """
+        Primary and pending addresses of a user, with the latest
+        confirmation sent to the pending one, in a query plus its prefetch
+        """
+        email_addresses = EmailAddress.objects.filter(user=user).prefetch_related(
+            models.Prefetch(
+                "emailconfirmation_set",
+                queryset=EmailConfirmation.objects.order_by("-sent"),
+                to_attr="confirmations",
+            )
+        )
+
+        primary = None
+        not_primary = []
+        for email_address in email_addresses.order_by("pk"):
+            if email_address.primary:
+                primary = primary or email_address
+            else:
+                not_primary.append(email_address)
+
+        pending = cls.pick_pending(user, not_primary)
+        confirmation = None
+        if pending and pending.confirmations:
+            confirmation = pending.confirmations[0]
+        return EmailState(primary, pending, confirmation)
 
     @classmethod
     def get_or_create(cls, user: CustomUser, email: str = None):
@@ -61,9 +108,7 @@ class EmailAddress(models.Model):
         try:
             email_address = EmailAddress.objects.get(user=user, email=email)
         except EmailAddress.DoesNotExist:
-            old_emails = EmailAddress.objects.filter(user=user, primary=False)
-            for old_email in old_emails:
-                old_email.delete()
+            EmailAddress.objects.filter(user=user, primary=False).delete()
         else:
             return email_address
 
@@ -106,6 +151,11 @@ class EmailConfirmation(models.Model):
     class Meta:
         verbose_name = "email confirmation"
         verbose_name_plural = "email confirmations"
+        indexes = [
+            models.Index(
+                fields=["email_address", "sent"], name="accounts_confirm_address_sent"
+            ),
+        ]
 
     def __str__(self):
         return "confirmation for %s" % self.email_address
@@ -162,7 +212,11 @@ class EmailConfirmation(models.Model):
         except EmailConfirmation.DoesNotExist:
             return 0
 
-        time_sent = timezone.now() - email_confirm.sent
+        return email_confirm.time_to_resend()
+
+    def time_to_resend(self):
+        """Seconds left of the cooldown period since this email was sent"""
+        time_sent = timezone.now() - self.sent
         cooldown_period = datetime.timedelta(
             seconds=app_settings.EMAIL_CONFIRMATION_COOLDOWN
         )
@@ -171,8 +225,4 @@ class EmailConfirmation(models.Model):
 
     @classmethod
     def delete_old_emails(cls, email_address):
-        emails = EmailConfirmation.objects.filter(
-            email_address=email_address,
-        )
-        for email in emails:
-            email.delete()
+        EmailConfirmation.objects.filter(email_address=email_address).delete()
@@ -0,0 +1,50 @@
+"""
+Rate limits of the anonymous account views, counted per client IP and per
+email address, see utils.ratelimit and ACCOUNT_RATE_LIMITS.
+"""
+from utils.ratelimit import RateLimiter
+from utils.request_data import get_ip
+
+from . import app_settings
+
+RATE_LIMITED_ERROR = "Too many attempts, please try again later"
+
+
+class AccountRateLimit:
+    def __init__(self, scope):
+        self.scope = scope
+
+    def get_limiters(self, request, email):
+        config = app_settings.ACCOUNT_RATE_LIMITS[self.scope]
+        alias = app_settings.ACCOUNT_RATE_LIMIT_CACHE
+        return [
+            (
+                RateLimiter(f"{self.scope}:ip", config["ip"], config["window"], alias),
+                get_ip(request),
+            ),
+            (
+                RateLimiter(
+                    f"{self.scope}:email", config["email"], config["window"], alias
+                ),
+                email.strip().lower(),
+            ),
+        ]
+
+    def is_limited(self, request, email):
+        return any(
+            limiter.is_limited(key)
+            for limiter, key in self.get_limiters(request, email)
+        )
+
+    def hit(self, request, email):
+        for limiter, key in self.get_limiters(request, email):
+            limiter.hit(key)
+
+    def reset_email(self, request, email):
+        limiter, key = self.get_limiters(request, email)[1]
+        limiter.reset(key)
+
+
+login_rate_limit = AccountRateLimit("login")
+password_reset_rate_limit = AccountRateLimit("password_reset")
+email_verification_rate_limit = AccountRateLimit("email_verification")
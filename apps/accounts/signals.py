@@ -0,0 +1,56 @@
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.models import CustomUser, UserProfile
+
+from . import cache, models
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    cache.bump_user_version(instance.id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=models.EmailAddress)
+@receiver(post_delete, sender=models.EmailAddress)
+def user_related_changed(sender, instance, **kwargs):
+    cache.bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            cache.bump_user_version(instance.id)
+        return
+
+    # Changed from the group side, `instance` is the group
+    if action == "pre_clear":
+        instance._cleared_user_ids = list(
+            instance.user_set.values_list("id", flat=True)
+        )
+    elif action == "post_clear":
+        for user_id in getattr(instance, "_cleared_user_ids", []):
+            cache.bump_user_version(user_id)
+    elif action.startswith("post_"):
+        for user_id in pk_set:
+            cache.bump_user_version(user_id)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith("post_"):
+        cache.bump_groups_version()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def group_changed(sender, **kwargs):
+    cache.bump_groups_version()
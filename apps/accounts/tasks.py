@@ -93,3 +93,36 @@ def send_email_password_reset(user_id, site_name, url, lang: str = "en-us"):
     email_template = "email/password_reset_key"
     subject = "Password Reset E-mail"
     send_mail(subject, email_template, user.email, ctx)
+
+
+@shared_task(name="low_priority:purge_email_confirmations")
+def purge_email_confirmations(batch_size=None, max_batches=None):
+    """
+    Delete expired email confirmations, then the unverified addresses they
+    leave orphaned, in batches of `batch_size` rows, each in its own short
+    transaction. Stops after `max_batches` of each, the next run carries on.
+    """
+    batch_size = batch_size or app_settings.EMAIL_PURGE_BATCH_SIZE
+    max_batches = max_batches or app_settings.EMAIL_PURGE_MAX_BATCHES
+
+    deleted = {"confirmations": 0, "addresses": 0}
+    for key, delete in (
+        (
+            "confirmations",
+            models.EmailConfirmation.objects.delete_expired_confirmations,
+        ),
+        ("addresses", models.EmailAddress.objects.delete_orphaned),
+    ):
+        for _ in range(max_batches):
+            with transaction.atomic():
+                count = delete(batch_size)
+            if not count:
+                break
+            deleted[key] += count
+
+    logger.info(
+        "Deleted %s expired email confirmations and %s orphaned email addresses",
+        deleted["confirmations"],
+        deleted["addresses"],
+    )
+    return deleted
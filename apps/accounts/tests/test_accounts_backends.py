@@ -0,0 +1,101 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+def fresh(user):
+    # ModelBackend keeps its own per instance permission cache
+    return get_user_model().objects.get(id=user.id)
+
+
+@pytest.mark.django_db
+def test_permissions_cached_across_requests(auto_login_manager_user):
+    """A warm management request does not join the permission tables"""
+    inertia_client, user = auto_login_manager_user()
+    url = reverse("management:users")
+    inertia_client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = inertia_client.get(url)
+
+    sql = " ".join(query["sql"] for query in queries.captured_queries)
+    assert response.status_code == 200
+    assert response.json()["component"] == "Users"
+    assert "auth_permission" not in sql
+
+
+@pytest.mark.django_db
+def test_permissions_invalidated_on_group_permissions_change(create_user):
+    user = create_user()
+    assert not fresh(user).has_perm("core.can_view_users")
+
+    customer = Group.objects.get(name="customer")
+    permission = Permission.objects.get(codename="can_view_users")
+    customer.permissions.add(permission)
+    assert fresh(user).has_perm("core.can_view_users")
+
+    permission.group_set.remove(customer)
+    assert not fresh(user).has_perm("core.can_view_users")
+
+
+@pytest.mark.django_db
+def test_permissions_invalidated_on_user_groups_change(create_user):
+    user = create_user()
+    assert not fresh(user).has_perm("core.can_view_users")
+
+    user.groups.add(Group.objects.get(name="management"))
+    assert fresh(user).has_perm("core.can_view_users")
+    assert "management" in fresh(user).groups.values_list("name", flat=True)
+
+    user.groups.clear()
+    assert not fresh(user).has_perm("core.can_view_users")
+
+
+@pytest.mark.django_db
+def test_permissions_invalidated_on_user_permissions_change(create_user):
+    user = create_user()
+    assert not fresh(user).has_perm("core.can_edit_user")
+
+    permission = Permission.objects.get(codename="can_edit_user")
+    user.user_permissions.add(permission)
+    assert fresh(user).has_perm("core.can_edit_user")
+
+    permission.user_set.clear()
+    assert not fresh(user).has_perm("core.can_edit_user")
+
+
+@pytest.mark.django_db
+def test_permissions_inactive_user(create_user):
+    user = create_user()
+    user.groups.add(Group.objects.get(name="management"))
+    assert fresh(user).has_perm("core.can_view_users")
+
+    user.is_active = False
+    user.save()
+    assert not fresh(user).has_perm("core.can_view_users")
+
+
+@pytest.mark.django_db
+def test_sync_permissions_invalidates_permissions():
+    with mock.patch("apps.accounts.cache.bump_groups_version") as bump:
+        call_command("runscript", "sync_permissions")
+
+    assert bump.called
+
+
+@pytest.mark.django_db
+def test_permissions_short_timeout_on_local_cache(create_user, settings):
+    """Other processes never see the bumps of a local memory cache"""
+    settings.LOCAL_CACHE_TIMEOUT = 5
+    user = create_user()
+
+    with mock.patch("apps.accounts.cache.cache.set") as cache_set:
+        fresh(user).has_perm("core.can_view_users")
+
+    assert {call.args[2] for call in cache_set.call_args_list} == {5}
@@ -0,0 +1,108 @@
+import pytest
+from django.contrib.auth import hashers as auth_hashers
+from django.core.management import call_command
+from django.urls import reverse
+
+from apps.accounts import hashers
+from apps.core.models import CustomUser
+
+PBKDF2_HASHERS = [
+    "apps.accounts.hashers.PBKDF2PasswordHasher",
+    "apps.accounts.hashers.ScryptPasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+
+def test_hasher_costs(settings):
+    settings.PASSWORD_HASHER_COSTS = {"pbkdf2_sha256": {"iterations": 1000}}
+    hasher = hashers.PBKDF2PasswordHasher()
+
+    assert hasher.iterations == 1000
+    encoded = hasher.encode("Qwer.1234", hasher.salt())
+    assert encoded.startswith("pbkdf2_sha256$1000$")
+    assert not hasher.must_update(encoded)
+
+    settings.PASSWORD_HASHER_COSTS = {}
+    assert hasher.iterations == 320000
+    assert hasher.must_update(encoded)
+
+
+def test_scrypt_hasher_high_work_factor(settings):
+    """Work factors over the OpenSSL default memory limit should hash"""
+    settings.PASSWORD_HASHER_COSTS = {"scrypt": {"work_factor": 2**15}}
+    hasher = hashers.ScryptPasswordHasher()
+
+    encoded = hasher.encode("Qwer.1234", hasher.salt())
+
+    assert encoded.startswith("scrypt$32768$")
+    assert hasher.verify("Qwer.1234", encoded)
+
+
+def test_scrypt_hasher_lowered_work_factor(settings):
+    """Hashes made with a higher work factor should still verify"""
+    settings.PASSWORD_HASHER_COSTS = {"scrypt": {"work_factor": 2**16}}
+    hasher = hashers.ScryptPasswordHasher()
+    encoded = hasher.encode("Qwer.1234", hasher.salt())
+
+    settings.PASSWORD_HASHER_COSTS = {"scrypt": {"work_factor": 2**14}}
+
+    assert hasher.verify("Qwer.1234", encoded)
+    assert hasher.must_update(encoded)
+
+
+def test_password_hasher_policy(settings):
+    settings.PASSWORD_HASHERS = PBKDF2_HASHERS[1:] + PBKDF2_HASHERS[:1]
+
+    assert isinstance(auth_hashers.get_hasher(), hashers.ScryptPasswordHasher)
+    assert auth_hashers.make_password("Qwer.1234").startswith("scrypt$")
+
+
+@pytest.mark.django_db
+def test_login_rehashes_password(inertia_client, settings):
+    """Hashes with other costs should be upgraded on a successful login"""
+    settings.PASSWORD_HASHERS = PBKDF2_HASHERS
+    settings.PASSWORD_HASHER_COSTS = {"pbkdf2_sha256": {"iterations": 1000}}
+    user = CustomUser.create_user("rehash@test.com", "Qwer.1234")
+    assert user.password.startswith("pbkdf2_sha256$1000$")
+
+    settings.PASSWORD_HASHER_COSTS = {"pbkdf2_sha256": {"iterations": 2000}}
+    response = inertia_client.post(
+        reverse("accounts:login"),
+        {"email": "rehash@test.com", "password": "Qwer.1234"},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 302
+    user.refresh_from_db()
+    assert user.password.startswith("pbkdf2_sha256$2000$")
+
+
+@pytest.mark.django_db
+def test_login_rehashes_legacy_algorithm(inertia_client, settings):
+    """Hashes of other hashers should be upgraded to the preferred one"""
+    settings.PASSWORD_HASHERS = PBKDF2_HASHERS
+    settings.PASSWORD_HASHER_COSTS = {"pbkdf2_sha256": {"iterations": 1000}}
+    user = CustomUser.create_user("legacy@test.com", None)
+    user.password = auth_hashers.make_password("Qwer.1234", hasher="pbkdf2_sha1")
+    user.save()
+
+    response = inertia_client.post(
+        reverse("accounts:login"),
+        {"email": "legacy@test.com", "password": "Qwer.1234"},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 302
+    user.refresh_from_db()
+    assert auth_hashers.identify_hasher(user.password).algorithm == "pbkdf2_sha256"
+
+
+def test_benchmark_hashers_command(settings, capsys):
+    settings.PASSWORD_HASHERS = PBKDF2_HASHERS[:1]
+    settings.PASSWORD_HASHER_COSTS = {"pbkdf2_sha256": {"iterations": 1000}}
+
+    call_command("benchmark_hashers", "--seconds", "0.01")
+
+    out = capsys.readouterr().out
+    assert "pbkdf2_sha256: " in out
+    assert "hashes/s per core" in out
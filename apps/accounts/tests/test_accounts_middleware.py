@@ -0,0 +1,148 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts import cache, models
+from apps.core.models import UserProfile
+
+
+@pytest.mark.django_db
+def test_auth_props_cached(auto_login_user):
+    """A warm request does not query the tables behind the auth props"""
+    inertia_client, user = auto_login_user()
+    url = reverse("core:index")
+    inertia_client.get(url)
+
+    with CaptureQueriesContext(connection) as queries, mock.patch(
+        "apps.accounts.cache.build_auth_props", wraps=cache.build_auth_props
+    ) as build_auth_props:
+        response = inertia_client.get(url)
+
+    sql = " ".join(query["sql"] for query in queries.captured_queries)
+    assert response.json()["props"]["auth"]["user"]["email"] == user.email
+    assert not build_auth_props.called
+    assert "accounts_emailaddress" not in sql
+    assert "auth_permission" not in sql
+
+
+@pytest.mark.django_db
+def test_auth_props_short_timeout_on_local_cache(create_user, settings):
+    """Other processes never see the bumps of a local memory cache"""
+    settings.LOCAL_CACHE_TIMEOUT = 5
+    user = create_user()
+
+    with mock.patch("apps.accounts.cache.cache.set") as cache_set:
+        cache.get_auth_props(user)
+
+    assert {call.args[2] for call in cache_set.call_args_list} == {5}
+
+
+@pytest.mark.django_db
+def test_auth_props_invalidated_on_user_change(create_user):
+    user = create_user()
+    props = cache.get_auth_props(user)
+    assert props["user"]["firstName"] == ""
+
+    user.first_name = "Jhon"
+    user.save()
+
+    assert cache.get_auth_props(user)["user"]["firstName"] == "Jhon"
+
+
+@pytest.mark.django_db
+def test_auth_props_invalidated_on_related_change(create_user):
+    user = create_user()
+    assert cache.get_auth_props(user)["emailAddress"]["verified"] == ""
+    assert cache.get_auth_props(user)["user"]["groups"] == ["customer"]
+
+    email_address = models.EmailAddress.get_or_create(user)
+    email_address.primary = True
+    email_address.verified = True
+    email_address.save()
+    assert cache.get_auth_props(user)["emailAddress"]["verified"] is True
+
+    UserProfile.objects.create(user=user)
+    assert cache.get_auth_props(user)["user"]["avatar"] == (
+        "/static/img/photo_default.png"
+    )
+
+    management = Group.objects.get(name="management")
+    management.user_set.add(user)
+    assert "management" in cache.get_auth_props(user)["user"]["groups"]
+
+    user.groups.clear()
+    assert cache.get_auth_props(user)["user"]["groups"] == []
+
+
+@pytest.mark.django_db
+def test_auth_props_invalidated_on_group_permissions_change(create_user):
+    user = create_user()
+    assert cache.get_auth_props(user)["user"]["permissions"] == []
+
+    permission = Permission.objects.get(codename="can_view_users")
+    Group.objects.get(name="customer").permissions.add(permission)
+
+    # Fresh instance, ModelBackend keeps its own per instance permission cache
+    user = get_user_model().objects.get(id=user.id)
+    assert cache.get_auth_props(user)["user"]["permissions"] == ["core.can_view_users"]
+
+
+@pytest.mark.django_db
+def test_auth_props_lazy_on_partial_reload(auto_login_manager_user):
+    """Partial reloads that do not ask for `auth` never build it"""
+    inertia_client, user = auto_login_manager_user()
+
+    with mock.patch("apps.accounts.cache.get_auth_props") as get_auth_props:
+        response = inertia_client.get(
+            reverse("management:users"),
+            HTTP_X_INERTIA_PARTIAL_DATA="users,count",
+            HTTP_X_INERTIA_PARTIAL_COMPONENT="Users",
+        )
+
+    data = response.json()
+    assert not get_auth_props.called
+    assert set(data["props"]) == {"users", "count"}
+
+
+@pytest.mark.django_db
+def test_auth_props_lazy_on_redirect(auto_login_user):
+    """Redirects never build the shared props"""
+    inertia_client, user = auto_login_user()
+
+    with mock.patch("apps.accounts.cache.get_auth_props") as get_auth_props:
+        response = inertia_client.post(
+            reverse("core:change_names"),
+            {"firstName": "Jhon", "lastName": "Doe"},
+            content_type="application/json",
+        )
+
+    assert response.status_code == 302
+    assert not get_auth_props.called
+
+
+@pytest.mark.django_db
+def test_auth_props_anonymous(inertia_client):
+    response = inertia_client.get(reverse("accounts:login"))
+
+    assert response.json()["props"]["auth"]["user"]["id"] == ""
+
+
+@pytest.mark.django_db
+def test_session_backend_replaced(auto_login_user):
+    """Sessions of the former Django ModelBackend stay logged in"""
+    inertia_client, user = auto_login_user()
+    session = inertia_client.session
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session.save()
+
+    response = inertia_client.get(reverse("core:index"))
+
+    assert response.json()["component"] == "Index"
+    assert inertia_client.session[BACKEND_SESSION_KEY] == (
+        "apps.accounts.backends.ModelBackend"
+    )
@@ -2,9 +2,11 @@ import datetime
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.test import RequestFactory
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 
-from apps.accounts import app_settings, models
+from apps.accounts import app_settings, cache, models
 
 
 @pytest.mark.django_db
@@ -32,6 +34,41 @@ def test_email_address_methods():
     assert type(confirmation) == models.EmailConfirmation
 
 
+@pytest.mark.django_db
+def test_email_address_get_email_state(django_assert_num_queries):
+    User = get_user_model()
+    user = User.objects.create_user(email="normal@user.com", password="foo")
+    primary = models.EmailAddress.get_or_create(user, "normal@user.com")
+    primary.set_as_primary()
+    pending = models.EmailAddress.get_or_create(user, "new@user.com")
+    old_confirmation = models.EmailConfirmation.create(pending)
+    old_confirmation.sent = timezone.now() - datetime.timedelta(hours=1)
+    old_confirmation.save()
+    confirmation = models.EmailConfirmation.create(pending)
+    confirmation.sent = timezone.now()
+    confirmation.save()
+
+    with django_assert_num_queries(2):
+        state = models.EmailAddress.get_email_state(user)
+
+    assert state.primary == primary
+    assert state.pending == pending
+    assert state.confirmation == confirmation
+    assert models.EmailAddress.get_not_primary(user) == "new@user.com"
+
+
+@pytest.mark.django_db
+def test_email_address_get_email_state_empty():
+    User = get_user_model()
+    user = User.objects.create_user(email="normal@user.com", password="foo")
+
+    state = models.EmailAddress.get_email_state(user)
+
+    assert state == models.EmailState(None, None, None)
+    assert models.EmailAddress.get_not_primary(user) == ""
+    assert models.EmailAddress.get_primary(user) == ""
+
+
 @pytest.mark.django_db
 def test_email_confirmation():
     User = get_user_model()
@@ -77,3 +114,90 @@ def test_email_confirmation_confirm_email():
 
     assert email_address.verified
     assert email_address.primary
+
+
+@pytest.mark.django_db
+def test_email_address_get_or_create_deletes_old_emails():
+    User = get_user_model()
+    user = User.objects.create_user(email="normal@user.com", password="foo")
+    models.EmailAddress.get_or_create(user, "old@user.com")
+    models.EmailAddress.get_or_create(user, "other@user.com")
+
+    models.EmailAddress.get_or_create(user, "new@user.com")
+
+    assert list(
+        models.EmailAddress.objects.filter(user=user).values_list("email", flat=True)
+    ) == ["new@user.com"]
+
+
+@pytest.mark.django_db
+def test_email_confirmation_delete_old_emails():
+    User = get_user_model()
+    user = User.objects.create_user(email="normal@user.com", password="foo")
+    email_address = models.EmailAddress.get_or_create(user, "normal@user.com")
+    models.EmailConfirmation.create(email_address)
+    models.EmailConfirmation.create(email_address)
+
+    models.EmailConfirmation.delete_old_emails(email_address)
+
+    assert not models.EmailConfirmation.objects.filter(email_address=email_address)
+
+
+@pytest.mark.django_db
+def test_email_confirmation_delete_expired_confirmations():
+    User = get_user_model()
+    user = User.objects.create_user(email="normal@user.com", password="foo")
+    email_address = models.EmailAddress.get_or_create(user, "normal@user.com")
+    expired_sent = timezone.now() - datetime.timedelta(
+        days=app_settings.EMAIL_CONFIRMATION_EXPIRE_DAYS + 1
+    )
+    for _ in range(3):
+        models.EmailConfirmation.objects.create(
+            email_address=email_address,
+            key=get_random_string(64),
+            sent=expired_sent,
+        )
+    valid = models.EmailConfirmation.create(email_address)
+    valid.sent = timezone.now()
+    valid.save()
+
+    manager = models.EmailConfirmation.objects
+    assert manager.delete_expired_confirmations(batch_size=2) == 2
+    assert manager.delete_expired_confirmations() == 1
+    assert list(manager.filter(email_address=email_address)) == [valid]
+
+
+@pytest.mark.django_db
+def test_email_address_delete_orphaned():
+    User = get_user_model()
+    user = User.objects.create_user(email="normal@user.com", password="foo")
+    own = models.EmailAddress.get_or_create(user)
+    orphaned = models.EmailAddress.objects.create(user=user, email="old@user.com")
+    other = User.objects.create_user(email="other@user.com", password="foo")
+    pending = models.EmailAddress.get_or_create(other, "pending@user.com")
+    models.EmailConfirmation.create(pending)
+
+    assert list(models.EmailAddress.objects.all_orphaned()) == [orphaned]
+    assert models.EmailAddress.objects.delete_orphaned() == 1
+    assert models.EmailAddress.objects.filter(pk__in=[own.pk, pending.pk]).count() == 2
+
+
+@pytest.mark.django_db
+def test_request_email_state_memoized(create_user, django_assert_num_queries):
+    request = RequestFactory().get("/")
+    request.user = create_user()
+    models.EmailAddress.get_or_create(request.user)
+
+    with django_assert_num_queries(2):
+        state = cache.get_request_email_state(request)
+        assert cache.get_request_email_state(request) is state
+
+
+def test_account_rate_limits_partial_setting(settings):
+    """Scopes and values left out of the setting keep their defaults"""
+    settings.ACCOUNT_RATE_LIMITS = {"login": {"email": 1}}
+
+    limits = app_settings.ACCOUNT_RATE_LIMITS
+
+    assert limits["login"] == {"ip": 20, "email": 1, "window": 5 * 60}
+    assert limits["password_reset"] == {"ip": 10, "email": 3, "window": 60 * 60}
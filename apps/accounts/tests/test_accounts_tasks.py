@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.accounts import app_settings, models, tasks
+
+
+@pytest.mark.django_db
+def test_purge_email_confirmations():
+    User = get_user_model()
+    expired_sent = timezone.now() - timedelta(
+        days=app_settings.EMAIL_CONFIRMATION_EXPIRE_DAYS + 1
+    )
+    for index in range(3):
+        user = User.objects.create_user(email=f"user{index}@purge.com", password="foo")
+        email_address = models.EmailAddress.get_or_create(user, f"new{index}@purge.com")
+        confirmation = models.EmailConfirmation.create(email_address)
+        confirmation.sent = expired_sent
+        confirmation.save()
+    user = User.objects.create_user(email="valid@purge.com", password="foo")
+    valid = models.EmailAddress.get_or_create(user, "pending@purge.com")
+    confirmation = models.EmailConfirmation.create(valid)
+    confirmation.sent = timezone.now()
+    confirmation.save()
+
+    assert tasks.purge_email_confirmations(batch_size=2, max_batches=1) == {
+        "confirmations": 2,
+        "addresses": 2,
+    }
+    assert tasks.purge_email_confirmations(batch_size=2, max_batches=1) == {
+        "confirmations": 1,
+        "addresses": 1,
+    }
+    assert list(
+        models.EmailAddress.objects.filter(email__endswith="@purge.com").values_list(
+            "email", flat=True
+        )
+    ) == ["pending@purge.com"]
+    assert list(models.EmailConfirmation.objects.filter(email_address=valid)) == [
+        confirmation
+    ]
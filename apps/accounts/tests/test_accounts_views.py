@@ -1,12 +1,18 @@
+import sqlite3
+import threading
 from unittest import mock
 
 import pytest
 from django.contrib.auth.tokens import default_token_generator
+from django.contrib.sessions.models import Session
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
 from django.urls import reverse
 from django.utils import timezone
 
 from apps.accounts.models import EmailAddress, EmailConfirmation
 from apps.accounts.utils import user_pk_to_url_str
+from apps.core.models import CustomUser, GlobalSettings
 
 
 @pytest.mark.django_db
@@ -81,6 +87,66 @@ def test_logout_view(auto_login_user):
     assert response.status_code == 302
 
 
+@pytest.mark.django_db
+def test_login_view_rate_limit(inertia_client, create_user, test_password, settings):
+    """Failed logins over the limit should be rejected before authenticate"""
+    settings.ACCOUNT_RATE_LIMITS = {"login": {"ip": 10, "email": 2, "window": 300}}
+    user = create_user()
+    url = reverse("accounts:login")
+
+    for _ in range(2):
+        response = inertia_client.post(
+            url,
+            {"email": user.email.upper(), "password": "password"},
+            content_type="application/json",
+        )
+        assert response.json()["props"]["error"] == "Invalid email or password"
+
+    with mock.patch("apps.accounts.views.authenticate") as mock_authenticate:
+        response = inertia_client.post(
+            url,
+            {"email": user.email, "password": test_password},
+            content_type="application/json",
+        )
+
+    assert response.status_code == 200
+    assert (
+        response.json()["props"]["error"] == "Too many attempts, please try again later"
+    )
+    assert not mock_authenticate.called
+
+    # Other emails are only limited by the client IP
+    response = inertia_client.post(
+        url,
+        {"email": "other@test.com", "password": "password"},
+        content_type="application/json",
+    )
+    assert response.json()["props"]["error"] == "Invalid email or password"
+
+
+@pytest.mark.django_db
+def test_login_view_rate_limit_ip(inertia_client, settings):
+    """Failed logins from one IP should be limited whatever the email"""
+    settings.ACCOUNT_RATE_LIMITS = {"login": {"ip": 2, "email": 10, "window": 300}}
+    url = reverse("accounts:login")
+
+    errors = []
+    for index in range(3):
+        response = inertia_client.post(
+            url,
+            {"email": f"user{index}@test.com", "password": "password"},
+            content_type="application/json",
+            REMOTE_ADDR="10.0.0.1",
+        )
+        errors.append(response.json()["props"]["error"])
+
+    assert errors == [
+        "Invalid email or password",
+        "Invalid email or password",
+        "Too many attempts, please try again later",
+    ]
+
+
 @pytest.mark.django_db
 def test_register_view_get(inertia_client):
     """The response should return the Register component and props"""
@@ -112,6 +178,116 @@ def test_register_view_signup_user(inertia_client):
     assert response.status_code == 302
 
 
+@pytest.mark.django_db
+def test_register_view_taken_email(inertia_client, create_user):
+    """The response should return an error when the email is registered"""
+    create_user(email="jhondoe@test.com")
+
+    url = reverse("accounts:register")
+    response = inertia_client.post(
+        url,
+        {
+            "email": "jhondoe@test.com",
+            "password": "Qwer.1234",
+            "firstName": "Jhon",
+            "lastName": "Doe",
+        },
+        content_type="application/json",
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["props"]["error"] == "User already exist"
+
+
+@pytest.fixture
+def shared_database(django_db_setup, django_db_blocker, tmp_path):
+    """
+    Database access without a test transaction, for tests whose threads
+    commit on their own connections. Every connection to an in-memory SQLite
+    database gets its own one, so it is copied to a file first and the
+    threads must call the fixture value to use that copy. Its transactions
+    take the write lock when they begin, as a deferred one failing to
+    upgrade its lock is not retried by SQLite.
+    """
+    with django_db_blocker.unblock():
+        default = connections[DEFAULT_DB_ALIAS]
+        if not (default.vendor == "sqlite" and default.is_in_memory_db()):
+            yield lambda: None
+            return
+
+        path = str(tmp_path / "db.sqlite3")
+        default.ensure_connection()
+        target = sqlite3.connect(path)
+        default.connection.backup(target)
+        target.close()
+        settings_dict = {**default.settings_dict, "NAME": path}
+
+        class DatabaseWrapper(type(default)):
+            def _start_transaction_under_autocommit(self):
+                self.cursor().execute("BEGIN IMMEDIATE")
+
+        def use_copy():
+            connections[DEFAULT_DB_ALIAS] = DatabaseWrapper(
+                settings_dict, DEFAULT_DB_ALIAS
+            )
+
+        use_copy()
+        try:
+            yield use_copy
+        finally:
+            connections[DEFAULT_DB_ALIAS].close()
+            connections[DEFAULT_DB_ALIAS] = default
+
+
+def test_register_view_concurrent_signup(shared_database):
+    """Parallel sign ups with the same email should create a single user"""
+    url = reverse("accounts:register")
+    data = {
+        "email": "concurrent@test.com",
+        "password": "Qwer.1234",
+        "firstName": "Jhon",
+        "lastName": "Doe",
+    }
+    workers = 4
+    barrier = threading.Barrier(workers)
+    responses = []
+
+    def register():
+        shared_database()
+        client = Client(HTTP_X_REQUESTED_WITH="XMLHttpRequest", HTTP_X_INERTIA=True)
+        barrier.wait()
+        try:
+            responses.append(client.post(url, data, content_type="application/json"))
+        finally:
+            connection.close()
+
+    # No test transaction: every request commits on its own connection
+    GlobalSettings.objects.get_cached()
+    sessions = list(Session.objects.values_list("session_key", flat=True))
+    try:
+        with mock.patch("apps.accounts.tasks.email_confirmation"):
+            threads = [threading.Thread(target=register) for _ in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert CustomUser.objects.filter(email=data["email"]).count() == 1
+        assert sorted(response.status_code for response in responses) == [
+            200,
+            200,
+            200,
+            302,
+        ]
+        for response in responses:
+            if response.status_code == 200:
+                assert response.json()["props"]["error"] == "User already exist"
+    finally:
+        CustomUser.objects.filter(email=data["email"]).delete()
+        Session.objects.exclude(session_key__in=sessions).delete()
+
+
 @pytest.mark.django_db
 def test_register_view_empty_email_or_password_signup_user(inertia_client):
     """The response should return an error when email or password are empty"""
@@ -192,6 +368,42 @@ def test_email_verification_sent_with_email_not_registered(inertia_client):
     assert data["props"]["error"] == "This email is not registered"
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ["url_name", "scope"],
+    [
+        ("accounts:reset_password", "password_reset"),
+        ("accounts:email_verification_sent", "email_verification"),
+    ],
+)
+@mock.patch("apps.accounts.tasks.email_password_reset")
+@mock.patch("apps.accounts.tasks.email_confirmation")
+def test_email_views_rate_limit(
+    mock_confirmation,
+    mock_reset,
+    inertia_client,
+    create_user,
+    settings,
+    url_name,
+    scope,
+):
+    """Emails requested over the limit should not be sent"""
+    settings.ACCOUNT_RATE_LIMITS = {scope: {"ip": 10, "email": 1, "window": 3600}}
+    user = create_user()
+    url = reverse(url_name)
+
+    inertia_client.post(url, {"email": user.email}, content_type="application/json")
+    response = inertia_client.post(
+        url, {"email": user.email}, content_type="application/json"
+    )
+
+    assert response.status_code == 200
+    assert (
+        response.json()["props"]["error"] == "Too many attempts, please try again later"
+    )
+    assert mock_confirmation.call_count + mock_reset.call_count == 1
+
+
 @pytest.mark.django_db
 def test_confirm_email_invalid_key(inertia_client):
     """The response should return the ConfirmEmail component"""
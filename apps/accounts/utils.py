@@ -68,13 +68,17 @@ def get_email_confirmation_url(request, emailconfirmation):
     return ret
 
 
-def generate_url_password_reset(request, user):
+def get_password_reset_path(user):
     token_generator = default_token_generator
     temp_key = token_generator.make_token(user)
-    path = reverse(
+    return reverse(
         "accounts:reset_password_from_key",
         kwargs=dict(uidb36=user_pk_to_url_str(user), key=temp_key),
     )
+
+
+def generate_url_password_reset(request, user):
+    path = get_password_reset_path(user)
     url = build_absolute_uri(request, path)
 
     return url
@@ -121,11 +125,3 @@ def get_user_from_uidb36(uidb36):
         return User.objects.get(pk=pk)
     except (ValueError, User.DoesNotExist):
         raise ValueError("The password reset token was invalid.")
-
-
-def custom_password():
-    import secrets
-    import string
-
-    password_characters = string.ascii_letters + string.digits + ".;*!+"
-    return "".join(secrets.choice(password_characters) for i in range(10))
@@ -15,7 +15,7 @@ from apps.core import models as core_models
 from utils.decorator import clean_message, json_format_required
 from utils.inertia import share_other_view
 
-from . import app_settings, models, serializers, tasks, utils
+from . import app_settings, models, ratelimit, serializers, tasks, utils
 
 INTERNAL_RESET_URL_KEY = "set-password"
 INTERNAL_RESET_SESSION_KEY = "_password_reset_key"
@@ -35,6 +35,11 @@ def login_view(request):
         except ValidationError as err:
             share(request, error="Exists errors on form", errors=err.messages)
         else:
+            # Checked before authenticate, rejected attempts hash nothing
+            if ratelimit.login_rate_limit.is_limited(request, data.get("email")):
+                share(request, error=ratelimit.RATE_LIMITED_ERROR)
+                return render(request, "Login", {})
+
             user = authenticate(
                 request, password=data.get("password"), email=data.get("email")
             )
@@ -49,10 +54,12 @@ def login_view(request):
                     return redirect("accounts:email_verification_sent")
 
             if user is not None:
+                ratelimit.login_rate_limit.reset_email(request, data.get("email"))
                 login(request, user)
                 share(request)
                 return redirect(app_settings.ACCOUNT_LOGIN_REDIRECT_URL)
             else:
+                ratelimit.login_rate_limit.hit(request, data.get("email"))
                 share(
                     request,
                     error="Invalid email or password",
@@ -72,7 +79,7 @@ def logout_view(request):
 @clean_message
 @json_format_required
 def register_view(request):
-    global_settings = core_models.GlobalSettings.objects.first()
+    global_settings = core_models.GlobalSettings.objects.get_cached()
     if global_settings and not global_settings.active_registration:
         return redirect(app_settings.ACCOUNT_LOGIN_REDIRECT_URL)
 
@@ -133,6 +140,13 @@ def email_verification_sent(request):
         except ValidationError as err:
             share(request, error="Exists errors on form", errors=err.messages)
         else:
+            if ratelimit.email_verification_rate_limit.is_limited(
+                request, data.get("email")
+            ):
+                share(request, error=ratelimit.RATE_LIMITED_ERROR)
+                return render(request, "EmailVerificationSend", {})
+            ratelimit.email_verification_rate_limit.hit(request, data.get("email"))
+
             user = core_models.CustomUser.objects.filter(email=data.get("email"))
             if user:
                 can_send = models.EmailConfirmation.can_send_cooldown_period(
@@ -183,6 +197,13 @@ def password_reset(request):
         except ValidationError as err:
             share(request, error="Exists errors on form", errors=err.messages)
         else:
+            if ratelimit.password_reset_rate_limit.is_limited(
+                request, data.get("email")
+            ):
+                share(request, error=ratelimit.RATE_LIMITED_ERROR)
+                return render(request, "PasswordReset", {})
+            ratelimit.password_reset_rate_limit.hit(request, data.get("email"))
+
             user = core_models.CustomUser.objects.filter(email=data.get("email"))
             if user:
                 tasks.email_password_reset(request, user.first())
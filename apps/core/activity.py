@@ -0,0 +1,122 @@
+"""
+Trackers of the last activity time of a logged in user, used to close idle
+sessions. Times are integer epochs and are only written again once they
+are SESSION_ACTIVITY_GRANULARITY seconds old, so most requests write
+nothing.
+"""
+import time
+from datetime import datetime
+
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from . import app_settings
+
+LEGACY_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class SessionActivityTracker:
+    """Keep the time in the session, a write only every granularity period"""
+
+    key = "last_activity"
+
+    def get(self, request):
+        value = request.session.get(self.key)
+        if isinstance(value, str):
+            # Sessions written before the time was stored as an epoch
+            try:
+                return int(datetime.strptime(value, LEGACY_FORMAT).timestamp())
+            except ValueError:
+                return None
+        return value
+
+    def set(self, request, response, timestamp):
+        request.session[self.key] = timestamp
+
+    def clear(self, request, response):
+        request.session.pop(self.key, None)
+
+
+class CacheActivityTracker:
+    """Keep the time in the cache, the session is never written"""
+
+    key = "core:last_activity:{0}"
+
+    def get_key(self, request):
+        return self.key.format(request.session.session_key)
+
+    def get(self, request):
+        if not request.session.session_key:
+            return None
+        return cache.get(self.get_key(request))
+
+    def set(self, request, response, timestamp):
+        if request.session.session_key:
+            cache.set(
+                self.get_key(request), timestamp, app_settings.SESSION_ACTIVITY_MAX_AGE
+            )
+
+    def clear(self, request, response):
+        if request.session.session_key:
+            cache.delete(self.get_key(request))
+
+
+class SignedCookieActivityTracker:
+    """
+    Keep the time in a signed cookie, nothing is stored on the server. A
+    client dropping the cookie restarts its idle period. The value is bound
+    to the session key, so a cookie left over from a previous session (the
+    key changes on login) is ignored.
+    """
+
+    cookie_name = "last_activity"
+    salt = "apps.core.activity"
+
+    def get(self, request):
+        try:
+            value = request.get_signed_cookie(
+                self.cookie_name,
+                salt=self.salt,
+                max_age=app_settings.SESSION_ACTIVITY_MAX_AGE,
+            )
+        except (KeyError, signing.BadSignature):
+            return None
+
+        session_key, _, timestamp = value.rpartition(":")
+        if not session_key or session_key != request.session.session_key:
+            return None
+
+        try:
+            return int(timestamp)
+        except ValueError:
+            return None
+
+    def set(self, request, response, timestamp):
+        if not request.session.session_key:
+            return
+        response.set_signed_cookie(
+            self.cookie_name,
+            "{0}:{1}".format(request.session.session_key, timestamp),
+            salt=self.salt,
+            max_age=app_settings.SESSION_ACTIVITY_MAX_AGE,
+            httponly=True,
+            samesite="Lax",
+        )
+
+    def clear(self, request, response):
+        response.delete_cookie(self.cookie_name, samesite="Lax")
+
+
+_trackers = {}
+
+
+def get_activity_tracker():
+    path = app_settings.SESSION_ACTIVITY_TRACKER
+    if path not in _trackers:
+        _trackers[path] = import_string(path)()
+    return _trackers[path]
+
+
+def now():
+    return int(time.time())
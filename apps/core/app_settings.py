@@ -18,11 +18,121 @@ class AppSettings(object):
     def MAX_SIZE_FILE(self):
         return self._setting("MAX_SIZE_FILE", 10)
 
+    @property
+    def MEDIA_INLINE_BASE64(self):
+        """
+        Embed profile photos and app logo as base64 data URIs instead of
+        returning cacheable media URLs
+        """
+        return self._setting("MEDIA_INLINE_BASE64", False)
+
+    @property
+    def MEDIA_CACHE_MAX_AGE(self):
+        """max-age in seconds sent for versioned media URLs"""
+        return self._setting("MEDIA_CACHE_MAX_AGE", 60 * 60 * 24 * 365)
+
+    @property
+    def THUMBNAIL_SIZES(self):
+        """Sizes in px of the thumbnails built for photos and logos"""
+        return self._setting("THUMBNAIL_SIZES", (64, 128, 256))
+
+    @property
+    def THUMBNAIL_FORMAT(self):
+        """Image format of the thumbnails, WEBP or PNG"""
+        return self._setting("THUMBNAIL_FORMAT", "WEBP")
+
+    @property
+    def AVATAR_SIZE(self):
+        """Size in px of the avatar shown in the layout"""
+        return self._setting("AVATAR_SIZE", 64)
+
+    @property
+    def PROFILE_PHOTO_SIZE(self):
+        """Size in px of the photo shown in the profile pages"""
+        return self._setting("PROFILE_PHOTO_SIZE", 256)
+
+    @property
+    def LOGO_SIZE(self):
+        """Size in px of the app logo"""
+        return self._setting("LOGO_SIZE", 256)
+
+    @property
+    def MEDIA_PREFIXES(self):
+        """
+        Media paths served by the `core:media` view to authenticated users,
+        anything else under MEDIA_ROOT is never served
+        """
+        return self._setting("MEDIA_PREFIXES", ("profile/", "settings/"))
+
+    @property
+    def PUBLIC_MEDIA_PREFIXES(self):
+        """Media paths, among MEDIA_PREFIXES, served to anonymous users"""
+        return self._setting("PUBLIC_MEDIA_PREFIXES", ("settings/",))
+
     @property
     def SESSION_EXPIRE_TIME(self):
         """Duration of session inactivity expresed in min"""
         return self._setting("SESSION_EXPIRE_TIME", 60)
 
+    @property
+    def SESSION_ACTIVITY_TRACKER(self):
+        """
+        Where the last activity time used by the idle timeout is kept, see
+        apps.core.activity
+        """
+        return self._setting(
+            "SESSION_ACTIVITY_TRACKER", "apps.core.activity.SessionActivityTracker"
+        )
+
+    @property
+    def SESSION_ACTIVITY_GRANULARITY(self):
+        """Seconds before the last activity time is written again"""
+        return self._setting("SESSION_ACTIVITY_GRANULARITY", 60)
+
+    @property
+    def SESSION_ACTIVITY_MAX_AGE(self):
+        """Seconds the cache and cookie trackers keep the last activity time"""
+        return self._setting("SESSION_ACTIVITY_MAX_AGE", settings.SESSION_COOKIE_AGE)
+
+    @property
+    def SESSION_CLEAR_BATCH_SIZE(self):
+        """Expired sessions deleted per query by clear_expired_sessions"""
+        return self._setting("SESSION_CLEAR_BATCH_SIZE", 1000)
+
+    @property
+    def SESSION_CLEAR_MAX_BATCHES(self):
+        """Batches deleted per clear_expired_sessions run"""
+        return self._setting("SESSION_CLEAR_MAX_BATCHES", 100)
+
+    @property
+    def GLOBAL_SETTINGS_CACHE_TIMEOUT(self):
+        """
+        Seconds the GlobalSettings row is kept in a shared cache, capped at
+        LOCAL_CACHE_TIMEOUT on a process-local one
+        """
+        return self._setting("GLOBAL_SETTINGS_CACHE_TIMEOUT", 60 * 60 * 24)
+
+    @property
+    def GLOBAL_SETTINGS_LOCAL_CACHE_TIMEOUT(self):
+        """
+        Seconds a process keeps its own copy of the GlobalSettings row before
+        checking the shared cache again
+        """
+        return self._setting("GLOBAL_SETTINGS_LOCAL_CACHE_TIMEOUT", 10)
+
+    @property
+    def REQUEST_QUERY_BUDGET(self):
+        """
+        Max number of queries a request may run before it is reported, only
+        checked with DEBUG on. None disables the check
+        """
+        return self._setting("REQUEST_QUERY_BUDGET", None)
+
+    @property
+    def REQUEST_QUERY_BUDGET_RAISE(self):
+        """Raise QueryBudgetExceeded instead of logging a warning"""
+        return self._setting("REQUEST_QUERY_BUDGET_RAISE", False)
+
 
 app_settings = AppSettings()
 app_settings.__name__ = __name__
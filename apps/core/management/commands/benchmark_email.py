@@ -0,0 +1,63 @@
+"""Command to benchmark sending emails one connection per message or batched"""
+
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from utils.email import EMail, EmailDispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Send test emails to an SMTP server, e.g. the debugging server of "
+        "`python -m smtpd -n -c DebuggingServer localhost:1025` (aiosmtpd on "
+        "Python 3.12+), opening a connection per message and then with "
+        "EmailDispatcher"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=200)
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--port", type=int, default=1025)
+
+    def get_connection(self, options):
+        return get_connection(
+            "django.core.mail.backends.smtp.EmailBackend",
+            host=options["host"],
+            port=options["port"],
+            username="",
+            password="",
+            use_tls=False,
+        )
+
+    def get_messages(self, count):
+        messages = []
+        for index in range(count):
+            message = EMail(to=f"user{index}@example.com", subject="Benchmark")
+            message._text = "Benchmark message {0}".format(index)
+            messages.append(message)
+        return messages
+
+    def handle(self, *args, **options):
+        count = options["count"]
+
+        start = time.perf_counter()
+        for message in self.get_messages(count):
+            message.send(connection=self.get_connection(options))
+        single = time.perf_counter() - start
+        self.report("connection per message", count, single)
+
+        start = time.perf_counter()
+        with EmailDispatcher(connection=self.get_connection(options)) as dispatcher:
+            for message in self.get_messages(count):
+                dispatcher.add(message)
+        batched = time.perf_counter() - start
+        self.report("EmailDispatcher", dispatcher.sent, batched)
+
+    def report(self, name, count, seconds):
+        self.stdout.write(
+            "{0:>24}: {1} emails in {2:.2f} s ({3:.1f} emails/s)".format(
+                name, count, seconds, count / seconds if seconds else 0
+            )
+        )
@@ -1,6 +1,16 @@
+import time
+
 from django.contrib.auth.base_user import BaseUserManager
+from django.core.cache import cache
+from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from utils.cache import get_timeout
+
+from . import app_settings
+
+_MISSING = object()
+
 
 class CustomUserManager(BaseUserManager):
     """
@@ -33,3 +43,46 @@ class CustomUserManager(BaseUserManager):
         if extra_fields.get("is_superuser") is not True:
             raise ValueError(_("Superuser must have is_superuser=True."))
         return self.create_user(email, password, **extra_fields)
+
+
+class GlobalSettingsManager(models.Manager):
+    """
+    Manager for the singleton ``GlobalSettings`` row. ``get_cached`` keeps a
+    process-wide copy in front of the Django cache so hot paths (middlewares,
+    template tags) do not query the table on every request. Changes are
+    seen by every process through a shared cache, a process-local one keeps
+    the row LOCAL_CACHE_TIMEOUT seconds at most, see utils.cache.
+    """
+
+    CACHE_KEY = "core:global_settings"
+    _local = {}
+
+    def get_cached(self):
+        """
+        Return the settings row (or None) without touching the database when
+        warm. The instance is shared, treat it as read only.
+        """
+        now = time.monotonic()
+        local = self._local
+        if local and local["expires"] > now:
+            return local["value"]
+
+        value = cache.get(self.CACHE_KEY, _MISSING)
+        if value is _MISSING:
+            value = self.first()
+            cache.set(
+                self.CACHE_KEY,
+                value,
+                get_timeout(app_settings.GLOBAL_SETTINGS_CACHE_TIMEOUT),
+            )
+
+        GlobalSettingsManager._local = {
+            "value": value,
+            "expires": now + app_settings.GLOBAL_SETTINGS_LOCAL_CACHE_TIMEOUT,
+        }
+        return value
+
+    def clear_cached(self):
+        """Drop both the in-process copy and the shared cache entry."""
+        GlobalSettingsManager._local = {}
+        cache.delete(self.CACHE_KEY)
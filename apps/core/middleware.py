@@ -1,12 +1,141 @@
-from datetime import datetime
+import logging
 
+from django.conf import settings as django_settings
 from django.contrib.auth import logout
+from django.db import connections
 from django.shortcuts import redirect
 from django.utils import translation
 from django.utils.deprecation import MiddlewareMixin
 from inertia import share
 
-from . import app_settings, models
+from apps.accounts.middleware import get_auth_props
+from utils.inertia import share_lazy
+
+from . import activity, app_settings, models
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_global_settings_props(global_settings):
+    if global_settings:
+        settings = {
+            "appName": global_settings.name_app
+            if not global_settings.name_app == ""
+            else "Django Easystart",
+            "appLogo": global_settings.get_logo(app_settings.LOGO_SIZE),
+            "timeExpiredSession": global_settings.session_expire_time,
+            "activeRegistration": global_settings.active_registration,
+        }
+    else:
+        settings = {
+            "appName": "Django Easystart",
+            "appLogo": "/static/img/logo.png",
+            "timeExpiredSession": app_settings.SESSION_EXPIRE_TIME,
+            "activeRegistration": True,
+        }
+    return settings
+
+
+def activate_user_language(request):
+    if request.user.is_authenticated:
+        try:
+            language = request.user.userprofile.language
+        except models.UserProfile.DoesNotExist:
+            language = "en-us"
+        translation.activate(language)
+        share(request, user_language=language)
+    else:
+        share(request, user_language=None)
+
+
+def check_session_idle_timeout(request, global_settings):
+    """
+    Log out the user and return a redirect when the session is idle. Marks
+    the request when the last activity time needs to be written, see
+    update_last_activity.
+    """
+    # Timeout is done only for authenticated logged in users.
+    if not request.user.is_authenticated:
+        return None
+
+    tracker = activity.get_activity_tracker()
+    current = activity.now()
+    idle_timeout = int(app_settings.SESSION_EXPIRE_TIME)
+    if global_settings:
+        idle_timeout = global_settings.session_expire_time
+
+    last_activity = tracker.get(request)
+    if last_activity is None:
+        request._last_activity_update = current
+        return None
+
+    # Timeout if idle time period is exceeded.
+    if current - last_activity > idle_timeout * 60:
+        response = redirect("accounts:login")
+        tracker.clear(request, response)
+        logout(request)
+        share(
+            request,
+            error="Your session has been closed due to inactivity",
+            errors={"error": "Your session has been closed due to inactivity"},
+        )
+        share(request, message_other_view=True)
+        return response
+
+    # Written at most once per granularity period, so the time may be up to
+    # that many seconds older than the real last activity
+    granularity = app_settings.SESSION_ACTIVITY_GRANULARITY
+    if request.accepts("text/html") and current - last_activity >= granularity:
+        request._last_activity_update = current
+
+    return None
+
+
+def update_last_activity(request, response):
+    timestamp = getattr(request, "_last_activity_update", None)
+    if timestamp is not None and request.user.is_authenticated:
+        activity.get_activity_tracker().set(request, response, timestamp)
+
+
+class QueryBudget:
+    """
+    Count the queries run on every database connection while active and
+    report when they exceed `budget`.
+    """
+
+    def __init__(self, request, budget):
+        self.request = request
+        self.budget = budget
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        for connection in connections.all():
+            connection.execute_wrappers.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for connection in connections.all():
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+        if exc_type is None and self.count > self.budget:
+            message = "%s %s ran %d queries, budget is %d" % (
+                self.request.method,
+                self.request.path,
+                self.count,
+                self.budget,
+            )
+            if app_settings.REQUEST_QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
 
 
 class CorePropsMiddleware:
@@ -15,37 +144,13 @@ class CorePropsMiddleware:
         # One-time configuration and initialization.
 
     def __call__(self, request):
-
-        if request.user.is_authenticated:
-            try:
-                user_profile = models.UserProfile.objects.get(user=request.user)
-            except models.UserProfile.DoesNotExist:
-                language = "en-us"
-            else:
-                language = user_profile.language
-            translation.activate(language)
-            share(request, user_language=language)
-        else:
-            share(request, user_language=None)
-
-        global_settings = models.GlobalSettings.objects.first()
-        if global_settings:
-            settings = {
-                "appName": global_settings.name_app
-                if not global_settings.name_app == ""
-                else "Django Easystart",
-                "appLogo": global_settings.get_logo(),
-                "timeExpiredSession": global_settings.session_expire_time,
-                "activeRegistration": global_settings.active_registration,
-            }
-        else:
-            settings = {
-                "appName": "Django Easystart",
-                "appLogo": "/static/img/logo.png",
-                "timeExpiredSession": app_settings.SESSION_EXPIRE_TIME,
-                "activeRegistration": True,
-            }
-        share(request, global_settings=settings)
+        activate_user_language(request)
+        share_lazy(
+            request,
+            global_settings=lambda: get_global_settings_props(
+                models.GlobalSettings.objects.get_cached()
+            ),
+        )
 
         response = self.get_response(request)
         return response
@@ -55,38 +160,50 @@ class SessionIdleTimeout(MiddlewareMixin):
     """Middleware class to timeout a session after a specified time period."""
 
     def process_request(self, request):
-        # Timeout is done only for authenticated logged in users.
-        if request.user.is_authenticated:
-
-            current = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-            idle_timeout = int(app_settings.SESSION_EXPIRE_TIME)
-
-            global_settings = models.GlobalSettings.objects.first()
-            if global_settings:
-                idle_timeout = global_settings.session_expire_time
-
-            # Timeout if idle time period is exceeded.
-            if "last_activity" in request.session:
-                last_activity = datetime.strptime(
-                    request.session["last_activity"], "%Y-%m-%dT%H:%M:%S"
-                )
-                now = datetime.strptime(current, "%Y-%m-%dT%H:%M:%S")
-
-                if (now - last_activity).seconds > idle_timeout * 60:
-                    logout(request)
-                    share(
-                        request,
-                        error="Your session has been closed due to inactivity",
-                        errors={
-                            "error": "Your session has been closed due to inactivity"
-                        },
-                    )
-                    share(request, message_other_view=True)
-                    return redirect("accounts:login")
-
-                if request.accepts("text/html"):
-                    request.session["last_activity"] = current
-            else:
-                request.session["last_activity"] = current
+        return check_session_idle_timeout(
+            request, models.GlobalSettings.objects.get_cached()
+        )
 
-        return None
+    def process_response(self, request, response):
+        update_last_activity(request, response)
+        return response
+
+
+class PropsMiddleware:
+    """
+    Single pass replacement for AuthPropsMiddleware, CorePropsMiddleware and
+    SessionIdleTimeout. The user profile comes with the user (see
+    apps.accounts.backends.ModelBackend) and the global settings are read
+    once for all three behaviours.
+
+    With DEBUG on and REQUEST_QUERY_BUDGET set, requests running more
+    queries than the budget are logged, or raise QueryBudgetExceeded when
+    REQUEST_QUERY_BUDGET_RAISE is set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        budget = app_settings.REQUEST_QUERY_BUDGET
+        if not django_settings.DEBUG or budget is None:
+            return self.process(request)
+
+        with QueryBudget(request, budget):
+            return self.process(request)
+
+    def process(self, request):
+        global_settings = models.GlobalSettings.objects.get_cached()
+
+        activate_user_language(request)
+        share_lazy(
+            request,
+            auth=lambda: get_auth_props(request),
+            global_settings=lambda: get_global_settings_props(global_settings),
+        )
+
+        response = check_session_idle_timeout(request, global_settings)
+        if response is None:
+            response = self.get_response(request)
+            update_last_activity(request, response)
+        return response
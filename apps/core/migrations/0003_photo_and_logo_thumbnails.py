@@ -0,0 +1,23 @@
+# Generated by Django 4.0.7 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_globalsettings_userprofile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="globalsettings",
+            name="logo_thumbnails",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="photo_thumbnails",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
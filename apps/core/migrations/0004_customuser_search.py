@@ -0,0 +1,95 @@
+from django.db import migrations
+
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+
+# PostgreSQL: trigram GIN indexes on the same UPPER(...) expression Django
+# builds for `icontains`, so the existing LIKE '%term%' lookups use them.
+POSTGRES_INDEX = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS core_customuser_{0}_trgm "
+    'ON core_customuser USING gin ((UPPER("{0}"::text)) gin_trgm_ops)'
+)
+POSTGRES_DROP_INDEX = "DROP INDEX CONCURRENTLY IF EXISTS core_customuser_{0}_trgm"
+
+# SQLite: FTS5 trigram table over core_customuser kept in sync by triggers.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_customuser_search USING fts5("
+    "email, first_name, last_name, content='core_customuser', "
+    "content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER core_customuser_search_ai AFTER INSERT ON core_customuser "
+    "BEGIN "
+    "INSERT INTO core_customuser_search(rowid, email, first_name, last_name) "
+    "VALUES (new.id, new.email, new.first_name, new.last_name); "
+    "END",
+    "CREATE TRIGGER core_customuser_search_ad AFTER DELETE ON core_customuser "
+    "BEGIN "
+    "INSERT INTO core_customuser_search"
+    "(core_customuser_search, rowid, email, first_name, last_name) "
+    "VALUES ('delete', old.id, old.email, old.first_name, old.last_name); "
+    "END",
+    "CREATE TRIGGER core_customuser_search_au AFTER UPDATE OF "
+    "email, first_name, last_name ON core_customuser "
+    "BEGIN "
+    "INSERT INTO core_customuser_search"
+    "(core_customuser_search, rowid, email, first_name, last_name) "
+    "VALUES ('delete', old.id, old.email, old.first_name, old.last_name); "
+    "INSERT INTO core_customuser_search(rowid, email, first_name, last_name) "
+    "VALUES (new.id, new.email, new.first_name, new.last_name); "
+    "END",
+    "INSERT INTO core_customuser_search(core_customuser_search) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_customuser_search_au",
+    "DROP TRIGGER IF EXISTS core_customuser_search_ad",
+    "DROP TRIGGER IF EXISTS core_customuser_search_ai",
+    "DROP TABLE IF EXISTS core_customuser_search",
+]
+
+
+def sqlite_has_fts5_trigram(cursor):
+    try:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE temp.fts5_trigram_check "
+            "USING fts5(value, tokenize='trigram')"
+        )
+    except Exception:
+        return False
+    cursor.execute("DROP TABLE temp.fts5_trigram_check")
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for field in SEARCH_FIELDS:
+                cursor.execute(POSTGRES_INDEX.format(field))
+
+        elif connection.vendor == "sqlite" and sqlite_has_fts5_trigram(cursor):
+            for sql in SQLITE_FORWARD:
+                cursor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for field in SEARCH_FIELDS:
+                cursor.execute(POSTGRES_DROP_INDEX.format(field))
+
+        elif connection.vendor == "sqlite":
+            for sql in SQLITE_BACKWARD:
+                cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("core", "0003_photo_and_logo_thumbnails"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,13 +1,13 @@
-import base64
-import os
-
-from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 from django_countries.fields import CountryField
 from model_utils.models import TimeStampedModel
 
-from .managers import CustomUserManager
+from utils.media import get_media_src
+from utils.thumbnails import get_thumbnail
+
+from . import app_settings
+from .managers import CustomUserManager, GlobalSettingsManager
 
 
 class CustomUser(AbstractUser):
@@ -30,22 +30,51 @@ class CustomUser(AbstractUser):
     def create_user(
         cls, email: str, password: str, first_name: str = "", last_name: str = ""
     ):
-        user_exist = CustomUser.objects.filter(email=email)
-        if user_exist:
-            raise ValueError("User already exist")
-
-        user = cls()
-        user.email = email
-        user.first_name = first_name
-        user.last_name = last_name
+        """
+        Insert the user, the unique email is the only existence check. The
+        insert runs in a savepoint, so a taken email leaves the transaction
+        of the caller usable. A None password is set unusable, nothing is
+        hashed.
+        """
+        user = cls(email=email, first_name=first_name, last_name=last_name)
         user.set_password(password)
         try:
-            user.save()
+            with transaction.atomic():
+                user.save()
         except IntegrityError:
             raise ValueError("User already exist")
 
         return user
 
+    @classmethod
+    def create_users(cls, users: list, batch_size: int = None):
+        """
+        Insert unsaved users with a single savepoint, raises ValueError when
+        some email is taken and none is inserted. Users without a password
+        get an unusable one.
+        """
+        for user in users:
+            if not user.password:
+                user.set_unusable_password()
+
+        try:
+            with transaction.atomic():
+                users = cls.objects.bulk_create(users, batch_size=batch_size)
+        except IntegrityError:
+            raise ValueError("User already exist")
+
+        if any(user.pk is None for user in users):
+            # The database can't return the ids of the inserted rows
+            ids = dict(
+                cls.objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", "id")
+            )
+            for user in users:
+                user.pk = ids[user.email]
+
+        return users
+
 
 def user_profile_directory_path(instance, filename):
     # file will be uploaded to MEDIA_ROOT/application_<id>/<filename>
@@ -61,18 +90,23 @@ class UserProfile(TimeStampedModel):
     language = models.CharField(max_length=5, default="en-us")
     country = CountryField(null=True, blank=True)
     date_format = models.CharField(max_length=15, default="dd-mm-yyyy", blank=True)
+    photo_thumbnails = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"User Profile {self.user}"
 
-    def get_photo(self):
+    def get_photo(self, size=None):
+        """
+        Photo URL. With `size` the smallest generated thumbnail of at least
+        that many pixels is used when available.
+        """
         if self.photo:
-            image_path = os.path.join(settings.MEDIA_ROOT, self.photo.name)
-
-            with open(image_path, "rb") as img_f:
-                encoded_string = base64.b64encode(img_f.read()).decode("ascii")
-
-            return "data:image/png;base64,%s" % (encoded_string)
+            name = self.photo.name
+            if size is not None:
+                name = get_thumbnail(self.photo_thumbnails, name, size) or name
+            return get_media_src(
+                name, self.photo.storage, app_settings.MEDIA_INLINE_BASE64
+            )
 
         else:
             return "/static/img/photo_default.png"
@@ -93,15 +127,22 @@ class GlobalSettings(TimeStampedModel):
     header_scripts = models.TextField(blank=True, null=True)
     footer_scripts = models.TextField(blank=True, null=True)
     body_scripts = models.TextField(blank=True, null=True)
+    logo_thumbnails = models.JSONField(default=dict, blank=True)
 
-    def get_logo(self):
-        if self.logo_app:
-            image_path = os.path.join(settings.MEDIA_ROOT, self.logo_app.name)
-
-            with open(image_path, "rb") as img_f:
-                encoded_string = base64.b64encode(img_f.read()).decode("ascii")
+    objects = GlobalSettingsManager()
 
-            return "data:image/png;base64,%s" % (encoded_string)
+    def get_logo(self, size=None):
+        """
+        Logo URL. With `size` the smallest generated thumbnail of at least
+        that many pixels is used when available.
+        """
+        if self.logo_app:
+            name = self.logo_app.name
+            if size is not None:
+                name = get_thumbnail(self.logo_thumbnails, name, size) or name
+            return get_media_src(
+                name, self.logo_app.storage, app_settings.MEDIA_INLINE_BASE64
+            )
 
         else:
             return "/static/img/logo.png"
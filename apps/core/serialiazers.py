@@ -7,6 +7,8 @@ from apps.accounts import models as accounts_models
 from utils.build_dict_language import get_dict_language
 from utils.date_formats import DATE_FORMATS
 
+from . import app_settings
+
 
 class ProfileSchema(Schema):
     job_title = fields.Str(required=True)
@@ -16,7 +18,7 @@ class ProfileSchema(Schema):
     photo = fields.Method("get_photo")
 
     def get_photo(self, obj):
-        return obj.get_photo()
+        return obj.get_photo(app_settings.PROFILE_PHOTO_SIZE)
 
     def get_country(self, obj):
         if obj.country:
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import models
+
+
+def clear_global_settings_cache():
+    models.GlobalSettings.objects.clear_cached()
+
+
+@receiver(post_save, sender=models.GlobalSettings)
+@receiver(post_delete, sender=models.GlobalSettings)
+def global_settings_changed(sender, **kwargs):
+    # Clear right away for this process and again once the transaction is
+    # committed, so no other process can cache the old row in between.
+    clear_global_settings_cache()
+    transaction.on_commit(clear_global_settings_cache)
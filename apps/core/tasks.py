@@ -1,5 +1,14 @@
+from importlib import import_module
+
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image
+
+from utils.thumbnails import delete_thumbnails, generate_thumbnails
+
+from . import app_settings, models
 
 logger = get_task_logger(__name__)
 
@@ -17,3 +26,99 @@ def dynamic_routing_task_two():
 @shared_task(name="high_priority:dynamic_routing_task_three")
 def dynamic_routing_task_three():
     logger.info("Example Three")
+
+
+@shared_task(name="default:generate_profile_photo_thumbnails")
+def generate_profile_photo_thumbnails(profile_id, photo_name):
+    try:
+        user_profile = models.UserProfile.objects.get(id=profile_id)
+    except models.UserProfile.DoesNotExist:
+        return None
+
+    # The photo was changed again before this task ran
+    if user_profile.photo.name != photo_name:
+        return None
+
+    try:
+        thumbnails = generate_thumbnails(
+            photo_name,
+            app_settings.THUMBNAIL_SIZES,
+            app_settings.THUMBNAIL_FORMAT,
+            crop=True,
+            storage=user_profile.photo.storage,
+        )
+    except (OSError, Image.DecompressionBombError):
+        logger.warning("Cannot build thumbnails for %s", photo_name)
+        thumbnails = None
+
+    # Those of the replaced photo
+    delete_thumbnails(
+        user_profile.photo_thumbnails, thumbnails, user_profile.photo.storage
+    )
+    user_profile.photo_thumbnails = thumbnails or {}
+    user_profile.save(update_fields=["photo_thumbnails", "modified"])
+    return thumbnails
+
+
+@shared_task(name="default:generate_logo_thumbnails")
+def generate_logo_thumbnails(global_settings_id, logo_name):
+    try:
+        global_settings = models.GlobalSettings.objects.get(id=global_settings_id)
+    except models.GlobalSettings.DoesNotExist:
+        return None
+
+    # The logo was changed again before this task ran
+    if global_settings.logo_app.name != logo_name:
+        return None
+
+    try:
+        thumbnails = generate_thumbnails(
+            logo_name,
+            app_settings.THUMBNAIL_SIZES,
+            app_settings.THUMBNAIL_FORMAT,
+            storage=global_settings.logo_app.storage,
+        )
+    except (OSError, Image.DecompressionBombError):
+        logger.warning("Cannot build thumbnails for %s", logo_name)
+        thumbnails = None
+
+    # Those of the replaced logo
+    delete_thumbnails(
+        global_settings.logo_thumbnails, thumbnails, global_settings.logo_app.storage
+    )
+    global_settings.logo_thumbnails = thumbnails or {}
+    global_settings.save(update_fields=["logo_thumbnails", "modified"])
+    return thumbnails
+
+
+@shared_task(name="low_priority:clear_expired_sessions")
+def clear_expired_sessions(batch_size=None, max_batches=None):
+    """
+    Delete expired database sessions in batches of `batch_size` rows, each
+    in its own short transaction, instead of one large `clearsessions`
+    delete. Stops after `max_batches`, the next run carries on.
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    if not hasattr(engine.SessionStore, "get_model_class"):
+        # Cache and cookie sessions expire on their own
+        return 0
+
+    batch_size = batch_size or app_settings.SESSION_CLEAR_BATCH_SIZE
+    max_batches = max_batches or app_settings.SESSION_CLEAR_MAX_BATCHES
+    session_model = engine.SessionStore.get_model_class()
+    now = timezone.now()
+
+    deleted = 0
+    for _ in range(max_batches):
+        session_keys = list(
+            session_model.objects.filter(expire_date__lt=now).values_list(
+                "session_key", flat=True
+            )[:batch_size]
+        )
+        if not session_keys:
+            break
+        count, _ = session_model.objects.filter(session_key__in=session_keys).delete()
+        deleted += count
+
+    logger.info("Deleted %s expired sessions", deleted)
+    return deleted
@@ -7,9 +7,8 @@
 
 """
 from django import template
-from django.template import Context, Engine
 
-from apps.core.models import GlobalSettings
+from apps.core.utils import render_scripts
 
 register = template.Library()
 
@@ -17,21 +16,4 @@ register = template.Library()
 @register.simple_tag
 def body_scripts():
     """Includes the serialized version of the exposed third part platforms in the template."""
-    scripts = ""
-
-    global_settings = GlobalSettings.objects.filter()
-    if global_settings:
-        scripts = global_settings.first().body_scripts
-
-    context = {
-        "scripts": scripts,
-    }
-    html = r"""
-        {% autoescape off %}
-            {% if scripts %}
-                {{ scripts }}
-            {% endif %}
-        {% endautoescape %}
-    """
-    template = Engine().from_string(html)
-    return template.render(Context(context))
+    return render_scripts("body_scripts")
@@ -0,0 +1,178 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core import activity, middleware, models
+
+
+@pytest.mark.django_db
+def test_props_middleware_loads_profile_with_user(auto_login_user):
+    inertia_client, user = auto_login_user()
+    models.UserProfile.objects.create(user=user, language="es")
+    url = reverse("core:index")
+    inertia_client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = inertia_client.get(url)
+
+    sql = [query["sql"] for query in queries.captured_queries]
+    assert response.json()["props"]["user_language"] == "es"
+    assert not [query for query in sql if 'FROM "core_userprofile"' in query]
+    assert not [query for query in sql if "core_globalsettings" in query]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "last_activity",
+    [
+        lambda: int(time.time()) - 2 * 60 * 60,
+        # Format used before the time was stored as an epoch
+        lambda: (datetime.now() - timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%S"),
+    ],
+)
+def test_props_middleware_session_idle_timeout(auto_login_user, last_activity):
+    inertia_client, user = auto_login_user()
+    session = inertia_client.session
+    session["last_activity"] = last_activity()
+    session.save()
+
+    response = inertia_client.get(reverse("core:index"))
+
+    assert response.status_code == 302
+    assert response.url == reverse("accounts:login")
+    assert "_auth_user_id" not in inertia_client.session
+
+
+@pytest.mark.django_db
+def test_session_activity_written_once_per_granularity(auto_login_user, settings):
+    settings.SESSION_ACTIVITY_GRANULARITY = 60
+    inertia_client, user = auto_login_user()
+    url = reverse("core:index")
+
+    inertia_client.get(url)
+    first = inertia_client.session["last_activity"]
+    assert isinstance(first, int)
+
+    with mock.patch.object(activity.SessionActivityTracker, "set") as tracker_set:
+        inertia_client.get(url)
+    assert not tracker_set.called
+
+    session = inertia_client.session
+    session["last_activity"] = first - 61
+    session.save()
+    inertia_client.get(url)
+    assert inertia_client.session["last_activity"] >= first
+
+
+@pytest.mark.django_db
+def test_cache_activity_tracker(auto_login_user, settings):
+    settings.SESSION_ACTIVITY_TRACKER = "apps.core.activity.CacheActivityTracker"
+    inertia_client, user = auto_login_user()
+    url = reverse("core:index")
+
+    response = inertia_client.get(url)
+    assert response.status_code == 200
+    assert "last_activity" not in inertia_client.session
+
+    key = activity.CacheActivityTracker.key.format(inertia_client.session.session_key)
+    assert cache.get(key) is not None
+
+    cache.set(key, int(time.time()) - 2 * 60 * 60)
+    response = inertia_client.get(url)
+    assert response.status_code == 302
+    assert cache.get(key) is None
+
+
+@pytest.mark.django_db
+def test_signed_cookie_activity_tracker(auto_login_user, settings):
+    settings.SESSION_ACTIVITY_TRACKER = "apps.core.activity.SignedCookieActivityTracker"
+    inertia_client, user = auto_login_user()
+    url = reverse("core:index")
+    tracker = activity.SignedCookieActivityTracker()
+
+    response = inertia_client.get(url)
+    assert response.status_code == 200
+    assert "last_activity" not in inertia_client.session
+    assert tracker.cookie_name in response.cookies
+
+    # A forged cookie is ignored and replaced
+    inertia_client.cookies[tracker.cookie_name] = "0"
+    response = inertia_client.get(url)
+    assert response.status_code == 200
+
+    request = RequestFactory().get(url)
+    request.session = inertia_client.session
+    old_response = HttpResponse()
+    tracker.set(request, old_response, int(time.time()) - 2 * 60 * 60)
+    inertia_client.cookies[tracker.cookie_name] = old_response.cookies[
+        tracker.cookie_name
+    ].value
+    response = inertia_client.get(url)
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_signed_cookie_activity_tracker_other_session(auto_login_user, settings):
+    """A stale cookie from a previous session does not close a new one"""
+    settings.SESSION_ACTIVITY_TRACKER = "apps.core.activity.SignedCookieActivityTracker"
+    inertia_client, user = auto_login_user()
+    url = reverse("core:index")
+    tracker = activity.SignedCookieActivityTracker()
+
+    request = RequestFactory().get(url)
+    request.session = SessionStore()
+    request.session.create()
+    old_response = HttpResponse()
+    tracker.set(request, old_response, int(time.time()) - 2 * 60 * 60)
+    inertia_client.cookies[tracker.cookie_name] = old_response.cookies[
+        tracker.cookie_name
+    ].value
+
+    response = inertia_client.get(url)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_query_budget_logs_when_exceeded(auto_login_user, settings, caplog):
+    settings.DEBUG = True
+    settings.REQUEST_QUERY_BUDGET = 1
+    inertia_client, user = auto_login_user()
+
+    with caplog.at_level(logging.WARNING, logger="apps.core.middleware"):
+        response = inertia_client.get(reverse("core:index"))
+
+    assert response.status_code == 200
+    assert "budget is 1" in caplog.text
+
+
+@pytest.mark.django_db
+def test_query_budget_raises_when_exceeded(auto_login_user, settings):
+    settings.DEBUG = True
+    settings.REQUEST_QUERY_BUDGET = 1
+    settings.REQUEST_QUERY_BUDGET_RAISE = True
+    inertia_client, user = auto_login_user()
+
+    with pytest.raises(middleware.QueryBudgetExceeded):
+        inertia_client.get(reverse("core:index"))
+
+
+@pytest.mark.django_db
+def test_query_budget_ignored_without_debug(auto_login_user, settings):
+    settings.DEBUG = False
+    settings.REQUEST_QUERY_BUDGET = 1
+    settings.REQUEST_QUERY_BUDGET_RAISE = True
+    inertia_client, user = auto_login_user()
+
+    response = inertia_client.get(reverse("core:index"))
+
+    assert response.status_code == 200
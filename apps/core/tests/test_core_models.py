@@ -1,5 +1,9 @@
+from unittest import mock
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from apps.core import models
 
@@ -26,6 +30,56 @@ def test_create_superuser():
     assert admin_user.is_superuser
 
 
+@pytest.mark.django_db
+def test_custom_user_create_user():
+    with CaptureQueriesContext(connection) as queries:
+        user = models.CustomUser.create_user("new@user.com", "foo", "Jhon", "Doe")
+
+    assert user.pk
+    assert user.check_password("foo")
+    # Insert first, no existence query
+    assert not [query for query in queries if query["sql"].startswith("SELECT")]
+
+
+@pytest.mark.django_db
+def test_custom_user_create_user_taken_email():
+    models.CustomUser.create_user("new@user.com", "foo")
+
+    with pytest.raises(ValueError, match="User already exist"):
+        models.CustomUser.create_user("new@user.com", "foo")
+
+    # The savepoint keeps the transaction usable
+    assert models.CustomUser.objects.filter(email="new@user.com").count() == 1
+
+
+@pytest.mark.django_db
+def test_custom_user_create_users():
+    users = models.CustomUser.create_users(
+        [models.CustomUser(email=f"user{index}@bulk.com") for index in range(3)]
+    )
+
+    assert [user.email for user in users] == [
+        "user0@bulk.com",
+        "user1@bulk.com",
+        "user2@bulk.com",
+    ]
+    assert all(user.pk for user in users)
+    assert not users[0].has_usable_password()
+    assert models.CustomUser.objects.filter(email__endswith="@bulk.com").count() == 3
+
+
+@pytest.mark.django_db
+def test_custom_user_create_users_taken_email():
+    models.CustomUser.create_user("user1@bulk.com", "foo")
+
+    with pytest.raises(ValueError, match="User already exist"):
+        models.CustomUser.create_users(
+            [models.CustomUser(email=f"user{index}@bulk.com") for index in range(3)]
+        )
+
+    assert models.CustomUser.objects.filter(email__endswith="@bulk.com").count() == 1
+
+
 @pytest.mark.django_db
 def test_user_profile_model():
     User = get_user_model()
@@ -62,3 +116,45 @@ def test_global_settings_model():
     assert g_settings.body_scripts == "body"
     assert g_settings.get_logo() == "/static/img/logo.png"
     assert g_settings.created
+
+
+@pytest.mark.django_db
+def test_global_settings_get_cached(django_assert_num_queries):
+    g_settings = models.GlobalSettings(name_app="app")
+    g_settings.save()
+
+    with django_assert_num_queries(1):
+        assert models.GlobalSettings.objects.get_cached().name_app == "app"
+
+    # Warm cache, no queries at all
+    with django_assert_num_queries(0):
+        assert models.GlobalSettings.objects.get_cached().name_app == "app"
+        models.GlobalSettings.objects.get_cached()
+
+
+@pytest.mark.django_db
+def test_global_settings_get_cached_invalidation():
+    assert models.GlobalSettings.objects.get_cached() is None
+
+    g_settings = models.GlobalSettings(name_app="app")
+    g_settings.save()
+    assert models.GlobalSettings.objects.get_cached().name_app == "app"
+
+    g_settings.name_app = "other app"
+    g_settings.save()
+    assert models.GlobalSettings.objects.get_cached().name_app == "other app"
+
+    g_settings.delete()
+    assert models.GlobalSettings.objects.get_cached() is None
+
+
+@pytest.mark.django_db
+def test_global_settings_get_cached_local_cache_timeout(settings):
+    """Other processes never see `clear_cached` on a local memory cache"""
+    settings.LOCAL_CACHE_TIMEOUT = 5
+    models.GlobalSettings.objects.clear_cached()
+
+    with mock.patch("apps.core.managers.cache.set") as cache_set:
+        models.GlobalSettings.objects.get_cached()
+
+    assert cache_set.call_args.args[2] == 5
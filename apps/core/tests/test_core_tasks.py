@@ -0,0 +1,153 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.client import MULTIPART_CONTENT
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from apps.core import models, tasks
+
+
+@pytest.mark.django_db
+def test_generate_profile_photo_thumbnails(create_user, test_png_file):
+    user = create_user()
+    user_profile = models.UserProfile(user=user, photo=test_png_file)
+    user_profile.save()
+
+    thumbnails = tasks.generate_profile_photo_thumbnails(
+        user_profile.id, user_profile.photo.name
+    )
+    user_profile.refresh_from_db()
+
+    assert thumbnails["source"] == user_profile.photo.name
+    assert user_profile.photo_thumbnails == thumbnails
+    for size in (64, 128, 256):
+        name = thumbnails[str(size)]
+        assert name.startswith(f"profile/photo_{user.id}/thumbnails/")
+        assert name.endswith(f"_{size}.webp")
+        with default_storage.open(name) as f:
+            assert Image.open(f).size == (size, size)
+
+    assert "_64.webp" in user_profile.get_photo(64)
+    assert "_128.webp" in user_profile.get_photo(100)
+    assert user_profile.get_photo(512) == user_profile.get_photo()
+
+
+@pytest.mark.django_db
+def test_generate_profile_photo_thumbnails_invalid_image(create_user, test_image_file):
+    user = create_user()
+    user_profile = models.UserProfile(user=user, photo=test_image_file)
+    user_profile.save()
+
+    thumbnails = tasks.generate_profile_photo_thumbnails(
+        user_profile.id, user_profile.photo.name
+    )
+    user_profile.refresh_from_db()
+
+    assert thumbnails is None
+    assert user_profile.photo_thumbnails == {}
+    assert user_profile.get_photo(64) == user_profile.get_photo()
+
+
+@pytest.mark.django_db
+def test_generate_profile_photo_thumbnails_replaced(create_user, test_png_file):
+    """The thumbnails of a replaced photo are deleted"""
+    user = create_user()
+    user_profile = models.UserProfile(user=user, photo=test_png_file)
+    user_profile.save()
+    old_thumbnails = tasks.generate_profile_photo_thumbnails(
+        user_profile.id, user_profile.photo.name
+    )
+
+    user_profile.refresh_from_db()
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), color="blue").save(buffer, format="PNG")
+    user_profile.photo = SimpleUploadedFile("new.png", buffer.getvalue())
+    user_profile.save()
+    thumbnails = tasks.generate_profile_photo_thumbnails(
+        user_profile.id, user_profile.photo.name
+    )
+
+    for size in ("64", "128", "256"):
+        assert not default_storage.exists(old_thumbnails[size])
+        assert default_storage.exists(thumbnails[size])
+
+
+@pytest.mark.django_db
+def test_generate_logo_thumbnails(test_png_file):
+    global_settings = models.GlobalSettings()
+    global_settings.save()
+    global_settings.logo_app = test_png_file
+    global_settings.save()
+
+    thumbnails = tasks.generate_logo_thumbnails(
+        global_settings.id, global_settings.logo_app.name
+    )
+    global_settings = models.GlobalSettings.objects.get_cached()
+
+    # Logos keep their aspect ratio
+    with default_storage.open(thumbnails["64"]) as f:
+        assert Image.open(f).size == (64, 48)
+    assert global_settings.logo_thumbnails == thumbnails
+    assert "_64.webp" in global_settings.get_logo(64)
+
+
+@pytest.mark.django_db
+def test_generate_thumbnails_outdated_source(create_user, test_png_file):
+    """Thumbnails are not built for a photo that was already replaced"""
+    user = create_user()
+    user_profile = models.UserProfile(user=user, photo=test_png_file)
+    user_profile.save()
+
+    thumbnails = tasks.generate_profile_photo_thumbnails(user_profile.id, "old.png")
+
+    assert thumbnails is None
+
+
+@pytest.mark.django_db
+@mock.patch("apps.core.tasks.generate_profile_photo_thumbnails.delay")
+def test_change_photo_schedules_thumbnails(
+    mock_delay, auto_login_user, test_png_file, django_capture_on_commit_callbacks
+):
+    inertia_client, user = auto_login_user()
+    user_profile = models.UserProfile(user=user)
+    user_profile.save()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        inertia_client.post(
+            reverse("core:change_photo"),
+            {"photo": test_png_file},
+            content_type=MULTIPART_CONTENT,
+        )
+
+    user_profile.refresh_from_db()
+    mock_delay.assert_called_once_with(user_profile.id, user_profile.photo.name)
+
+
+@pytest.mark.django_db
+def test_clear_expired_sessions():
+    now = timezone.now()
+    for index in range(5):
+        Session.objects.create(
+            session_key=f"expired{index}",
+            session_data="",
+            expire_date=now - timedelta(days=1),
+        )
+    Session.objects.create(
+        session_key="active", session_data="", expire_date=now + timedelta(days=1)
+    )
+
+    assert tasks.clear_expired_sessions(batch_size=2, max_batches=2) == 4
+    assert tasks.clear_expired_sessions(batch_size=2, max_batches=2) == 1
+    assert list(Session.objects.values_list("session_key", flat=True)) == ["active"]
+
+
+def test_clear_expired_sessions_cache_engine(settings):
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+    assert tasks.clear_expired_sessions() == 0
@@ -0,0 +1,32 @@
+from unittest import mock
+
+import pytest
+
+from apps.core import models, utils
+
+
+@pytest.mark.django_db
+def test_render_scripts(django_assert_num_queries):
+    g_settings = models.GlobalSettings(header_scripts="<script>one()</script>")
+    g_settings.save()
+
+    assert "<script>one()</script>" in utils.render_scripts("header_scripts")
+    assert utils.render_scripts("footer_scripts").strip() == ""
+
+    # Warm, neither queries nor template renders
+    with django_assert_num_queries(0), mock.patch.object(
+        utils.SCRIPTS_TEMPLATE, "render"
+    ) as render:
+        assert "<script>one()</script>" in utils.render_scripts("header_scripts")
+    assert not render.called
+
+    g_settings.header_scripts = "<script>two()</script>"
+    g_settings.save()
+    html = utils.render_scripts("header_scripts")
+    assert "<script>two()</script>" in html
+    assert "one()" not in html
+
+
+@pytest.mark.django_db
+def test_render_scripts_without_settings():
+    assert utils.render_scripts("body_scripts").strip() == ""
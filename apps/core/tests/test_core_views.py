@@ -2,11 +2,16 @@ import io
 from unittest import mock
 
 import pytest
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
 from django.test.client import MULTIPART_CONTENT
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from apps.accounts.models import EmailAddress
-from apps.core import models
+from apps.core import models, tasks
 
 
 @pytest.mark.django_db
@@ -78,6 +83,28 @@ def test_settings(auto_login_user):
     assert "timeResendEmail" in data["props"]
 
 
+@pytest.mark.django_db
+def test_settings_pending_email(auto_login_user):
+    """A warm request loads the email state with a query and its prefetch"""
+    inertia_client, user = auto_login_user()
+    email_address = EmailAddress.objects.create(user=user, email="new@test.com")
+    confirmation = email_address.send_confirmation()
+    confirmation.sent = timezone.now()
+    confirmation.save()
+    url = reverse("core:settings")
+    inertia_client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = inertia_client.get(url)
+
+    sql = [query["sql"] for query in queries.captured_queries]
+    data = response.json()
+    assert data["props"]["unconfirmedEmail"] == "new@test.com"
+    assert 0 < data["props"]["timeResendEmail"]
+    assert len([query for query in sql if "accounts_emailaddress" in query]) == 1
+    assert len([query for query in sql if "accounts_emailconfirmation" in query]) == 1
+
+
 @pytest.mark.django_db
 @mock.patch("apps.accounts.tasks.email_confirmation")
 def test_change_email(mock_email_confirm, auto_login_user):
@@ -169,6 +196,43 @@ def test_cancel_change_email(auto_login_user):
     assert data["props"]["success"] == "Change email canceled"
 
 
+@pytest.mark.django_db
+def test_other_view_message_shown_once(auto_login_user):
+    """Messages from share_other_view reach the next view only, off the session"""
+    inertia_client, user = auto_login_user()
+    url = reverse("core:settings")
+    # Records the session activity time
+    inertia_client.get(url)
+
+    with mock.patch(
+        "django.contrib.sessions.backends.db.SessionStore.save"
+    ) as session_save:
+        response_post = inertia_client.post(
+            reverse("core:change_names"),
+            {"firstName": "jhon", "lastName": "doe"},
+            content_type="application/json",
+        )
+    assert response_post.status_code == 302
+    assert not session_save.called
+
+    data = inertia_client.get(url).json()
+    assert data["props"]["success"] == "Successful name change"
+    assert data["props"]["errors"] == {}
+
+    data = inertia_client.get(url).json()
+    assert data["props"]["success"] is False
+
+
+@pytest.mark.django_db
+def test_no_message_no_session(inertia_client):
+    """A view without messages should not create a session nor set cookies"""
+    response = inertia_client.get(reverse("accounts:login"))
+
+    assert response.status_code == 200
+    assert settings.SESSION_COOKIE_NAME not in response.cookies
+    assert "messages" not in response.cookies
+
+
 @pytest.mark.django_db
 def test_change_name(auto_login_user):
     """The response should change user names and return redirect to core index_settings"""
@@ -345,6 +409,122 @@ def test_remove_photo(auto_login_user):
     assert data["props"]["success"] == "Photo successfully removed"
 
 
+@pytest.mark.django_db
+def test_remove_photo_thumbnails(auto_login_user, test_png_file):
+    """The thumbnails of a removed photo are deleted too"""
+    inertia_client, user = auto_login_user()
+    user_profile = models.UserProfile(user=user, photo=test_png_file)
+    user_profile.save()
+    thumbnails = tasks.generate_profile_photo_thumbnails(
+        user_profile.id, user_profile.photo.name
+    )
+
+    inertia_client.get(reverse("core:remove_photo"))
+
+    user_profile.refresh_from_db()
+    assert user_profile.photo_thumbnails == {}
+    assert not default_storage.exists(thumbnails["64"])
+
+
+@pytest.mark.django_db
+def test_media_versioned_photo(auto_login_user, test_image_file):
+    """Versioned photo URLs are streamed with long-lived private cache headers"""
+    inertia_client, user = auto_login_user()
+    user_profile = models.UserProfile(user=user, photo=test_image_file)
+    user_profile.save()
+
+    url = user_profile.get_photo()
+    response = inertia_client.get(url)
+
+    assert url.startswith("/media/profile/")
+    assert "?v=" in url
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"some random data"
+    assert "immutable" in response["Cache-Control"]
+    assert "private" in response["Cache-Control"]
+
+    response = inertia_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_media_private_not_authenticated(inertia_client, create_user, test_image_file):
+    """Anonymous users can not read profile photos"""
+    user = create_user()
+    user_profile = models.UserProfile(user=user, photo=test_image_file)
+    user_profile.save()
+
+    response = inertia_client.get(user_profile.get_photo())
+    data = response.json()
+
+    assert data["component"] == "404Error"
+
+
+@pytest.mark.django_db
+def test_media_public_logo(inertia_client, test_image_file):
+    """The app logo is public"""
+    global_settings = models.GlobalSettings()
+    global_settings.save()
+    global_settings.logo_app = test_image_file
+    global_settings.save()
+
+    response = inertia_client.get(global_settings.get_logo())
+
+    assert response.status_code == 200
+    assert "public" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_media_not_found(auto_login_user):
+    inertia_client, user = auto_login_user()
+
+    response = inertia_client.get(reverse("core:media", args=["profile/missing.png"]))
+    data = response.json()
+
+    assert data["component"] == "404Error"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "path",
+    [
+        "profile",
+        "profile/photos",
+        "exports/users.csv",
+        "profile/../exports/users.csv",
+        "secret.txt",
+    ],
+)
+def test_media_outside_prefixes(auto_login_user, settings, tmp_path, path):
+    """Only files under MEDIA_PREFIXES are served, never directories"""
+    settings.MEDIA_ROOT = str(tmp_path)
+    for name in ("profile/photo.png", "exports/users.csv", "secret.txt"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(b"data")
+    (tmp_path / "profile" / "photos").mkdir()
+    inertia_client, user = auto_login_user()
+
+    response = inertia_client.get(reverse("core:media", args=[path]))
+    assert response.json()["component"] == "404Error"
+
+    response = inertia_client.get(reverse("core:media", args=["profile/photo.png"]))
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_media_inline_base64(settings, create_user, test_png_file):
+    """Base64 data URIs are still available as opt-in, with their real type"""
+    settings.MEDIA_INLINE_BASE64 = True
+    user = create_user()
+    user_profile = models.UserProfile(user=user, photo=test_png_file)
+    user_profile.save()
+    tasks.generate_profile_photo_thumbnails(user_profile.id, user_profile.photo.name)
+    user_profile.refresh_from_db()
+
+    assert user_profile.get_photo().startswith("data:image/png;base64,")
+    assert user_profile.get_photo(64).startswith("data:image/webp;base64,")
+
+
 @pytest.mark.django_db
 def test_change_language(auto_login_user):
     """The response should change user language and return redirect to core index_settings"""
@@ -529,3 +709,24 @@ def test_error_500(inertia_client):
 
     assert response.status_code == 200
     assert data["component"] == "500Error"
+
+
+@pytest.mark.django_db
+def test_index_common_user_queries(auto_login_user):
+    """A warm index request checks the user groups without queries"""
+    inertia_client, user = auto_login_user()
+    url = reverse("core:index")
+    inertia_client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = inertia_client.get(url)
+
+    # Session and user with profile, savepoints of ATOMIC_REQUESTS aside
+    selects = [
+        query["sql"]
+        for query in queries.captured_queries
+        if query["sql"].startswith("SELECT")
+    ]
+    assert response.json()["component"] == "Index"
+    assert len(selects) == 2
+    assert "auth_group" not in " ".join(selects)
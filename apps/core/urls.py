@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 
 from . import views
 
@@ -25,6 +25,7 @@ urlpatterns = [
         views.change_date_format,
         name="change_date_format",
     ),
+    re_path(r"^media/(?P<path>.+)$", views.media, name="media"),
     path("400", views.error_400, name="error_400"),
     path("403", views.error_403, name="error_403"),
     path("404", views.error_404, name="error_404"),
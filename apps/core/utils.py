@@ -1,8 +1,24 @@
 from django.apps import apps
 from django.contrib.auth.models import Group
-from django.template import TemplateDoesNotExist
+from django.template import Context, Engine, TemplateDoesNotExist
+from django.utils.safestring import mark_safe
 
-from utils.email import EMail
+from utils.email import EMail, send_persistent
+
+from .models import GlobalSettings
+
+SCRIPTS_TEMPLATE = Engine().from_string(
+    r"""
+        {% autoescape off %}
+            {% if scripts %}
+                {{ scripts }}
+            {% endif %}
+        {% endautoescape %}
+    """
+)
+
+# field name -> (settings version, rendered html)
+_rendered_scripts = {}
 
 
 def get_groups():
@@ -15,12 +31,36 @@ def is_audit_installed():
     return apps.is_installed("apps.audit")
 
 
-def send_mail(subject, template_prefix, email, context):
-    msg = EMail(to=email, subject=subject)
+def build_mail(subject, template_prefix, email, context):
+    msg = EMail(to=email, subject=subject, lang=context.get("lang"))
     try:
         msg.html(f"{template_prefix}_message.html", context)
     except TemplateDoesNotExist:
         pass
 
     msg.text(f"{template_prefix}_message.txt", context)
-    msg.send()
+    return msg
+
+
+def send_mail(subject, template_prefix, email, context):
+    send_persistent(build_mail(subject, template_prefix, email, context))
+
+
+def render_scripts(field):
+    """
+    Render the third part scripts stored in the `field` of GlobalSettings.
+    The html is kept per process until the settings row changes.
+    """
+    global_settings = GlobalSettings.objects.get_cached()
+    version = None
+    if global_settings:
+        version = (global_settings.pk, global_settings.modified)
+
+    cached = _rendered_scripts.get(field)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    scripts = getattr(global_settings, field) if global_settings else ""
+    html = mark_safe(SCRIPTS_TEMPLATE.render(Context({"scripts": scripts})))
+    _rendered_scripts[field] = (version, html)
+    return html
@@ -1,29 +1,39 @@
 import json
+import mimetypes
+import posixpath
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponseNotModified
 from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_http_methods
 from inertia import render, share
 from marshmallow import ValidationError
 
 from apps.accounts import app_settings as account_app_settings
+from apps.accounts import cache as accounts_cache
 from apps.accounts import models as accounts_model
 from apps.accounts import tasks as account_tasks
 from utils.build_dict_language import get_dict_countries, get_dict_language
 from utils.date_formats import DATE_FORMATS
 from utils.decorator import clean_message, json_format_required
 from utils.inertia import share_other_view
+from utils.media import get_media_hash
+from utils.thumbnails import delete_thumbnails
 
-from . import app_settings, forms, models, serialiazers
+from . import app_settings, forms, models, serialiazers, tasks
 
 
 @require_http_methods(["GET"])
 @login_required(login_url="/login", redirect_field_name=None)
 @clean_message
 def index(request):
-    if bool(request.user.groups.filter(name="customer")):
+    if accounts_cache.in_groups(request.user, "customer"):
         return render(
             request,
             "Index",
@@ -36,7 +46,7 @@ def index(request):
 # Settings
 @require_http_methods(["GET"])
 def index_settings(request):
-    if bool(request.user.groups.filter(name="management")):
+    if accounts_cache.in_groups(request.user, "management"):
         return redirect("management:settings")
 
     return redirect("core:settings")
@@ -47,7 +57,7 @@ def index_settings(request):
 @clean_message
 def settings(request):
     try:
-        user_profile = models.UserProfile.objects.get(user=request.user)
+        user_profile = request.user.userprofile
     except models.UserProfile.DoesNotExist:
         user_profile = models.UserProfile(user=request.user)
         user_profile.save()
@@ -55,15 +65,17 @@ def settings(request):
     profile_schema = serialiazers.ProfileSchema()
     profile = profile_schema.dump(user_profile)
 
+    email_state = accounts_cache.get_request_email_state(request)
+    confirmation = email_state.confirmation
     props = {
-        "unconfirmedEmail": accounts_model.EmailAddress.get_not_primary(request.user),
+        "unconfirmedEmail": email_state.pending.email if email_state.pending else "",
         "userProfile": profile,
         "maxSizeFile": app_settings.MAX_SIZE_FILE,
         "availableLanguages": get_dict_language(),
         "availableCountries": get_dict_countries(),
         "availableDateFormats": DATE_FORMATS,
-        "timeResendEmail": accounts_model.EmailConfirmation.time_to_resend_email(
-            accounts_model.EmailAddress.get_not_primary(request.user)
+        "timeResendEmail": (
+            confirmation.time_to_resend() if confirmation and confirmation.sent else 0
         ),
     }
 
@@ -209,7 +221,7 @@ def change_job_title(request):
         except ValidationError as err:
             share_other_view(request, error="Exists errors on form", errors=err.messages)
         else:
-            user_profile = models.UserProfile.objects.get(user=request.user)
+            user_profile = request.user.userprofile
             user_profile.job_title = data.get("jobTitle")
             user_profile.save()
             share_other_view(
@@ -228,9 +240,15 @@ def change_photo(request):
     if request.method == "POST":
         form = forms.ProfilePhotoForm(request.POST, request.FILES)
         if form.is_valid():
-            user_profile = models.UserProfile.objects.get(user=request.user)
+            user_profile = request.user.userprofile
             user_profile.photo = form.cleaned_data["photo"]
             user_profile.save()
+            profile_id, photo_name = user_profile.id, user_profile.photo.name
+            transaction.on_commit(
+                lambda: tasks.generate_profile_photo_thumbnails.delay(
+                    profile_id, photo_name
+                )
+            )
             share_other_view(
                 request,
                 success="Successful photo change",
@@ -247,7 +265,9 @@ def change_photo(request):
 @login_required(login_url="/login", redirect_field_name=None)
 @clean_message
 def remove_photo(request):
-    user_profile = models.UserProfile.objects.get(user=request.user)
+    user_profile = request.user.userprofile
+    delete_thumbnails(user_profile.photo_thumbnails, storage=user_profile.photo.storage)
+    user_profile.photo_thumbnails = {}
     user_profile.photo.delete()
     share_other_view(
         request,
@@ -271,7 +291,7 @@ def change_language(request):
         except ValidationError as err:
             share_other_view(request, error="Exists errors on form", errors=err.messages)
         else:
-            user_profile = models.UserProfile.objects.get(user=request.user)
+            user_profile = request.user.userprofile
             user_profile.language = data.get("language")
             user_profile.save()
             share_other_view(
@@ -295,7 +315,7 @@ def change_country(request):
         except ValidationError as err:
             share_other_view(request, error="Exists errors on form", errors=err.messages)
         else:
-            user_profile = models.UserProfile.objects.get(user=request.user)
+            user_profile = request.user.userprofile
             user_profile.country = data.get("country")
             user_profile.save()
             share_other_view(
@@ -319,7 +339,7 @@ def change_date_format(request):
         except ValidationError as err:
             share_other_view(request, error="Exists errors on form", errors=err.messages)
         else:
-            user_profile = models.UserProfile.objects.get(user=request.user)
+            user_profile = request.user.userprofile
             user_profile.date_format = data.get("dateFormat")
             user_profile.save()
             share_other_view(
@@ -331,6 +351,52 @@ def change_date_format(request):
     return redirect("core:index_settings")
 
 
+@require_http_methods(["GET", "HEAD"])
+def media(request, path):
+    """
+    Stream a file under one of the MEDIA_PREFIXES of MEDIA_ROOT. Requests
+    carrying the content hash in `v` (see utils.media.get_media_url) are
+    cached by the browser for a long time.
+    """
+    if posixpath.normpath(path) != path or not path.startswith(
+        tuple(app_settings.MEDIA_PREFIXES)
+    ):
+        raise Http404
+
+    public = path.startswith(tuple(app_settings.PUBLIC_MEDIA_PREFIXES))
+    if not public and not request.user.is_authenticated:
+        raise Http404
+
+    try:
+        digest = get_media_hash(path)
+    except (OSError, SuspiciousFileOperation):
+        # Missing files, directories and paths outside MEDIA_ROOT
+        raise Http404
+
+    etag = '"%s"' % digest
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        response = FileResponse(
+            default_storage.open(path, "rb"), content_type=content_type
+        )
+    response["ETag"] = etag
+
+    visibility = {"public": True} if public else {"private": True}
+    if request.GET.get("v") == digest:
+        patch_cache_control(
+            response,
+            max_age=app_settings.MEDIA_CACHE_MAX_AGE,
+            immutable=True,
+            **visibility,
+        )
+    else:
+        patch_cache_control(response, no_cache=True, **visibility)
+
+    return response
+
+
 # Page errors
 @require_http_methods(["GET"])
 def error_404(request, exception=None):
@@ -0,0 +1,88 @@
+import sys
+
+from django.conf import settings
+
+
+class AppSettings(object):
+    class PaginationMode:
+        # Numbered pages with Paginator, COUNT(*) and OFFSET queries
+        PAGE = "page"
+        # Keyset pagination on the user id with next/previous cursors
+        CURSOR = "cursor"
+
+    def _setting(self, name, default):
+        return getattr(settings, name, default)
+
+    @property
+    def USERS_PAGINATION(self):
+        """
+        Pagination of the users list, page or cursor. Requests with a
+        `cursor` parameter are always paginated with cursors
+        """
+        return self._setting("USERS_PAGINATION", self.PaginationMode.PAGE)
+
+    @property
+    def USERS_PAGINATE_BY(self):
+        return self._setting("USERS_PAGINATE_BY", 10)
+
+    @property
+    def USERS_APPROXIMATE_COUNT(self):
+        """
+        In cursor mode, count the users with the planner estimate on
+        PostgreSQL instead of COUNT(*)
+        """
+        return self._setting("USERS_APPROXIMATE_COUNT", False)
+
+    @property
+    def USERS_SEARCH_BACKEND(self):
+        """
+        Dotted path of the users list search backend, by default the one
+        matching the database (see apps.management.search)
+        """
+        return self._setting("USERS_SEARCH_BACKEND", None)
+
+    @property
+    def BULK_EMAIL_CHUNK_SIZE(self):
+        """Emails rendered and sent per chunk by the bulk actions"""
+        return self._setting("BULK_EMAIL_CHUNK_SIZE", 500)
+
+    @property
+    def USERS_IMPORT_BATCH_SIZE(self):
+        """Rows validated and inserted per batch by the users import"""
+        return self._setting("USERS_IMPORT_BATCH_SIZE", 500)
+
+    @property
+    def USERS_IMPORT_MAX_ERRORS(self):
+        """Row errors returned by the users import, the rest are only counted"""
+        return self._setting("USERS_IMPORT_MAX_ERRORS", 100)
+
+    @property
+    def USERS_IMPORT_ASYNC_SIZE(self):
+        """
+        Uploads of more bytes are imported by a task instead of in the
+        request
+        """
+        return self._setting("USERS_IMPORT_ASYNC_SIZE", 1024 * 1024)
+
+    @property
+    def USERS_EXPORT_CHUNK_SIZE(self):
+        """Rows fetched from the database at a time by the users export"""
+        return self._setting("USERS_EXPORT_CHUNK_SIZE", 2000)
+
+    @property
+    def USERS_EXPORT_ASYNC_THRESHOLD(self):
+        """
+        Exports of more users are written by a task and emailed to the
+        requester instead of being streamed in the response
+        """
+        return self._setting("USERS_EXPORT_ASYNC_THRESHOLD", 10000)
+
+    @property
+    def USERS_EXPORT_MAX_AGE(self):
+        """Seconds the export files written by the task are kept"""
+        return self._setting("USERS_EXPORT_MAX_AGE", 60 * 60 * 24 * 7)
+
+
+app_settings = AppSettings()
+app_settings.__name__ = __name__
+sys.modules[__name__] = app_settings
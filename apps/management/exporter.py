@@ -0,0 +1,89 @@
+"""
+Export of the users list to CSV or JSON Lines.
+
+Rows are read with a `values_list` projection and `iterator`, so neither
+model instances nor the whole table are kept in memory, and written one by
+one. Small exports are streamed in the response, larger ones are written
+to the default storage under EXPORTS_DIR by the `export_users` task. That
+directory is not among the MEDIA_PREFIXES served by `core:media`, the
+files are only downloaded with `can_view_users` and are deleted by
+`delete_old_exports` after USERS_EXPORT_MAX_AGE.
+"""
+import csv
+import json
+
+from apps.core.models import CustomUser
+
+from . import app_settings
+from .search import search_users
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = (CSV, JSONL)
+CONTENT_TYPES = {CSV: "text/csv", JSONL: "application/x-ndjson"}
+
+EXPORTS_DIR = "exports"
+
+# Leading characters that make a spreadsheet read a CSV cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# Exported header and user field of each column
+COLUMNS = (
+    ("userId", "id"),
+    ("email", "email"),
+    ("firstName", "first_name"),
+    ("lastName", "last_name"),
+    ("isActive", "is_active"),
+    ("dateJoined", "date_joined"),
+    ("lastLogin", "last_login"),
+)
+
+
+def get_export_users(search=None):
+    """Users of the management users list, filtered by `search`"""
+    users = CustomUser.objects.exclude(is_superuser=True, is_staff=True)
+    if search is not None:
+        users = search_users(users, search)
+    return users.order_by("id")
+
+
+class Echo:
+    """File-like object returning what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_value(value, file_format=JSONL):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    # Names are set by the users, keep them from running as formulas
+    if (
+        file_format == CSV
+        and isinstance(value, str)
+        and value.startswith(FORMULA_PREFIXES)
+    ):
+        return "'" + value
+    return value
+
+
+def iter_export(queryset, file_format):
+    """Yield the export of `queryset` in `file_format`, one row at a time"""
+    if file_format not in FORMATS:
+        raise ValueError("Unknown export format: {0}".format(file_format))
+
+    headers = [header for header, _ in COLUMNS]
+    rows = queryset.values_list(*[field for _, field in COLUMNS]).iterator(
+        chunk_size=app_settings.USERS_EXPORT_CHUNK_SIZE
+    )
+
+    if file_format == CSV:
+        writer = csv.writer(Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([export_value(value, CSV) for value in row])
+
+    else:
+        for row in rows:
+            data = dict(zip(headers, map(export_value, row)))
+            yield json.dumps(data) + "\n"
@@ -2,6 +2,8 @@ from django import forms
 
 from utils.file_validators import FileSizeValidator
 
+from .importer import get_format
+
 
 class SystemAppLogoForm(forms.Form):
     logo = forms.FileField(
@@ -24,3 +26,17 @@ class SystemAppLogoForm(forms.Form):
             raise forms.ValidationError("This field is required.")
 
         return self.cleaned_data["logo"]
+
+
+class UsersImportForm(forms.Form):
+    file = forms.FileField()
+
+    def clean_file(self):
+        file_format = get_format(self.cleaned_data["file"].name)
+        if not file_format:
+            raise forms.ValidationError(
+                "Invalid file type, please choose a CSV or JSONL file."
+            )
+
+        self.cleaned_data["format"] = file_format
+        return self.cleaned_data["file"]
@@ -0,0 +1,227 @@
+"""
+Bulk import of users from CSV or JSON Lines files.
+
+Rows are read one at a time and handled in batches of
+USERS_IMPORT_BATCH_SIZE: each batch is validated with CreateUserSchema,
+checked for existing emails with a single query and inserted with
+`bulk_create` (users, primary email addresses and group memberships). Users
+get an unusable password, so nothing is hashed, and their password reset
+emails are sent by `send_bulk_password_reset` tasks once the batch is
+committed. Invalid rows are reported and skipped, the import goes on; only
+the first USERS_IMPORT_MAX_ERRORS errors are kept, the rest are counted.
+Columns other than the schema fields are ignored.
+"""
+import csv
+import json
+
+from django.contrib.auth.models import Group
+from django.db import IntegrityError, transaction
+from marshmallow import EXCLUDE, ValidationError
+
+from apps.accounts import app_settings as account_settings
+from apps.accounts.models import EmailAddress
+from apps.core.models import CustomUser
+
+from . import app_settings
+from .serializers import CreateUserSchema
+from .tasks import send_bulk_password_reset
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = (CSV, JSONL)
+
+USER_EXISTS = "User already exist"
+
+
+def get_format(filename):
+    """Format matching the extension of `filename`, None when unknown"""
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "ndjson":
+        return JSONL
+    return extension if extension in FORMATS else None
+
+
+def read_rows(stream, file_format):
+    """
+    Yield (row number, data, error) for every row of a text stream, either
+    data or error is None
+    """
+    if file_format == CSV:
+        reader = csv.DictReader(stream)
+        for data in reader:
+            yield reader.line_num, data, None
+
+    elif file_format == JSONL:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield number, None, "Invalid JSON."
+                continue
+            if not isinstance(data, dict):
+                yield number, None, "Invalid JSON object."
+                continue
+            yield number, data, None
+
+    else:
+        raise ValueError("Unknown import format: {0}".format(file_format))
+
+
+class UserImporter:
+    """
+    Import users from rows of `read_rows`. `base_url` and `site_name` are
+    used in the password reset emails, none are sent with `send_email`
+    False. At most `max_errors` row errors are kept.
+    """
+
+    def __init__(
+        self,
+        base_url="",
+        site_name="",
+        lang="en-us",
+        send_email=True,
+        batch_size=None,
+        max_errors=None,
+    ):
+        self.base_url = base_url
+        self.site_name = site_name
+        self.lang = lang
+        self.send_email = send_email
+        self.batch_size = batch_size or app_settings.USERS_IMPORT_BATCH_SIZE
+        self.max_errors = (
+            max_errors
+            if max_errors is not None
+            else app_settings.USERS_IMPORT_MAX_ERRORS
+        )
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+
+    def run(self, rows):
+        self.groups = {group.name: group.id for group in Group.objects.all()}
+        self.schema = CreateUserSchema(context={"groups": self.groups}, unknown=EXCLUDE)
+
+        batch = []
+        for number, data, error in rows:
+            if error:
+                self.add_error(number, None, {"_schema": [error]})
+                continue
+
+            batch.append((number, data))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+
+        if batch:
+            self.import_batch(batch)
+
+        return {
+            "created": self.created,
+            "errors": self.errors,
+            "errorCount": self.error_count,
+        }
+
+    def add_error(self, number, email, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": number, "email": email, "errors": errors})
+
+    def import_batch(self, batch):
+        rows = self.validate(batch)
+        if not rows:
+            return
+
+        try:
+            with transaction.atomic():
+                user_ids = self.insert(rows)
+        except (IntegrityError, ValueError):
+            # Some email was taken meanwhile, insert the rows one by one
+            user_ids = []
+            for row in rows:
+                try:
+                    with transaction.atomic():
+                        user_ids += self.insert([row])
+                except (IntegrityError, ValueError):
+                    self.add_error(row[0], row[1]["email"], {"email": [USER_EXISTS]})
+
+        self.created += len(user_ids)
+        if self.send_email:
+            self.send_emails(user_ids)
+
+    def validate(self, batch):
+        """Valid rows of the batch whose email is not taken yet"""
+        rows = []
+        seen = set()
+        for number, data in batch:
+            try:
+                data = self.schema.load(data)
+            except ValidationError as err:
+                self.add_error(number, data.get("email"), err.messages)
+                continue
+
+            if data["email"] in seen:
+                self.add_error(number, data["email"], {"email": [USER_EXISTS]})
+                continue
+            seen.add(data["email"])
+            rows.append((number, data))
+
+        taken = self.get_taken_emails(seen)
+        valid = []
+        for number, data in rows:
+            if data["email"] in taken:
+                self.add_error(number, data["email"], {"email": [USER_EXISTS]})
+            else:
+                valid.append((number, data))
+        return valid
+
+    def get_taken_emails(self, emails):
+        taken = set(
+            CustomUser.objects.filter(email__in=emails).values_list("email", flat=True)
+        )
+        if account_settings.UNIQUE_EMAIL:
+            taken.update(
+                EmailAddress.objects.filter(email__in=emails).values_list(
+                    "email", flat=True
+                )
+            )
+        return taken
+
+    def insert(self, rows):
+        users = CustomUser.create_users(
+            [
+                CustomUser(
+                    email=data["email"],
+                    first_name=data["firstName"],
+                    last_name=data["lastName"],
+                )
+                for _, data in rows
+            ]
+        )
+        EmailAddress.objects.bulk_create(
+            [
+                EmailAddress(user=user, email=user.email, primary=True, verified=True)
+                for user in users
+            ]
+        )
+        CustomUser.groups.through.objects.bulk_create(
+            [
+                CustomUser.groups.through(
+                    customuser_id=user.pk, group_id=self.groups[data["group"]]
+                )
+                for user, (_, data) in zip(users, rows)
+            ]
+        )
+        return [user.pk for user in users]
+
+    def send_emails(self, user_ids):
+        chunk_size = app_settings.BULK_EMAIL_CHUNK_SIZE
+        for start in range(0, len(user_ids), chunk_size):
+            end = start + chunk_size
+            chunk = user_ids[start:end]
+            transaction.on_commit(
+                lambda chunk=chunk: send_bulk_password_reset.delay(
+                    self.base_url, self.site_name, user_ids=chunk, lang=self.lang
+                )
+            )
@@ -0,0 +1,109 @@
+"""Command to benchmark the users list search on a large users table"""
+
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.models import CustomUser
+from apps.management.search import ContainsSearchBackend, get_search_backend
+
+BENCHMARK_DOMAIN = "benchmark.invalid"
+FIRST_NAMES = ["Jhon", "Maria", "Pedro", "Lucia", "Carlos", "Ana", "Jose", "Elena"]
+LAST_NAMES = ["Doe", "Perez", "Garcia", "Lopez", "Smith", "Torres", "Diaz", "Ruiz"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate benchmark users and time the users list search with the "
+        "database search backend against plain icontains lookups"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--terms", nargs="+", default=["jhon", "garcia", "user12345", "xyz"]
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated users for later runs",
+        )
+
+    def handle(self, *args, **options):
+        self.generate_users(options["users"], options["batch_size"])
+
+        queryset = CustomUser.objects.exclude(is_superuser=True, is_staff=True)
+        backends = {
+            "contains": ContainsSearchBackend(),
+            "database": get_search_backend(queryset.db),
+        }
+        self.stdout.write(
+            "Search backend: {0}".format(type(backends["database"]).__name__)
+        )
+
+        for term in options["terms"]:
+            for name, backend in backends.items():
+                timings = []
+                for _ in range(options["repeat"]):
+                    # Same work as users_list: a count and the first page
+                    start = time.perf_counter()
+                    results = backend.filter(queryset, term)
+                    count = results.count()
+                    list(results.order_by("id").values_list("id", flat=True)[:10])
+                    timings.append(time.perf_counter() - start)
+
+                self.stdout.write(
+                    "{0:>12} {1:>10}: {2:8.2f} ms (best of {3}, {4} rows)".format(
+                        term, name, min(timings) * 1000, len(timings), count
+                    )
+                )
+
+        if not options["keep"]:
+            deleted = self.delete_users(options["batch_size"])
+            self.stdout.write("Deleted {0} benchmark users".format(deleted))
+
+    def delete_users(self, batch_size):
+        # In batches, so the delete collector does not load them all in memory
+        benchmark_users = CustomUser.objects.filter(
+            email__endswith="@" + BENCHMARK_DOMAIN
+        )
+        deleted = 0
+        while True:
+            ids = list(benchmark_users.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                CustomUser.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+    def generate_users(self, total, batch_size):
+        existing = CustomUser.objects.filter(
+            email__endswith="@" + BENCHMARK_DOMAIN
+        ).count()
+        if existing >= total:
+            return
+
+        password = make_password(None)
+        start = time.perf_counter()
+        for offset in range(existing, total, batch_size):
+            users = [
+                CustomUser(
+                    email="user{0}@{1}".format(index, BENCHMARK_DOMAIN),
+                    first_name=FIRST_NAMES[index % len(FIRST_NAMES)],
+                    last_name=LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)],
+                    password=password,
+                )
+                for index in range(offset, min(offset + batch_size, total))
+            ]
+            with transaction.atomic():
+                CustomUser.objects.bulk_create(users)
+
+        self.stdout.write(
+            "Generated {0} users in {1:.1f} s".format(
+                total - existing, time.perf_counter() - start
+            )
+        )
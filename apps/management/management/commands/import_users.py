@@ -0,0 +1,59 @@
+"""Command to import users from a CSV or JSON Lines file"""
+
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.management import importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV or JSON Lines file with firstName, lastName, "
+        "email and group columns, and email them a password reset link"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=importer.FORMATS)
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--base-url",
+            help="Site URL used in the password reset links, e.g. https://example.com",
+        )
+        parser.add_argument("--site-name")
+        parser.add_argument("--lang", default="en-us")
+        parser.add_argument(
+            "--no-email",
+            action="store_true",
+            help="Do not send the password reset emails",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or importer.get_format(options["path"])
+        if not file_format:
+            raise CommandError("Unknown file format, use --format")
+        send_email = not options["no_email"]
+        if send_email and not options["base_url"]:
+            raise CommandError("--base-url is required to send the emails")
+
+        user_importer = importer.UserImporter(
+            options["base_url"] or "",
+            options["site_name"] or Site.objects.get_current().name,
+            lang=options["lang"],
+            send_email=send_email,
+            batch_size=options["batch_size"],
+        )
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            result = user_importer.run(importer.read_rows(stream, file_format))
+
+        for error in result["errors"]:
+            self.stderr.write(
+                "Row {row} ({email}): {errors}".format(**error), ending="\n"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "{0} users created, {1} rows with errors".format(
+                    result["created"], result["errorCount"]
+                )
+            )
+        )
@@ -0,0 +1,92 @@
+"""
+Search backends for the users list.
+
+All of them filter a CustomUser queryset by a term contained in the email,
+first name or last name, they only differ on how the database finds the
+rows (see migration core 0004_customuser_search):
+
+- PostgreSQL keeps the `icontains` lookups, served by trigram GIN indexes.
+- SQLite looks the term up in the `core_customuser_search` FTS5 table.
+  Trigrams need at least 3 characters, shorter terms fall back to a scan.
+"""
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from . import app_settings
+
+SQLITE_SEARCH_TABLE = "core_customuser_search"
+
+
+class ContainsSearchBackend:
+    def filter(self, queryset, term):
+        return queryset.filter(
+            Q(email__icontains=term)
+            | Q(first_name__icontains=term)
+            | Q(last_name__icontains=term)
+        )
+
+
+class PostgresTrigramSearchBackend(ContainsSearchBackend):
+    """`icontains` lookups, indexed with pg_trgm on PostgreSQL"""
+
+
+class SqliteFTSSearchBackend(ContainsSearchBackend):
+    min_length = 3
+
+    def __init__(self):
+        self._available = {}
+
+    def is_available(self, alias):
+        # The table is missing when SQLite was built without FTS5
+        if alias not in self._available:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [SQLITE_SEARCH_TABLE],
+                )
+                self._available[alias] = cursor.fetchone() is not None
+
+        return self._available[alias]
+
+    def filter(self, queryset, term):
+        if len(term) < self.min_length or not self.is_available(queryset.db):
+            return super().filter(queryset, term)
+
+        # A quoted FTS5 string, matched as a substring by the trigram tokenizer
+        match = '"{0}"'.format(term.replace('"', '""'))
+        return queryset.filter(
+            id__in=RawSQL(
+                "SELECT rowid FROM {0} WHERE {0} MATCH %s".format(SQLITE_SEARCH_TABLE),
+                [match],
+            )
+        )
+
+
+VENDOR_BACKENDS = {
+    "postgresql": PostgresTrigramSearchBackend,
+    "sqlite": SqliteFTSSearchBackend,
+}
+
+_backends = {}
+
+
+def get_search_backend(alias="default"):
+    """
+    Search backend of the `alias` database, USERS_SEARCH_BACKEND or the one
+    matching the database vendor
+    """
+    if alias not in _backends:
+        if app_settings.USERS_SEARCH_BACKEND:
+            backend_class = import_string(app_settings.USERS_SEARCH_BACKEND)
+        else:
+            vendor = connections[alias].vendor
+            backend_class = VENDOR_BACKENDS.get(vendor, ContainsSearchBackend)
+        _backends[alias] = backend_class()
+
+    return _backends[alias]
+
+
+def search_users(queryset, term):
+    return get_search_backend(queryset.db).filter(queryset, term)
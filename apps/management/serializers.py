@@ -1,6 +1,10 @@
 from marshmallow import Schema, ValidationError, fields, validate
+from marshmallow.decorators import validates, validates_schema
 
+from apps.core import app_settings as core_app_settings
 from apps.core import models, serialiazers, utils
+from utils.media import get_media_url
+from utils.thumbnails import get_thumbnail
 
 
 def get_user_profile(user):
@@ -27,6 +31,44 @@ class UserSchema(Schema):
     profile = fields.Function(lambda o: get_user_profile(o))
 
 
+def get_user_avatar(user):
+    """
+    Avatar URL of a user loaded with select_related("userprofile"). Never
+    inlined, so listing users does not read the photos from storage.
+    """
+    try:
+        user_profile = user.userprofile
+    except models.UserProfile.DoesNotExist:
+        user_profile = None
+
+    if not user_profile or not user_profile.photo:
+        return "/static/img/photo_default.png"
+
+    name = user_profile.photo.name
+    name = (
+        get_thumbnail(
+            user_profile.photo_thumbnails, name, core_app_settings.AVATAR_SIZE
+        )
+        or name
+    )
+    return get_media_url(name, user_profile.photo.storage)
+
+
+class UserListSchema(Schema):
+    """
+    Lightweight UserSchema for lists, expects the users loaded with
+    select_related("userprofile") and prefetch_related("groups")
+    """
+
+    email = fields.Email()
+    first_name = fields.Str(data_key="firstName")
+    last_name = fields.Str(data_key="lastName")
+    is_active = fields.Boolean(data_key="isActive")
+    user_id = fields.Function(lambda o: o.id)
+    groups = fields.Function(lambda o: GroupsSchema(many=True).dump(o.groups.all()))
+    avatar = fields.Function(lambda o: get_user_avatar(o))
+
+
 def user_group_validation(value):
     groups = utils.get_groups()
     try:
@@ -36,10 +78,33 @@ def user_group_validation(value):
 
 
 class CreateUserSchema(Schema):
+    """
+    Pass the groups in the `groups` context to validate many users without
+    loading them for each one
+    """
+
     firstName = fields.Str(required=True)
     lastName = fields.Str(required=True)
     email = fields.Email(required=True)
-    group = fields.Str(required=True, validate=user_group_validation)
+    group = fields.Str(required=True)
+
+    @validates("group")
+    def validate_group(self, value):
+        groups = self.context.get("groups")
+        if groups is None:
+            groups = utils.get_groups()
+        if value not in groups:
+            raise ValidationError("Invalid user group.")
+
+
+class BulkUsersSchema(Schema):
+    userIds = fields.List(fields.Integer(), validate=validate.Length(min=1))
+    search = fields.Str(validate=validate.Length(min=1))
+
+    @validates_schema
+    def validate_users(self, data, **kwargs):
+        if ("userIds" in data) == ("search" in data):
+            raise ValidationError("Send either userIds or search.")
 
 
 class SystemAppNameSchema(Schema):
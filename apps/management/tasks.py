@@ -0,0 +1,167 @@
+import io
+import tempfile
+import uuid
+from datetime import timedelta
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts import utils as account_utils
+from apps.core.models import CustomUser
+from apps.core.utils import build_mail, send_mail
+from utils.email import EmailDispatcher
+
+from . import app_settings, exporter
+from .search import search_users
+
+logger = get_task_logger(__name__)
+
+
+def get_bulk_users(user_ids=None, search=None):
+    users = CustomUser.objects.exclude(is_superuser=True, is_staff=True).filter(
+        is_active=True
+    )
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+    elif search is not None:
+        users = search_users(users, search)
+    return users.order_by("id")
+
+
+@shared_task(bind=True, name="default:send_bulk_password_reset")
+def send_bulk_password_reset(
+    self, base_url, site_name, user_ids=None, search=None, lang: str = "en-us"
+):
+    """
+    Send a password reset email to every active user in `user_ids` or
+    matching `search`. Emails are sent in chunks over one connection and
+    the progress is reported as the PROGRESS state meta.
+    """
+    users = get_bulk_users(user_ids, search)
+    chunk_size = app_settings.BULK_EMAIL_CHUNK_SIZE
+    progress = {"total": users.count(), "sent": 0, "failed": 0}
+    self.update_state(state="PROGRESS", meta=dict(progress))
+
+    def report(dispatcher):
+        progress.update(sent=dispatcher.sent, failed=len(dispatcher.failed))
+        self.update_state(state="PROGRESS", meta=dict(progress))
+
+    base_url = base_url.rstrip("/")
+    with EmailDispatcher(batch_size=chunk_size, on_flush=report) as dispatcher:
+        for user in users.iterator(chunk_size=chunk_size):
+            ctx = {
+                "site_name": site_name,
+                "user": user,
+                "password_reset_url": base_url
+                + account_utils.get_password_reset_path(user),
+                "lang": lang,
+            }
+            dispatcher.add(
+                build_mail(
+                    "Password Reset E-mail", "email/password_reset_key", user.email, ctx
+                )
+            )
+
+    progress.update(sent=dispatcher.sent, failed=len(dispatcher.failed))
+    logger.info("Bulk password reset: %s", progress)
+    return progress
+
+
+@shared_task(name="default:export_users")
+def export_users(
+    user_id,
+    file_format,
+    search=None,
+    base_url="",
+    site_name="",
+    lang: str = "en-us",
+):
+    """
+    Write the users export to the default storage and email its download
+    link to the user who asked for it
+    """
+    user = CustomUser.objects.get(id=user_id)
+    users = exporter.get_export_users(search)
+
+    rows = 0
+    with tempfile.TemporaryFile() as export_file:
+        stream = io.TextIOWrapper(export_file, encoding="utf-8", newline="")
+        for line in exporter.iter_export(users, file_format):
+            stream.write(line)
+            rows += 1
+        stream.flush()
+        export_file.seek(0)
+        name = default_storage.save(
+            "{0}/users-{1}.{2}".format(exporter.EXPORTS_DIR, uuid.uuid4(), file_format),
+            File(export_file),
+        )
+        stream.detach()
+
+    if file_format == exporter.CSV:
+        rows -= 1  # header
+    download_url = base_url.rstrip("/") + reverse(
+        "management:users_export_download", args=[name.rsplit("/", 1)[-1]]
+    )
+    ctx = {
+        "site_name": site_name,
+        "user": user,
+        "rows": rows,
+        "download_url": download_url,
+        "expire_days": app_settings.USERS_EXPORT_MAX_AGE // (60 * 60 * 24),
+        "lang": lang,
+    }
+    send_mail("Users export", "email/users_export", user.email, ctx)
+
+    logger.info("Users export %s: %s rows", name, rows)
+    return {"rows": rows, "downloadUrl": download_url}
+
+
+@shared_task(name="low_priority:delete_old_exports")
+def delete_old_exports(max_age=None):
+    """Delete the export files written more than `max_age` seconds ago"""
+    max_age = max_age or app_settings.USERS_EXPORT_MAX_AGE
+    threshold = timezone.now() - timedelta(seconds=max_age)
+    try:
+        _, names = default_storage.listdir(exporter.EXPORTS_DIR)
+    except FileNotFoundError:
+        return 0
+
+    deleted = 0
+    for name in names:
+        path = "{0}/{1}".format(exporter.EXPORTS_DIR, name)
+        if default_storage.get_modified_time(path) < threshold:
+            default_storage.delete(path)
+            deleted += 1
+
+    logger.info("Deleted %s old users exports", deleted)
+    return deleted
+
+
+@shared_task(name="default:import_users")
+def import_users(name, file_format, base_url="", site_name="", lang="en-us"):
+    """
+    Import the users of the upload saved as `name` in the default storage,
+    which is deleted afterwards, see apps.management.importer
+    """
+    # The importer queues the password reset tasks of this module
+    from .importer import UserImporter, read_rows
+
+    user_importer = UserImporter(base_url, site_name, lang=lang)
+    try:
+        with default_storage.open(name, "rb") as upload:
+            stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+            result = user_importer.run(read_rows(stream, file_format))
+    finally:
+        default_storage.delete(name)
+
+    logger.info(
+        "Users import %s: %s created, %s errors",
+        name,
+        result["created"],
+        result["errorCount"],
+    )
+    return result
@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.management import exporter
+
+
+@pytest.mark.django_db
+def test_iter_export_csv(create_user):
+    user = create_user(email="jhon@export.com", first_name="Jhon", last_name="Doe")
+    users = exporter.get_export_users().filter(email__endswith="@export.com")
+
+    rows = list(csv.reader(io.StringIO("".join(exporter.iter_export(users, "csv")))))
+
+    assert rows == [
+        [
+            "userId",
+            "email",
+            "firstName",
+            "lastName",
+            "isActive",
+            "dateJoined",
+            "lastLogin",
+        ],
+        [
+            str(user.id),
+            "jhon@export.com",
+            "Jhon",
+            "Doe",
+            "True",
+            user.date_joined.isoformat(),
+            "",
+        ],
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name",
+    ['=HYPERLINK("http://evil.com","x")', "+1", "-1", "@SUM(A1)", "\tx", "\rx"],
+)
+def test_iter_export_csv_formula(create_user, name):
+    """Cells that a spreadsheet would run as a formula are quoted"""
+    create_user(email="jhon@export.com", first_name=name, last_name="Doe")
+    users = exporter.get_export_users().filter(email__endswith="@export.com")
+
+    rows = list(csv.reader(io.StringIO("".join(exporter.iter_export(users, "csv")))))
+
+    assert rows[1][2] == "'" + name
+    assert rows[1][3] == "Doe"
+
+    lines = list(exporter.iter_export(users, "jsonl"))
+    assert json.loads(lines[0])["firstName"] == name
+
+
+@pytest.mark.django_db
+def test_iter_export_jsonl(create_user):
+    user = create_user(email="jhon@export.com", first_name="Jhon", last_name="Doe")
+    users = exporter.get_export_users().filter(email__endswith="@export.com")
+
+    lines = list(exporter.iter_export(users, "jsonl"))
+
+    assert [json.loads(line) for line in lines] == [
+        {
+            "userId": user.id,
+            "email": "jhon@export.com",
+            "firstName": "Jhon",
+            "lastName": "Doe",
+            "isActive": True,
+            "dateJoined": user.date_joined.isoformat(),
+            "lastLogin": None,
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_iter_export_single_query(create_user):
+    for index in range(5):
+        create_user(email=f"user{index}@export.com")
+    users = exporter.get_export_users().filter(email__endswith="@export.com")
+
+    with CaptureQueriesContext(connection) as queries:
+        lines = list(exporter.iter_export(users, "jsonl"))
+
+    assert len(lines) == 5
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_get_export_users_search(create_user):
+    create_user(email="maria@export.com", first_name="Maria")
+    create_user(email="jhon@export.com", first_name="Jhon")
+
+    users = exporter.get_export_users("maria").filter(email__endswith="@export.com")
+
+    assert list(users.values_list("email", flat=True)) == ["maria@export.com"]
+
+
+def test_iter_export_invalid_format():
+    with pytest.raises(ValueError):
+        list(exporter.iter_export(None, "xlsx"))
@@ -0,0 +1,229 @@
+import io
+import json
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import EmailAddress
+from apps.core.models import CustomUser
+from apps.management import importer
+
+CSV_DATA = (
+    "firstName,lastName,email,group\n"
+    "Jhon,Doe,jhon@import.com,customer\n"
+    "Maria,Perez,maria@import.com,management\n"
+)
+
+
+def make_rows(count, domain="import.com", group="customer"):
+    return [
+        {
+            "firstName": "User",
+            "lastName": str(index),
+            "email": f"user{index}@{domain}",
+            "group": group,
+        }
+        for index in range(count)
+    ]
+
+
+def jsonl_rows(rows):
+    stream = io.StringIO("\n".join(json.dumps(row) for row in rows))
+    return importer.read_rows(stream, importer.JSONL)
+
+
+def test_get_format():
+    assert importer.get_format("users.csv") == importer.CSV
+    assert importer.get_format("users.JSONL") == importer.JSONL
+    assert importer.get_format("users.ndjson") == importer.JSONL
+    assert importer.get_format("users.xlsx") is None
+
+
+def test_read_rows_csv():
+    rows = list(importer.read_rows(io.StringIO(CSV_DATA), importer.CSV))
+
+    assert [(number, error) for number, _, error in rows] == [(2, None), (3, None)]
+    assert rows[0][1] == {
+        "firstName": "Jhon",
+        "lastName": "Doe",
+        "email": "jhon@import.com",
+        "group": "customer",
+    }
+
+
+def test_read_rows_jsonl():
+    stream = io.StringIO('{"email": "jhon@import.com"}\n\nnot json\n[1]\n')
+    rows = list(importer.read_rows(stream, importer.JSONL))
+
+    assert rows == [
+        (1, {"email": "jhon@import.com"}, None),
+        (3, None, "Invalid JSON."),
+        (4, None, "Invalid JSON object."),
+    ]
+
+
+@pytest.mark.django_db
+@mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+def test_import_users(mock_delay, django_capture_on_commit_callbacks):
+    rows = importer.read_rows(io.StringIO(CSV_DATA), importer.CSV)
+    with django_capture_on_commit_callbacks(execute=True):
+        result = importer.UserImporter("http://testserver/", "Easystart").run(rows)
+
+    assert result == {"created": 2, "errors": [], "errorCount": 0}
+    user = CustomUser.objects.get(email="maria@import.com")
+    assert (user.first_name, user.last_name) == ("Maria", "Perez")
+    assert not user.has_usable_password()
+    assert list(user.groups.values_list("name", flat=True)) == ["management"]
+    email_address = EmailAddress.objects.get(user=user)
+    assert email_address.email == "maria@import.com"
+    assert email_address.primary and email_address.verified
+
+    args, kwargs = mock_delay.call_args
+    assert args == ("http://testserver/", "Easystart")
+    assert sorted(kwargs["user_ids"]) == sorted(
+        CustomUser.objects.filter(email__endswith="@import.com").values_list(
+            "id", flat=True
+        )
+    )
+
+
+@pytest.mark.django_db
+@mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+def test_import_users_errors(
+    mock_delay, create_user, django_capture_on_commit_callbacks
+):
+    create_user(email="taken@import.com")
+    rows = [
+        {
+            "firstName": "A",
+            "lastName": "B",
+            "email": "a@import.com",
+            "group": "customer",
+        },
+        {"firstName": "A", "lastName": "B", "email": "invalid", "group": "customer"},
+        {"firstName": "A", "lastName": "B", "email": "b@import.com", "group": "none"},
+        {
+            "firstName": "A",
+            "lastName": "B",
+            "email": "a@import.com",
+            "group": "customer",
+        },
+        {
+            "firstName": "A",
+            "lastName": "B",
+            "email": "taken@import.com",
+            "group": "customer",
+        },
+    ]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        result = importer.UserImporter(send_email=False).run(jsonl_rows(rows))
+
+    assert result["created"] == 1
+    assert [(error["row"], error["errors"]) for error in result["errors"]] == [
+        (2, {"email": ["Not a valid email address."]}),
+        (3, {"group": ["Invalid user group."]}),
+        (4, {"email": ["User already exist"]}),
+        (5, {"email": ["User already exist"]}),
+    ]
+    assert CustomUser.objects.filter(email="a@import.com").exists()
+    assert not CustomUser.objects.filter(email="b@import.com").exists()
+    assert callbacks == []
+
+
+@pytest.mark.django_db
+@mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+def test_import_users_batches(mock_delay, settings, django_capture_on_commit_callbacks):
+    settings.BULK_EMAIL_CHUNK_SIZE = 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = importer.UserImporter(batch_size=5).run(jsonl_rows(make_rows(12)))
+
+    assert result == {"created": 12, "errors": [], "errorCount": 0}
+    # Batches of 5, 5 and 2 users, emailed in chunks of 2
+    assert [len(call.kwargs["user_ids"]) for call in mock_delay.call_args_list] == [
+        2,
+        2,
+        1,
+        2,
+        2,
+        1,
+        2,
+    ]
+
+
+@pytest.mark.django_db
+def test_import_users_unknown_columns():
+    """Columns other than the schema fields should be ignored"""
+    stream = io.StringIO(
+        "firstName,lastName,email,group,phone\n"
+        "Jhon,Doe,jhon@import.com,customer,555\n"
+    )
+    rows = importer.read_rows(stream, importer.CSV)
+
+    result = importer.UserImporter(send_email=False).run(rows)
+
+    assert result == {"created": 1, "errors": [], "errorCount": 0}
+
+
+@pytest.mark.django_db
+def test_import_users_max_errors():
+    """Only the first errors should be kept, the rest are counted"""
+    rows = make_rows(5, domain="invalid")
+
+    result = importer.UserImporter(send_email=False, max_errors=2).run(jsonl_rows(rows))
+
+    assert [error["row"] for error in result["errors"]] == [1, 2]
+    assert result["errorCount"] == 5
+
+
+@pytest.mark.django_db
+@mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+def test_import_users_constant_queries(mock_delay):
+    """The queries per batch should not depend on its size"""
+
+    def count_queries(count, domain):
+        rows = jsonl_rows(make_rows(count, domain))
+        with CaptureQueriesContext(connection) as queries:
+            importer.UserImporter(batch_size=count).run(rows)
+        return len(queries)
+
+    assert count_queries(2, "small.com") == count_queries(20, "large.com")
+
+
+@pytest.mark.django_db
+@mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+def test_import_users_integrity_error(mock_delay, create_user):
+    """A user created meanwhile should only fail its own row"""
+    create_user(email="user1@import.com")
+
+    # Created after the emails were checked
+    with mock.patch.object(
+        importer.UserImporter, "get_taken_emails", return_value=set()
+    ):
+        result = importer.UserImporter().run(jsonl_rows(make_rows(3)))
+
+    assert result["created"] == 2
+    assert [error["row"] for error in result["errors"]] == [2]
+    assert CustomUser.objects.filter(email__endswith="@import.com").count() == 3
+
+
+@pytest.mark.django_db
+@mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+def test_import_users_command(
+    mock_delay, tmp_path, capsys, django_capture_on_commit_callbacks
+):
+    path = tmp_path / "users.csv"
+    path.write_text(CSV_DATA + "Pedro,Lopez,invalid,customer\n")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("import_users", str(path), "--base-url", "http://testserver")
+
+    out, err = capsys.readouterr()
+    assert "2 users created, 1 rows with errors" in out
+    assert "Row 4 (invalid)" in err
+    args, kwargs = mock_delay.call_args
+    assert args == ("http://testserver", "example.com")
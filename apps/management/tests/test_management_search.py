@@ -0,0 +1,95 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from apps.management import search
+
+
+@pytest.fixture
+def search_users(create_user):
+    create_user(email="jhondoe@test.com", first_name="Jhon", last_name="Doe")
+    create_user(email="maria@test.com", first_name="Maria", last_name="Garcia")
+    return get_user_model().objects.filter(
+        email__in=["jhondoe@test.com", "maria@test.com"]
+    )
+
+
+def emails(queryset):
+    return sorted(queryset.values_list("email", flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="The SQLite backend needs SQLite"
+)
+def test_sqlite_backend_selected():
+    backend = search.get_search_backend()
+    assert isinstance(backend, search.SqliteFTSSearchBackend)
+    assert backend.is_available("default")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "term,expected",
+    [
+        ("JHON", ["jhondoe@test.com"]),
+        ("arci", ["maria@test.com"]),
+        ("@test.", ["jhondoe@test.com", "maria@test.com"]),
+        ('"', []),
+        ("ma", ["maria@test.com"]),
+        ("nobody", []),
+    ],
+)
+def test_sqlite_backend_matches_contains(search_users, term, expected):
+    backend = search.SqliteFTSSearchBackend()
+    assert emails(backend.filter(search_users, term)) == expected
+    assert emails(search.ContainsSearchBackend().filter(search_users, term)) == (
+        expected
+    )
+
+
+@pytest.mark.django_db
+def test_sqlite_search_table_follows_changes(search_users):
+    backend = search.SqliteFTSSearchBackend()
+    user = search_users.get(email="maria@test.com")
+    user.last_name = "Lopez"
+    user.save()
+
+    assert emails(backend.filter(search_users, "Garcia")) == []
+    assert emails(backend.filter(search_users, "lopez")) == ["maria@test.com"]
+
+    user.delete()
+    assert emails(backend.filter(search_users, "maria")) == []
+
+
+@pytest.mark.django_db
+def test_users_list_search(auto_login_manager_user, create_user):
+    inertia_client, user = auto_login_manager_user()
+    create_user(email="maria@test.com", first_name="Maria", last_name="Garcia")
+
+    response = inertia_client.get(reverse("management:users"), {"search": "garc"})
+
+    users = response.json()["props"]["users"]
+    assert [user["email"] for user in users] == ["maria@test.com"]
+
+
+@pytest.mark.django_db
+def test_benchmark_user_search_command(capsys):
+    call_command(
+        "benchmark_user_search",
+        "--users",
+        "3",
+        "--batch-size",
+        "2",
+        "--repeat",
+        "1",
+        "--terms",
+        "user1",
+    )
+
+    out, err = capsys.readouterr()
+    assert "Generated 3 users" in out
+    assert "Deleted 3 benchmark users" in out
+    assert not get_user_model().objects.filter(email__endswith="benchmark.invalid")
@@ -0,0 +1,111 @@
+import os
+import time
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+
+from apps.management import tasks
+
+
+@pytest.mark.django_db
+def test_send_bulk_password_reset(create_user, settings, mailoutbox):
+    settings.BULK_EMAIL_CHUNK_SIZE = 2
+    users = [create_user(email=f"user{index}@test.com") for index in range(5)]
+    users[4].is_active = False
+    users[4].save()
+    user_ids = [user.id for user in users]
+
+    with mock.patch.object(tasks.send_bulk_password_reset, "update_state") as update:
+        result = tasks.send_bulk_password_reset.apply(
+            args=["http://testserver/", "Easystart"], kwargs={"user_ids": user_ids}
+        )
+
+    assert result.get() == {"total": 4, "sent": 4, "failed": 0}
+    assert sorted(message.to[0] for message in mailoutbox) == [
+        f"user{index}@test.com" for index in range(4)
+    ]
+    assert "http://testserver/password/reset/key/" in mailoutbox[0].body
+    # Start and one report per full chunk
+    assert [call.kwargs["meta"]["sent"] for call in update.call_args_list] == [
+        0,
+        2,
+        4,
+    ]
+
+
+@pytest.mark.django_db
+def test_send_bulk_password_reset_search(create_user, mailoutbox):
+    create_user(email="maria@test.com", first_name="Maria")
+    create_user(email="jhon@test.com", first_name="Jhon")
+
+    with mock.patch.object(tasks.send_bulk_password_reset, "update_state"):
+        result = tasks.send_bulk_password_reset.apply(
+            args=["http://testserver", "Easystart"], kwargs={"search": "maria"}
+        )
+
+    assert result.get()["sent"] == 1
+    assert mailoutbox[0].to == ["maria@test.com"]
+
+
+@pytest.mark.django_db
+def test_export_users(create_user, settings, tmp_path, mailoutbox):
+    settings.MEDIA_ROOT = str(tmp_path)
+    admin = create_user(email="admin@export.com")
+    create_user(email="maria@export.com", first_name="Maria")
+
+    result = tasks.export_users.apply(
+        args=[admin.id, "csv"],
+        kwargs={"search": "maria", "base_url": "http://testserver/"},
+    ).get()
+
+    assert result["rows"] == 1
+    name = result["downloadUrl"].rsplit("/", 1)[-1]
+    assert result["downloadUrl"] == "http://testserver" + reverse(
+        "management:users_export_download", args=[name]
+    )
+    content = (tmp_path / "exports" / name).read_text()
+    assert content.startswith("userId,email,")
+    assert "maria@export.com" in content
+    assert mailoutbox[0].to == ["admin@export.com"]
+    assert result["downloadUrl"] in mailoutbox[0].body
+
+
+def test_delete_old_exports(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    (tmp_path / "exports").mkdir()
+    old = tmp_path / "exports" / "users-old.csv"
+    old.write_text("userId\n")
+    old_time = time.time() - 60 * 60 * 24 * 8
+    os.utime(old, (old_time, old_time))
+    (tmp_path / "exports" / "users-new.csv").write_text("userId\n")
+
+    assert tasks.delete_old_exports() == 1
+    assert os.listdir(tmp_path / "exports") == ["users-new.csv"]
+
+
+def test_delete_old_exports_no_directory(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    assert tasks.delete_old_exports() == 0
+
+
+@pytest.mark.django_db
+@mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+def test_import_users(
+    mock_delay, settings, tmp_path, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    (tmp_path / "imports").mkdir()
+    (tmp_path / "imports" / "users-abc.csv").write_text(
+        "firstName,lastName,email,group\nJhon,Doe,jhon@import.com,customer\n"
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = tasks.import_users.apply(
+            args=["imports/users-abc.csv", "csv"],
+            kwargs={"base_url": "http://testserver/"},
+        ).get()
+
+    assert result == {"created": 1, "errors": [], "errorCount": 0}
+    assert mock_delay.called
+    assert os.listdir(tmp_path / "imports") == []
@@ -1,11 +1,15 @@
 import io
+import json
 from itertools import product
 from typing import Optional, Union
 from unittest import mock
 
 import pytest
 from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test.client import MULTIPART_CONTENT
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from apps.core import models as core_models
@@ -115,6 +119,169 @@ class TestUsersList:
         assert response.status_code == 302
         assert response.url == "/login"
 
+    @pytest.mark.django_db
+    def test_constant_queries(self, auto_login_manager_user, create_user):
+        """The number of queries should not grow with the users listed."""
+        inertia_client, user = auto_login_manager_user()
+        url = reverse("management:users")
+
+        def count_queries():
+            inertia_client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = inertia_client.get(url)
+            assert response.status_code == 200
+            return len(queries), response.json()["props"]["users"]
+
+        queries_few, users_few = count_queries()
+
+        for index in range(10):
+            new_user = create_user(email=f"user{index}@test.com")
+            core_models.UserProfile.objects.create(user=new_user)
+        queries_many, users = count_queries()
+
+        assert len(users) == 10 > len(users_few)
+        assert queries_few == queries_many
+        assert all(user["avatar"] == "/static/img/photo_default.png" for user in users)
+        assert all(user["groups"] for user in users)
+
+    @pytest.mark.django_db
+    def test_cursor_pagination(self, auto_login_manager_user, create_user, settings):
+        """In cursor mode the pages should be linked by next/prev cursors."""
+        settings.USERS_PAGINATION = "cursor"
+        settings.USERS_PAGINATE_BY = 3
+        inertia_client, user = auto_login_manager_user()
+        for index in range(5):
+            create_user(email=f"user{index}@test.com")
+        url = reverse("management:users")
+
+        first = inertia_client.get(url).json()["props"]
+        assert "pages" not in first
+        assert first["prevCursor"] is None
+        assert len(first["users"]) == 3
+
+        second = inertia_client.get(url, {"cursor": first["nextCursor"]}).json()
+        second = second["props"]
+        assert second["count"] == first["count"]
+        assert second["users"][0]["user_id"] > first["users"][-1]["user_id"]
+
+        back = inertia_client.get(url, {"cursor": second["prevCursor"]}).json()
+        assert back["props"]["users"] == first["users"]
+
+
+class TestUsersExport:
+    """Tests for the `users_export` and `users_export_download` views."""
+
+    @pytest.mark.django_db
+    def test_manager_stream(self, auto_login_manager_user, create_user):
+        """The response should stream the users matching the search."""
+        inertia_client, user = auto_login_manager_user()
+        create_user(email="maria@export.com", first_name="Maria")
+        create_user(email="jhon@export.com", first_name="Jhon")
+
+        url = reverse("management:users_export")
+        response = inertia_client.get(url, {"format": "jsonl", "search": "export"})
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Disposition"] == 'attachment; filename="users.jsonl"'
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert sorted(json.loads(line)["email"] for line in lines) == [
+            "jhon@export.com",
+            "maria@export.com",
+        ]
+
+    @pytest.mark.django_db
+    def test_invalid_format(self, auto_login_manager_user):
+        """Only CSV and JSONL exports should be allowed."""
+        inertia_client, user = auto_login_manager_user()
+
+        url = reverse("management:users_export")
+        response = inertia_client.get(url, {"format": "xlsx"})
+
+        assert response.status_code == 400
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.export_users.delay")
+    def test_manager_large_export(self, mock_delay, auto_login_manager_user, settings):
+        """Exports over the threshold should run as a task."""
+        settings.USERS_EXPORT_ASYNC_THRESHOLD = 0
+        inertia_client, user = auto_login_manager_user()
+        mock_delay.return_value.id = "task-id"
+
+        url = reverse("management:users_export")
+        response = inertia_client.get(url, {"search": "test"})
+
+        assert response.status_code == 202
+        assert response.json() == {
+            "taskId": "task-id",
+            "statusUrl": reverse("management:users_export_status", args=["task-id"]),
+        }
+        args, kwargs = mock_delay.call_args
+        assert args == (user.id, "csv")
+        assert kwargs["search"] == "test"
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.export_users.AsyncResult")
+    @mock.patch("apps.management.tasks.export_users.delay")
+    def test_status(
+        self, mock_delay, mock_async_result, auto_login_manager_user, settings
+    ):
+        """Users with `can_view_users` can poll the exports they started."""
+        settings.USERS_EXPORT_ASYNC_THRESHOLD = 0
+        inertia_client, user = auto_login_manager_user()
+        mock_delay.return_value.id = "task-id"
+        mock_async_result.return_value.state = "SUCCESS"
+        mock_async_result.return_value.info = {"rows": 3, "downloadUrl": "/url"}
+        status_url = reverse("management:users_export_status", args=["task-id"])
+
+        response = inertia_client.get(status_url)
+        assert response.json()["component"] == "404Error"
+
+        inertia_client.get(reverse("management:users_export"))
+        response = inertia_client.get(status_url)
+
+        mock_async_result.assert_called_once_with("task-id")
+        assert response.json() == {
+            "state": "SUCCESS",
+            "rows": 3,
+            "downloadUrl": "/url",
+        }
+
+    @pytest.mark.django_db
+    def test_download(self, auto_login_manager_user, settings, tmp_path):
+        """The response should return the stored export file."""
+        settings.MEDIA_ROOT = str(tmp_path)
+        (tmp_path / "exports").mkdir()
+        (tmp_path / "exports" / "users-abc.csv").write_text("userId,email\n")
+        inertia_client, user = auto_login_manager_user()
+
+        url = reverse("management:users_export_download", args=["users-abc.csv"])
+        response = inertia_client.get(url)
+
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == b"userId,email\n"
+
+        url = reverse("management:users_export_download", args=["users-none.csv"])
+        response = inertia_client.get(url)
+        assert response.json()["component"] == "404Error"
+
+        # Never served as media
+        url = reverse("core:media", args=["exports/users-abc.csv"])
+        response = inertia_client.get(url)
+        assert response.json()["component"] == "404Error"
+
+    @pytest.mark.django_db
+    def test_client(self, auto_login_user):
+        """Client user should not have permission to export users."""
+        inertia_client, user = auto_login_user()
+        assert not user.has_perm("core.can_view_users")
+
+        url = reverse("management:users_export")
+        response = inertia_client.get(url)
+
+        assert response.status_code == 200
+        assert response.json()["component"] == "403Error"
+
 
 class TestUserDetail:
     """Tests for the `user_detail` view."""
@@ -509,6 +676,98 @@ class TestUserResetPassword:
         assert response.url == "/login"
 
 
+class TestUsersBulkResetPassword:
+    """Tests for the `users_bulk_reset_password` and `users_bulk_status` views."""
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+    def test_manager(self, mock_delay, auto_login_manager_user):
+        """The response should start the task and return its status URL."""
+        inertia_client, user = auto_login_manager_user()
+        mock_delay.return_value.id = "task-id"
+
+        url = reverse("management:users_bulk_reset_password")
+        response = inertia_client.post(
+            url, {"userIds": [1, 2]}, content_type="application/json"
+        )
+
+        assert response.status_code == 202
+        assert response.json() == {
+            "taskId": "task-id",
+            "statusUrl": reverse("management:users_bulk_status", args=["task-id"]),
+        }
+        args, kwargs = mock_delay.call_args
+        assert args == ("http://testserver/", "example.com")
+        assert kwargs["user_ids"] == [1, 2]
+        assert kwargs["search"] is None
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize("data", [{}, {"userIds": [1], "search": "jhon"}])
+    @mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+    def test_invalid(self, mock_delay, auto_login_manager_user, data):
+        """Either user ids or a search should be sent."""
+        inertia_client, user = auto_login_manager_user()
+
+        url = reverse("management:users_bulk_reset_password")
+        response = inertia_client.post(url, data, content_type="application/json")
+
+        assert response.status_code == 400
+        assert not mock_delay.called
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+    def test_client(self, mock_delay, auto_login_user):
+        """Client user should not have permission to access the view."""
+        inertia_client, user = auto_login_user()
+
+        url = reverse("management:users_bulk_reset_password")
+        response = inertia_client.post(
+            url, {"search": "jhon"}, content_type="application/json"
+        )
+
+        # The 403 error view only accepts GET
+        assert response.status_code == 405
+        assert not mock_delay.called
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.send_bulk_password_reset.AsyncResult")
+    @mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+    def test_status(self, mock_delay, mock_async_result, auto_login_manager_user):
+        """The response should return the task state and progress."""
+        inertia_client, user = auto_login_manager_user()
+        mock_delay.return_value.id = "task-id"
+        mock_async_result.return_value.state = "PROGRESS"
+        mock_async_result.return_value.info = {"total": 10, "sent": 5, "failed": 0}
+        inertia_client.post(
+            reverse("management:users_bulk_reset_password"),
+            {"userIds": [1, 2]},
+            content_type="application/json",
+        )
+
+        url = reverse("management:users_bulk_status", args=["task-id"])
+        response = inertia_client.get(url)
+
+        mock_async_result.assert_called_once_with("task-id")
+        assert response.json() == {
+            "state": "PROGRESS",
+            "total": 10,
+            "sent": 5,
+            "failed": 0,
+        }
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.send_bulk_password_reset.AsyncResult")
+    def test_status_other_task(self, mock_async_result, auto_login_manager_user):
+        """Tasks not started from the session should not be reported."""
+        inertia_client, user = auto_login_manager_user()
+
+        url = reverse("management:users_bulk_status", args=["other-task-id"])
+        response = inertia_client.get(url)
+
+        assert response.json()["component"] == "404Error"
+        assert not mock_async_result.called
+
+
 class TestUserChangeNames:
     """Tests for the `user_change_names` view."""
 
@@ -1371,7 +1630,6 @@ class TestUserChangeDateFormat:
         else:
             assert not user.has_perm("core.can_edit_user")
 
-
         common_user = create_user(
             email="commonuser@test.com", first_name="Common", last_name="User"
         )
@@ -1475,7 +1733,7 @@ class TestUserChangePhoto:
         profile = core_models.UserProfile.objects.filter(user=common_user).first()
         assert profile is not None
         assert profile.photo
-        assert profile.get_photo().startswith("data:image/png;base64,")
+        assert profile.get_photo().startswith("/media/profile/")
 
     @pytest.mark.django_db
     @pytest.mark.parametrize("mode", ["invalid_file", "no_data"])
@@ -1634,7 +1892,7 @@ class TestUserChangePhoto:
             assert data["props"]["success"] == "Successful photo change"
 
             assert profile.photo
-            assert profile.get_photo().startswith("data:image/png;base64,")
+            assert profile.get_photo().startswith("/media/profile/")
         else:
             # Inertia client somehow tries to request a GET view (probably 403_error)
             assert response.status_code == 405
@@ -1685,7 +1943,7 @@ class TestUserRemovePhoto:
             user=common_user, defaults={"photo": test_image_file}
         )
         assert profile.photo
-        assert profile.get_photo().startswith("data:image/png;base64,")
+        assert profile.get_photo().startswith("/media/profile/")
 
         url = reverse("management:user_remove_photo", args=(common_user.id,))
         response = inertia_client.get(url)
@@ -1739,7 +1997,7 @@ class TestUserRemovePhoto:
             user=common_user, defaults={"photo": test_image_file}
         )
         assert profile.photo
-        assert profile.get_photo().startswith("data:image/png;base64,")
+        assert profile.get_photo().startswith("/media/profile/")
 
         url = reverse("management:user_remove_photo", args=(common_user.id,))
         response = inertia_client.get(url)
@@ -1783,7 +2041,7 @@ class TestUserRemovePhoto:
             user=common_user, defaults={"photo": test_image_file}
         )
         assert profile.photo
-        assert profile.get_photo().startswith("data:image/png;base64,")
+        assert profile.get_photo().startswith("/media/profile/")
 
         url = reverse("management:user_remove_photo", args=(common_user.id,))
         response = inertia_client.get(url)
@@ -2086,7 +2344,9 @@ class TestUserCreate:
             # TODO: Show success message
             assert not data["props"]["error"]
 
-            assert core_models.CustomUser.objects.filter(email=email).exists()
+            new_user = core_models.CustomUser.objects.get(email=email)
+            # Set from the password reset email
+            assert not new_user.has_usable_password()
         else:
             assert response.status_code == 200
 
@@ -2953,7 +3213,7 @@ class TestSystemAppLogoChange:
         if create_global_settings:
             assert data["props"]["success"] == "Successful logo change"
             assert global_settings.logo_app
-            assert global_settings.get_logo().startswith("data:image/png;base64,")
+            assert global_settings.get_logo().startswith("/media/settings/")
         else:
             assert data["props"]["error"]
             assert data["props"]["errors"] == "There is not a register of settings"
@@ -3074,7 +3334,7 @@ class TestSystemAppLogoChange:
             assert data["props"]["success"] == "Successful logo change"
 
             assert global_settings.logo_app
-            assert global_settings.get_logo().startswith("data:image/png;base64,")
+            assert global_settings.get_logo().startswith("/media/settings/")
         else:
             # Inertia client somehow tries to request a GET view (probably 403_error)
             assert response.status_code == 405
@@ -3115,7 +3375,7 @@ class TestSystemAppLogoRemove:
                 logo_app=test_image_file
             )
             assert global_settings.logo_app
-            assert global_settings.get_logo().startswith("data:image/png;base64,")
+            assert global_settings.get_logo().startswith("/media/settings/")
 
         url = reverse("management:system_remove_app_logo")
         response = inertia_client.get(url)
@@ -3150,7 +3410,7 @@ class TestSystemAppLogoRemove:
             logo_app=test_image_file
         )
         assert global_settings.logo_app
-        assert global_settings.get_logo().startswith("data:image/png;base64,")
+        assert global_settings.get_logo().startswith("/media/settings/")
 
         url = reverse("management:system_remove_app_logo")
         response = inertia_client.get(url)
@@ -3189,7 +3449,7 @@ class TestSystemAppLogoRemove:
             logo_app=test_image_file
         )
         assert global_settings.logo_app
-        assert global_settings.get_logo().startswith("data:image/png;base64,")
+        assert global_settings.get_logo().startswith("/media/settings/")
 
         url = reverse("management:system_remove_app_logo")
         response = inertia_client.get(url)
@@ -3344,3 +3604,109 @@ class TestSystemActiveRegistration:
 
         assert response.status_code == 302
         assert response.url == "/login"
+
+
+class TestUsersImport:
+    """Tests for the `users_import` view."""
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.send_bulk_password_reset.delay")
+    def test_manager(
+        self, mock_delay, auto_login_manager_user, django_capture_on_commit_callbacks
+    ):
+        """The response should report the users created and the row errors."""
+        inertia_client, user = auto_login_manager_user()
+        upload = SimpleUploadedFile(
+            "users.csv",
+            b"firstName,lastName,email,group\n"
+            b"New,User,newuser@test.com,customer\n"
+            b"Bad,User,invalid,customer\n",
+            content_type="text/csv",
+        )
+
+        url = reverse("management:users_import")
+        with django_capture_on_commit_callbacks(execute=True):
+            response = inertia_client.post(url, {"file": upload})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 1
+        assert [error["row"] for error in data["errors"]] == [3]
+        assert core_models.CustomUser.objects.filter(email="newuser@test.com").exists()
+        assert mock_delay.called
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.import_users.AsyncResult")
+    @mock.patch("apps.management.tasks.import_users.delay")
+    def test_large_file(
+        self, mock_delay, mock_async_result, auto_login_manager_user, settings, tmp_path
+    ):
+        """Large files should be imported by a task the user can poll."""
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.USERS_IMPORT_ASYNC_SIZE = 10
+        inertia_client, user = auto_login_manager_user()
+        mock_delay.return_value.id = "task-id"
+        mock_async_result.return_value.state = "SUCCESS"
+        mock_async_result.return_value.info = {"created": 1, "errorCount": 0}
+        upload = SimpleUploadedFile(
+            "users.csv",
+            b"firstName,lastName,email,group\nNew,User,newuser@test.com,customer\n",
+        )
+
+        response = inertia_client.post(
+            reverse("management:users_import"), {"file": upload}
+        )
+
+        assert response.status_code == 202
+        status_url = reverse("management:users_import_status", args=["task-id"])
+        assert response.json() == {"taskId": "task-id", "statusUrl": status_url}
+        name = mock_delay.call_args.args[0]
+        assert name.startswith("imports/users-") and name.endswith(".csv")
+        assert (tmp_path / name).read_bytes().startswith(b"firstName,")
+        assert not core_models.CustomUser.objects.filter(
+            email="newuser@test.com"
+        ).exists()
+
+        response = inertia_client.get(status_url)
+        assert response.json() == {"state": "SUCCESS", "created": 1, "errorCount": 0}
+
+    @pytest.mark.django_db
+    @mock.patch("apps.management.tasks.import_users.AsyncResult")
+    def test_status_other_task(self, mock_async_result, auto_login_manager_user):
+        """Tasks not started from the session should not be reported."""
+        inertia_client, user = auto_login_manager_user()
+
+        url = reverse("management:users_import_status", args=["other-task-id"])
+        response = inertia_client.get(url)
+
+        assert response.json()["component"] == "404Error"
+        assert not mock_async_result.called
+
+    @pytest.mark.django_db
+    def test_invalid_file(self, auto_login_manager_user):
+        """Only CSV and JSONL files should be imported."""
+        inertia_client, user = auto_login_manager_user()
+        upload = SimpleUploadedFile("users.xlsx", b"data")
+
+        url = reverse("management:users_import")
+        response = inertia_client.post(url, {"file": upload})
+
+        assert response.status_code == 400
+        assert "file" in response.json()["errors"]
+
+    @pytest.mark.django_db
+    def test_client(self, auto_login_user):
+        """Client user should not have permission to import users."""
+        inertia_client, user = auto_login_user()
+        upload = SimpleUploadedFile(
+            "users.csv",
+            b"firstName,lastName,email,group\nNew,User,newuser@test.com,customer\n",
+        )
+
+        url = reverse("management:users_import")
+        response = inertia_client.post(url, {"file": upload})
+        # The 403 view only allows GET
+        assert response.status_code == 405
+        assert not core_models.CustomUser.objects.filter(
+            email="newuser@test.com"
+        ).exists()
@@ -10,6 +10,17 @@ app_name = "management"
 urlpatterns = [
     path("", views.index, name="index"),
     path("users", views.users_list, name="users"),
+    path("users/export", views.users_export, name="users_export"),
+    re_path(
+        r"^users/export/(?P<task_id>[-\w]+)$",
+        views.users_export_status,
+        name="users_export_status",
+    ),
+    re_path(
+        r"^users/exports/(?P<name>users-[-\w]+\.(?:csv|jsonl))$",
+        views.users_export_download,
+        name="users_export_download",
+    ),
     re_path(
         r"^user/(?P<user_id>[-:\w]+)/$",
         views.user_detail,
@@ -69,6 +80,22 @@ urlpatterns = [
         name="user_reset_password",
     ),
     path("users/create", views.create_user, name="user_create"),
+    path("users/import", views.users_import, name="users_import"),
+    re_path(
+        r"^users/import/(?P<task_id>[-\w]+)$",
+        views.users_import_status,
+        name="users_import_status",
+    ),
+    path(
+        "users/bulk/reset-password",
+        views.users_bulk_reset_password,
+        name="users_bulk_reset_password",
+    ),
+    re_path(
+        r"^users/bulk/(?P<task_id>[-\w]+)$",
+        views.users_bulk_status,
+        name="users_bulk_status",
+    ),
     # Settings
     path("settings", core_views.settings, name="settings"),
     path(
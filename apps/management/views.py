@@ -1,8 +1,17 @@
+import io
+import uuid
+
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.models import Group
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.files.storage import default_storage
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Q
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.http.response import FileResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils import translation
 from django.views.decorators.http import require_http_methods
 from inertia import render, share
 from marshmallow import ValidationError
@@ -14,14 +23,36 @@ from apps.core import app_settings as core_settings
 from apps.core import forms as core_forms
 from apps.core import models as core_models
 from apps.core import serialiazers as core_serializers
+from apps.core import tasks as core_tasks
 from apps.core import utils as core_utils
 from apps.core.models import CustomUser
 from utils.build_dict_language import get_dict_countries, get_dict_language
 from utils.date_formats import DATE_FORMATS
 from utils.decorator import clean_message, json_format_required
 from utils.inertia import share_other_view
+from utils.pagination import CursorPage, approximate_count
+from utils.thumbnails import delete_thumbnails
+
+from . import app_settings, exporter, forms, serializers, tasks
+from .importer import UserImporter, read_rows
+from .search import search_users
+
+# Uploads imported by a task are kept there until it is done
+IMPORTS_DIR = "imports"
+
+# Ids of the tasks started by the session user, see `remember_task`
+TASKS_SESSION_KEY = "management_tasks"
+TASKS_SESSION_MAX = 20
+
 
-from . import forms, serializers
+def remember_task(request, task_id):
+    """Let the session user, and only them, read the status of a task"""
+    task_ids = request.session.get(TASKS_SESSION_KEY, [])
+    request.session[TASKS_SESSION_KEY] = (task_ids + [task_id])[-TASKS_SESSION_MAX:]
+
+
+def is_remembered_task(request, task_id):
+    return task_id in request.session.get(TASKS_SESSION_KEY, [])
 
 
 @require_http_methods(["GET"])
@@ -40,24 +71,47 @@ def index(request):
 @permission_required("core.can_view_users", raise_exception=True)
 @clean_message
 def users_list(request):
-    paginate_by = 10
-    user_schema = serializers.UserSchema(many=True)
+    paginate_by = app_settings.USERS_PAGINATE_BY
+    user_schema = serializers.UserListSchema(many=True)
     users_obj = (
         CustomUser.objects.all()
         .exclude(is_superuser=True, is_staff=True)
+        .select_related("userprofile")
+        .prefetch_related("groups")
         .order_by("id")
     )
 
     search = request.GET.get("search", None)
     if search is not None:
-        users_obj = users_obj.filter(
-            Q(email__icontains=search)
-            | Q(first_name__icontains=search)
-            | Q(last_name__icontains=search)
+        users_obj = search_users(users_obj, search)
+
+    cursor = request.GET.get("cursor")
+    if (
+        cursor is not None
+        or app_settings.USERS_PAGINATION == app_settings.PaginationMode.CURSOR
+    ):
+        user_list = CursorPage(users_obj, cursor, paginate_by)
+        count = None
+        if app_settings.USERS_APPROXIMATE_COUNT:
+            count = approximate_count(users_obj)
+        if count is None:
+            count = users_obj.count()
+
+        props = {
+            "count": count,
+            "paginateBy": paginate_by,
+            "nextCursor": user_list.next_cursor,
+            "prevCursor": user_list.previous_cursor,
+            "users": user_schema.dump(user_list),
+            "search": search,
+        }
+        return render(
+            request,
+            "Users",
+            props,
         )
 
     page = request.GET.get("page")
-    count = users_obj.count()
     paginator = Paginator(users_obj, paginate_by)
 
     try:
@@ -70,7 +124,7 @@ def users_list(request):
     users = user_schema.dump(user_list)
 
     props = {
-        "count": count,
+        "count": paginator.count,
         "paginateBy": paginate_by,
         "pages": paginator.num_pages,
         "currentPage": int(page) if page else 1,
@@ -84,6 +138,82 @@ def users_list(request):
     )
 
 
+@require_http_methods(["GET"])
+@login_required(login_url="/login", redirect_field_name=None)
+@permission_required("core.can_view_users", raise_exception=True)
+def users_export(request):
+    file_format = request.GET.get("format", exporter.CSV)
+    if file_format not in exporter.FORMATS:
+        return JsonResponse(
+            {"error": True, "errors": {"format": ["Invalid export format."]}},
+            status=400,
+        )
+
+    search = request.GET.get("search", None)
+    users = exporter.get_export_users(search)
+
+    count = approximate_count(users)
+    if count is None:
+        count = users.count()
+
+    if count > app_settings.USERS_EXPORT_ASYNC_THRESHOLD:
+        result = tasks.export_users.delay(
+            request.user.id,
+            file_format,
+            search=search,
+            base_url=account_utils.build_absolute_uri(request, "/"),
+            site_name=get_current_site(request).name,
+            lang=translation.get_language(),
+        )
+        remember_task(request, result.id)
+        return JsonResponse(
+            {
+                "taskId": result.id,
+                "statusUrl": reverse(
+                    "management:users_export_status", args=[result.id]
+                ),
+            },
+            status=202,
+        )
+
+    response = StreamingHttpResponse(
+        exporter.iter_export(users, file_format),
+        content_type=exporter.CONTENT_TYPES[file_format],
+    )
+    response["Content-Disposition"] = 'attachment; filename="users.{0}"'.format(
+        file_format
+    )
+    return response
+
+
+@require_http_methods(["GET"])
+@login_required(login_url="/login", redirect_field_name=None)
+@permission_required("core.can_view_users", raise_exception=True)
+def users_export_download(request, name):
+    path = "{0}/{1}".format(exporter.EXPORTS_DIR, name)
+    try:
+        export_file = default_storage.open(path, "rb")
+    except FileNotFoundError:
+        raise Http404
+
+    return FileResponse(export_file, as_attachment=True, filename=name)
+
+
+@require_http_methods(["GET"])
+@login_required(login_url="/login", redirect_field_name=None)
+@permission_required("core.can_view_users", raise_exception=True)
+def users_export_status(request, task_id):
+    if not is_remembered_task(request, task_id):
+        raise Http404
+
+    result = tasks.export_users.AsyncResult(task_id)
+    data = {"state": result.state}
+    if isinstance(result.info, dict):
+        data.update(result.info)
+
+    return JsonResponse(data)
+
+
 @require_http_methods(["GET"])
 @login_required(login_url="/login", redirect_field_name=None)
 @permission_required("core.can_view_user_detail", raise_exception=True)
@@ -159,6 +289,48 @@ def user_reset_password(request, user_id):
     return redirect("management:user_detail", user_id=user.id)
 
 
+@require_http_methods(["POST"])
+@login_required(login_url="/login", redirect_field_name=None)
+@permission_required("core.can_edit_user", raise_exception=True)
+@json_format_required
+def users_bulk_reset_password(request):
+    try:
+        data = serializers.BulkUsersSchema().loads(request.body)
+    except ValidationError as err:
+        return JsonResponse({"error": True, "errors": err.messages}, status=400)
+
+    result = tasks.send_bulk_password_reset.delay(
+        account_utils.build_absolute_uri(request, "/"),
+        get_current_site(request).name,
+        user_ids=data.get("userIds"),
+        search=data.get("search"),
+        lang=translation.get_language(),
+    )
+    remember_task(request, result.id)
+    return JsonResponse(
+        {
+            "taskId": result.id,
+            "statusUrl": reverse("management:users_bulk_status", args=[result.id]),
+        },
+        status=202,
+    )
+
+
+@require_http_methods(["GET"])
+@login_required(login_url="/login", redirect_field_name=None)
+@permission_required("core.can_edit_user", raise_exception=True)
+def users_bulk_status(request, task_id):
+    if not is_remembered_task(request, task_id):
+        raise Http404
+
+    result = tasks.send_bulk_password_reset.AsyncResult(task_id)
+    data = {"state": result.state}
+    if isinstance(result.info, dict):
+        data.update(result.info)
+
+    return JsonResponse(data)
+
+
 @require_http_methods(["POST"])
 @login_required(login_url="/login", redirect_field_name=None)
 @permission_required("core.can_edit_user", raise_exception=True)
@@ -207,6 +379,12 @@ def user_change_photo(request, user_id):
         user_profile = core_models.UserProfile.objects.get(user=user)
         user_profile.photo = form.cleaned_data["photo"]
         user_profile.save()
+        profile_id, photo_name = user_profile.id, user_profile.photo.name
+        transaction.on_commit(
+            lambda: core_tasks.generate_profile_photo_thumbnails.delay(
+                profile_id, photo_name
+            )
+        )
         share_other_view(
             request,
             success="Successful photo change",
@@ -232,6 +410,8 @@ def user_remove_photo(request, user_id):
         return redirect("management:users")
 
     user_profile = core_models.UserProfile.objects.get(user=user)
+    delete_thumbnails(user_profile.photo_thumbnails, storage=user_profile.photo.storage)
+    user_profile.photo_thumbnails = {}
     user_profile.photo.delete()
     share_other_view(
         request,
@@ -433,11 +613,12 @@ def create_user(request):
                 props,
             )
         else:
-            password = account_utils.custom_password()
             try:
+                # The user sets a password from the reset email, no throwaway
+                # password is hashed
                 user = core_models.CustomUser.create_user(
                     data.get("email"),
-                    password,
+                    None,
                     data.get("firstName"),
                     data.get("lastName"),
                 )
@@ -466,6 +647,61 @@ def create_user(request):
         return redirect("management:users")
 
 
+@require_http_methods(["POST"])
+@login_required(login_url="/login", redirect_field_name=None)
+@permission_required("core.can_create_user", raise_exception=True)
+def users_import(request):
+    form = forms.UsersImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({"error": True, "errors": form.errors}, status=400)
+
+    upload = form.cleaned_data["file"]
+    file_format = form.cleaned_data["format"]
+    base_url = account_utils.build_absolute_uri(request, "/")
+    site_name = get_current_site(request).name
+    lang = translation.get_language()
+
+    # Large files are imported by a task, out of the request transaction
+    if upload.size > app_settings.USERS_IMPORT_ASYNC_SIZE:
+        name = default_storage.save(
+            "{0}/users-{1}.{2}".format(IMPORTS_DIR, uuid.uuid4(), file_format), upload
+        )
+        result = tasks.import_users.delay(
+            name, file_format, base_url=base_url, site_name=site_name, lang=lang
+        )
+        remember_task(request, result.id)
+        return JsonResponse(
+            {
+                "taskId": result.id,
+                "statusUrl": reverse(
+                    "management:users_import_status", args=[result.id]
+                ),
+            },
+            status=202,
+        )
+
+    importer = UserImporter(base_url, site_name, lang=lang)
+    stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    result = importer.run(read_rows(stream, file_format))
+
+    return JsonResponse(result)
+
+
+@require_http_methods(["GET"])
+@login_required(login_url="/login", redirect_field_name=None)
+@permission_required("core.can_create_user", raise_exception=True)
+def users_import_status(request, task_id):
+    if not is_remembered_task(request, task_id):
+        raise Http404
+
+    result = tasks.import_users.AsyncResult(task_id)
+    data = {"state": result.state}
+    if isinstance(result.info, dict):
+        data.update(result.info)
+
+    return JsonResponse(data)
+
+
 @require_http_methods(["GET"])
 @login_required(login_url="/login", redirect_field_name=None)
 @permission_required("core.can_management_global_settings", raise_exception=True)
@@ -528,6 +764,10 @@ def system_change_app_logo(request):
     if form.is_valid():
         global_settings.logo_app = form.cleaned_data["logo"]
         global_settings.save()
+        settings_id, logo_name = global_settings.id, global_settings.logo_app.name
+        transaction.on_commit(
+            lambda: core_tasks.generate_logo_thumbnails.delay(settings_id, logo_name)
+        )
         share_other_view(
             request,
             success="Successful logo change",
@@ -551,6 +791,10 @@ def system_remove_app_logo(request):
         share(request, message_other_view=True)
         return redirect("management:global_settings_general")
 
+    delete_thumbnails(
+        global_settings.logo_thumbnails, storage=global_settings.logo_app.storage
+    )
+    global_settings.logo_thumbnails = {}
     global_settings.logo_app.delete()
     share_other_view(
         request,
@@ -1,3 +1,4 @@
+import io
 import os
 from pathlib import Path
 from typing import List, Union
@@ -31,6 +32,16 @@ def django_db_setup(django_db_blocker):
         call_command("runscript", "sync_permissions")
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    from apps.core.models import GlobalSettings
+
+    cache.clear()
+    GlobalSettings.objects.clear_cached()
+
+
 @pytest.fixture
 def inertia_client():
     client = Client(HTTP_X_REQUESTED_WITH="XMLHttpRequest", HTTP_X_INERTIA=True)
@@ -48,6 +59,17 @@ def test_image_file():
     return SimpleUploadedFile("image.jpg", content=content, content_type="image/jpeg")
 
 
+@pytest.fixture
+def test_png_file():
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), color="red").save(buffer, format="PNG")
+    return SimpleUploadedFile(
+        "image.png", content=buffer.getvalue(), content_type="image/png"
+    )
+
+
 @pytest.fixture
 def create_user(db, django_user_model, test_password):
     def make_user(**kwargs):
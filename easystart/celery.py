@@ -10,6 +10,7 @@ import os
 import time
 
 from celery import Celery
+from celery.signals import worker_process_init
 from django.conf import settings
 
 # this code copied from manage.py
@@ -27,6 +28,13 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
 
+@worker_process_init.connect
+def warm_email_templates(**kwargs):
+    from utils.email import renderer
+
+    renderer.warm()
+
+
 @app.task
 def add(x, y):
     # from celery.contrib import rdb
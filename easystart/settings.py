@@ -13,6 +13,8 @@ import os
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 from kombu import Queue
 
 env = environ.Env()
@@ -63,14 +65,18 @@ MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
+    # Keeps sessions of the former auth backend logged in, see
+    # AUTHENTICATION_BACKENDS
+    "apps.accounts.middleware.SessionBackendMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_user_agents.middleware.UserAgentMiddleware",
     "inertia.middleware.InertiaMiddleware",
-    "apps.accounts.middleware.AuthPropsMiddleware",
-    "apps.core.middleware.CorePropsMiddleware",
-    "apps.core.middleware.SessionIdleTimeout",
+    # Shares the auth and global settings props and handles the session idle
+    # timeout in a single pass, replacing AuthPropsMiddleware,
+    # CorePropsMiddleware and SessionIdleTimeout
+    "apps.core.middleware.PropsMiddleware",
 ]
 
 ROOT_URLCONF = "easystart.urls"
@@ -114,6 +120,54 @@ DATABASES = {
 # Wrap all requests funtions with transaction.atomic
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
 
+# Cache and sessions
+# https://docs.djangoproject.com/en/4.0/topics/cache/#redis
+# https://docs.djangoproject.com/en/4.0/topics/http/sessions/#using-cached-sessions
+
+# Redis shared by all the processes, e.g. redis://redis:6379/1 (a different
+# database than the Celery broker). Sessions are then read from the cache
+# and written through to the database. Without it each process keeps its
+# own local memory cache and sessions live in the database only.
+# Permissions, auth props and global settings are then cached for at most
+# LOCAL_CACHE_TIMEOUT seconds, as changes made in one process never reach
+# the cache of the others, see utils.cache.
+LOCAL_CACHE_TIMEOUT = env.int("LOCAL_CACHE_TIMEOUT", 10)
+CACHE_REDIS_URL = env.str("CACHE_REDIS_URL", "")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+    SESSION_CACHE_ALIAS = "default"
+
+# Password hashing
+# https://docs.djangoproject.com/en/4.0/topics/auth/passwords/
+# PASSWORD_HASHER picks the hasher of new passwords (pbkdf2, scrypt, argon2
+# or bcrypt), the others still check older hashes, which are rehashed on
+# the next login. argon2 needs argon2-cffi and bcrypt needs bcrypt. Costs
+# are tuned with PASSWORD_HASHER_COSTS, see apps.accounts.hashers.
+
+PASSWORD_HASHER_CHOICES = {
+    "pbkdf2": "apps.accounts.hashers.PBKDF2PasswordHasher",
+    "scrypt": "apps.accounts.hashers.ScryptPasswordHasher",
+    "argon2": "apps.accounts.hashers.Argon2PasswordHasher",
+    "bcrypt": "apps.accounts.hashers.BCryptSHA256PasswordHasher",
+}
+PASSWORD_HASHER = env.str("PASSWORD_HASHER", "pbkdf2")
+if PASSWORD_HASHER not in PASSWORD_HASHER_CHOICES:
+    raise ImproperlyConfigured(
+        "PASSWORD_HASHER must be one of: {0}".format(", ".join(PASSWORD_HASHER_CHOICES))
+    )
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher
+    for name, hasher in PASSWORD_HASHER_CHOICES.items()
+    if name != PASSWORD_HASHER
+]
+PASSWORD_HASHERS.append("django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher")
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -145,6 +199,11 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = "core.CustomUser"
 
+# Replaces django.contrib.auth.backends.ModelBackend, sessions stored with it
+# are moved over by SessionBackendMiddleware. Listing both would check the
+# password twice on failed logins and bypass the cached permissions.
+AUTHENTICATION_BACKENDS = ["apps.accounts.backends.ModelBackend"]
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -228,6 +287,8 @@ EMAIL_VERIFICATION = "optional"
 
 # CORE
 MAX_SIZE_FILE = 10
+# Max queries per request before warning, only checked with DEBUG on
+REQUEST_QUERY_BUDGET = env.int("REQUEST_QUERY_BUDGET", None)
 
 # CELERY
 CELERY_TASK_DEFAULT_QUEUE = "default"
@@ -255,3 +316,18 @@ def route_task(name, args, kwargs, options, task=None, **kw):
 
 
 CELERY_TASK_ROUTES = (route_task,)
+
+CELERY_BEAT_SCHEDULE = {
+    "clear-expired-sessions": {
+        "task": "low_priority:clear_expired_sessions",
+        "schedule": crontab(minute=15),
+    },
+    "delete-old-exports": {
+        "task": "low_priority:delete_old_exports",
+        "schedule": crontab(minute=30, hour=3),
+    },
+    "purge-email-confirmations": {
+        "task": "low_priority:purge_email_confirmations",
+        "schedule": crontab(minute=45, hour=3),
+    },
+}
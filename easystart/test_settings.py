@@ -10,4 +10,7 @@ DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memor
 # Wrap all requests funtions with transaction.atomic
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
 
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+SESSION_ENGINE = "django.contrib.sessions.backends.db"
+
 RUN_TEST = True
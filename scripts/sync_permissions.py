@@ -6,6 +6,7 @@ import yaml
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 
+from apps.accounts import cache
 from apps.core.models import GlobalSettings
 
 
@@ -32,6 +33,8 @@ def run():
                     defaults={"name": p["name"]},
                 )
                 management_group.permissions.add(permission)
+        # Cached permissions of every user are stale now
+        cache.bump_groups_version()
 
     except Exception:
         traceback.print_exc()
@@ -0,0 +1,30 @@
+"""
+Timeouts for values kept in the Django cache across requests.
+
+Values invalidated by bumping a version or deleting a key are only fresh
+when every process sees the same cache. A local memory cache is private to
+its process, so a change made in another process (a web worker, a Celery
+task) never reaches it. There the values only live LOCAL_CACHE_TIMEOUT
+seconds, which bounds how stale they get.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared_cache(alias="default"):
+    """Whether the cache `alias` is seen by every process"""
+    return not isinstance(caches[alias], LocMemCache)
+
+
+def local_cache_timeout():
+    return getattr(settings, "LOCAL_CACHE_TIMEOUT", 10)
+
+
+def get_timeout(timeout, alias="default"):
+    """`timeout` on a shared cache, capped at LOCAL_CACHE_TIMEOUT otherwise"""
+    if is_shared_cache(alias):
+        return timeout
+    if timeout is None:
+        return local_cache_timeout()
+    return min(timeout, local_cache_timeout())
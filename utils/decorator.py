@@ -5,24 +5,28 @@ from django.contrib.auth.decorators import user_passes_test
 from django.http import JsonResponse
 from inertia import share
 
+from apps.accounts import cache
+from utils.inertia import get_other_view_messages
+
 
 def clean_message(func):
     """
-    Clean share sessions if there not message from other view
+    Share the messages left by `share_other_view` on the previous request,
+    or empty ones if there are none
     """
 
     @wraps(func)
     def wrapper(request, *args, **kwargs):
-        if not request.session.get("message_other_view", False):
+        data = get_other_view_messages(request)
+        if not data:
             share(request, error=False, success=False, errors={})
         else:
             share(
                 request,
-                success=request.session.get("success", False),
-                error=request.session.get("error", False),
-                errors=request.session.get("errors", {}),
+                success=data.get("success", False),
+                error=data.get("error", False),
+                errors=data.get("errors", {}),
             )
-        request.session["message_other_view"] = False
 
         return func(request, *args, **kwargs)
 
@@ -34,8 +38,7 @@ def group_required(*group_names):
 
     def in_groups(u):
         if u.is_authenticated:
-            if bool(u.groups.filter(name__in=group_names)) | u.is_superuser:
-                return True
+            return u.is_superuser or cache.in_groups(u, *group_names)
         return False
 
     return user_passes_test(in_groups, login_url="/403", redirect_field_name=None)
@@ -1,22 +1,114 @@
+import glob
+import logging
+import os
+import smtplib
+import threading
+import time
 import uuid
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import TemplateDoesNotExist, engines
+from django.template.loader import get_template
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_PATTERNS = ("email/*_message.html", "email/*_message.txt")
+
+
+class EmailRenderer(object):
+    """
+    Render email templates compiled once per process, missing templates are
+    remembered too. Each template keeps its render count and total and max
+    times in seconds, see `get_metrics`.
+    """
+
+    def __init__(self):
+        self.templates = {}
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def get_template(self, name):
+        if name not in self.templates:
+            try:
+                self.templates[name] = get_template(name)
+            except TemplateDoesNotExist:
+                self.templates[name] = None
+
+        template = self.templates[name]
+        if template is None:
+            raise TemplateDoesNotExist(name)
+        return template
+
+    def render(self, name, context, lang=None):
+        template = self.get_template(name)
+        start = time.perf_counter()
+        if lang:
+            with translation.override(lang):
+                rendered = template.render(context)
+        else:
+            rendered = template.render(context)
+        self.record(name, time.perf_counter() - start)
+        return rendered
+
+    def record(self, name, seconds):
+        with self._lock:
+            metrics = self.metrics.setdefault(
+                name, {"count": 0, "total": 0.0, "max": 0.0}
+            )
+            metrics["count"] += 1
+            metrics["total"] += seconds
+            metrics["max"] = max(metrics["max"], seconds)
+
+    def get_metrics(self):
+        """Render metrics per template name, with the mean time added"""
+        with self._lock:
+            return {
+                name: dict(metrics, mean=metrics["total"] / metrics["count"])
+                for name, metrics in self.metrics.items()
+            }
+
+    def get_template_names(self):
+        names = set()
+        for engine in engines.all():
+            for loader in engine.engine.template_loaders:
+                for directory in loader.get_dirs():
+                    for pattern in EMAIL_TEMPLATE_PATTERNS:
+                        for path in glob.glob(os.path.join(directory, pattern)):
+                            names.add(os.path.relpath(path, directory))
+        return sorted(names)
+
+    def warm(self):
+        """
+        Compile every email template and load the translation catalog of
+        each of settings.LANGUAGES, e.g. when a worker process starts
+        """
+        names = self.get_template_names()
+        for name in names:
+            self.get_template(name)
+        for lang, _ in settings.LANGUAGES:
+            with translation.override(lang):
+                translation.gettext("")
+        return names
+
+
+renderer = EmailRenderer()
 
 
 class EMail(object):
-    def __init__(self, to, subject, cc=[], bcc=[]):
+    def __init__(self, to, subject, cc=[], bcc=[], lang=None):
         self.to = to
         self.subject = subject
         self.cc = cc
         self.bcc = bcc
+        self.lang = lang
         self._html = None
         self._text = None
         self._random_string = str(uuid.uuid4())
 
     def _render(self, template, context):
-        return render_to_string(template, context)
+        return renderer.render(template, context, self.lang)
 
     def html(self, template, context):
         self._html = self._render(template, context)
@@ -24,7 +116,7 @@ class EMail(object):
     def text(self, template, context):
         self._text = self._render(template, context)
 
-    def send(self, from_addr=None, fail_silently=False):
+    def message(self, from_addr=None, connection=None):
         if isinstance(self.to, str):
             self.to = [self.to]
         if not from_addr:
@@ -37,10 +129,157 @@ class EMail(object):
             )
 
         msg = EmailMultiAlternatives(
-            self.subject, self._text, from_addr, self.to, bcc=self.bcc, cc=self.cc
+            self.subject,
+            self._text,
+            from_addr,
+            self.to,
+            bcc=self.bcc,
+            cc=self.cc,
+            connection=connection,
         )
 
         if self._html:
             msg.attach_alternative(self._html, "text/html")
 
-        msg.send(fail_silently)
+        return msg
+
+    def send(self, from_addr=None, fail_silently=False, connection=None):
+        self.message(from_addr, connection).send(fail_silently)
+
+
+# Errors of a message that could not be sent, see is_transient_error for
+# the ones worth sending it again for
+SEND_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def is_transient_error(exc):
+    """
+    Whether sending again may succeed: connection errors and 4xx replies.
+    Permanent failures (5xx replies, refused sender or recipients) are not.
+    """
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return bool(exc.recipients) and all(
+            400 <= code < 500 for code, _ in exc.recipients.values()
+        )
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, OSError)
+
+
+class EmailDispatcher(object):
+    """
+    Send many messages over one connection. Messages added are buffered and
+    sent every `batch_size` messages, on `flush` and when leaving the
+    `with` block. Each message is retried with exponential backoff, a
+    message failing every attempt is logged and kept in `failed` without
+    stopping the rest. `on_flush` is called with the dispatcher after each
+    batch is sent, e.g. to report progress.
+    """
+
+    def __init__(
+        self,
+        connection=None,
+        batch_size=None,
+        retries=None,
+        backoff=None,
+        on_flush=None,
+    ):
+        self.connection = connection or get_connection()
+        self.batch_size = batch_size or getattr(settings, "EMAIL_BATCH_SIZE", 100)
+        self.retries = retries if retries is not None else email_retries()
+        self.backoff = backoff if backoff is not None else email_backoff()
+        self.on_flush = on_flush
+        self.buffer = []
+        self.sent = 0
+        self.failed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.connection.close()
+
+    def add(self, message):
+        """Queue an EMail or an EmailMessage"""
+        if isinstance(message, EMail):
+            message = message.message()
+        self.buffer.append(message)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send the buffered messages, return how many were sent"""
+        messages, self.buffer = self.buffer, []
+        sent = 0
+        for message in messages:
+            try:
+                sent += send_message(
+                    self.connection, message, self.retries, self.backoff
+                )
+            except SEND_ERRORS as exc:
+                logger.error("Email to %s not sent: %s", message.to, exc)
+                self.failed.append((message, exc))
+
+        self.sent += sent
+        if messages and self.on_flush:
+            self.on_flush(self)
+        return sent
+
+
+def email_retries():
+    return getattr(settings, "EMAIL_SEND_RETRIES", 3)
+
+
+def email_backoff():
+    return getattr(settings, "EMAIL_SEND_BACKOFF", 1.0)
+
+
+def send_message(connection, message, retries=None, backoff=None):
+    """
+    Send `message` over an open or openable `connection`, retrying up to
+    `retries` times on transient errors, waiting backoff * 2 ** attempt
+    seconds in between. Raises permanent errors at once and the last error
+    when every attempt fails.
+    """
+    retries = retries if retries is not None else email_retries()
+    backoff = backoff if backoff is not None else email_backoff()
+
+    for attempt in range(retries + 1):
+        try:
+            # No-op when already open, so the connection is not closed after
+            # the message
+            connection.open()
+            return connection.send_messages([message]) or 0
+        except SEND_ERRORS as exc:
+            if attempt == retries or not is_transient_error(exc):
+                raise
+            # The server may have dropped the connection, start a new one
+            connection.close()
+            time.sleep(backoff * 2**attempt)
+
+
+_connections = {}
+
+
+def get_persistent_connection():
+    """
+    Connection kept open for the life of the process, for workers sending
+    one message per task. One per EMAIL_BACKEND.
+    """
+    backend = settings.EMAIL_BACKEND
+    if backend not in _connections:
+        _connections[backend] = get_connection(backend)
+    return _connections[backend]
+
+
+def send_persistent(message):
+    """Send an EMail or EmailMessage over the persistent connection"""
+    if isinstance(message, EMail):
+        message = message.message()
+    return send_message(get_persistent_connection(), message)
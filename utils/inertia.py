@@ -1,11 +1,74 @@
+import json
+
+from django.contrib import messages
+from django.core.serializers.json import DjangoJSONEncoder
+from inertia import share
+
+OTHER_VIEW_TAG = "inertia"
+
+
+class SharedProp:
+    """
+    Shared prop computed on demand. Inertia's `render` calls it only when the
+    prop is serialised, so redirects and partial reloads that do not ask for
+    it never pay for it.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.evaluated = False
+        self.value = None
+
+    def __call__(self):
+        if not self.evaluated:
+            self.value = self.func(*self.args, **self.kwargs)
+            self.evaluated = True
+        return self.value
+
+
+def share_lazy(request, **kwargs):
+    """Share props given as callables, see SharedProp"""
+    share(request, **{key: SharedProp(func) for key, func in kwargs.items()})
+
+
 def share_other_view(request, success=False, error=False, errors=False):
-    if success:
-        request.session["success"] = success
-    if error:
-        request.session["error"] = error
-    if errors:
-        request.session["errors"] = errors
-
-    request.session["message_other_view"] = True
+    """
+    Pass messages to the next view decorated with `clean_message`. They are
+    carried by django.contrib.messages, in a signed cookie with the default
+    storage, so nothing is stored when there is no message.
+    """
     if not success and not error and not errors:
-        request.session["message_other_view"] = False
+        return
+
+    data = {"success": success, "error": error, "errors": errors}
+    messages.add_message(
+        request,
+        messages.INFO,
+        json.dumps(data, cls=DjangoJSONEncoder),
+        extra_tags=OTHER_VIEW_TAG,
+    )
+
+
+def get_other_view_messages(request):
+    """
+    Messages left by `share_other_view` on a previous request, None when
+    there are none. The storage is only consumed when it holds messages.
+    """
+    storage = messages.get_messages(request)
+    if not len(storage):
+        return None
+
+    data = {}
+    for message in storage:
+        if OTHER_VIEW_TAG in message.extra_tags.split():
+            data.update(
+                {
+                    key: value
+                    for key, value in json.loads(message.message).items()
+                    if value
+                }
+            )
+
+    return data or None
@@ -0,0 +1,55 @@
+import base64
+import hashlib
+import mimetypes
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+MEDIA_HASH_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def get_media_src(name, storage=default_storage, inline=False):
+    """Image `src` for a stored file, a data URI when `inline` is set"""
+    if inline:
+        return get_media_base64(name, storage)
+    return get_media_url(name, storage)
+
+
+def get_media_hash(name, storage=default_storage):
+    """
+    Return a short content hash for a stored file. The digest is cached per
+    file name and modification time, so the file is only read once.
+    """
+    modified = storage.get_modified_time(name).timestamp()
+    cache_key = "media_hash:{0}:{1}".format(name, modified)
+    digest = cache.get(cache_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with storage.open(name, "rb") as f:
+            for chunk in f.chunks():
+                sha.update(chunk)
+        digest = sha.hexdigest()[:16]
+        cache.set(cache_key, digest, MEDIA_HASH_CACHE_TIMEOUT)
+
+    return digest
+
+
+def get_media_url(name, storage=default_storage):
+    """Versioned URL of a stored file served by the `core:media` view"""
+    url = reverse("core:media", kwargs={"path": name})
+    try:
+        digest = get_media_hash(name, storage)
+    except FileNotFoundError:
+        return url
+
+    return "{0}?v={1}".format(url, digest)
+
+
+def get_media_base64(name, storage=default_storage):
+    """Inline data URI of a stored file, typed after its extension"""
+    with storage.open(name, "rb") as f:
+        encoded_string = base64.b64encode(f.read()).decode("ascii")
+
+    mime_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return "data:%s;base64,%s" % (mime_type, encoded_string)
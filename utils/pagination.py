@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+
+from django.db import connections
+
+NEXT = "next"
+PREVIOUS = "prev"
+
+
+def encode_cursor(value, direction):
+    """Opaque cursor pointing after (next) or before (prev) a key value"""
+    data = json.dumps({"k": value, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (value, direction) of a cursor or None if it is not valid"""
+    if not cursor:
+        return None
+
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        value, direction = data["k"], data["d"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+
+    if direction not in (NEXT, PREVIOUS) or not isinstance(value, int):
+        return None
+
+    return value, direction
+
+
+class CursorPage:
+    """
+    Keyset pagination over an integer unique `key`. Every page is a single
+    `WHERE key > value ORDER BY key LIMIT n` query, so deep pages cost the
+    same as the first one.
+    """
+
+    def __init__(self, queryset, cursor, per_page, key="id"):
+        self.per_page = per_page
+        self.key = key
+
+        position = decode_cursor(cursor)
+        if position is None:
+            rows = list(queryset.order_by(key)[: per_page + 1])
+            has_previous, has_next = False, len(rows) > per_page
+            rows = rows[:per_page]
+
+        elif position[1] == NEXT:
+            rows = list(
+                queryset.filter(**{f"{key}__gt": position[0]}).order_by(key)[
+                    : per_page + 1
+                ]
+            )
+            has_previous, has_next = True, len(rows) > per_page
+            rows = rows[:per_page]
+
+        else:
+            rows = list(
+                queryset.filter(**{f"{key}__lt": position[0]}).order_by(f"-{key}")[
+                    : per_page + 1
+                ]
+            )
+            has_previous, has_next = len(rows) > per_page, True
+            rows = rows[:per_page][::-1]
+
+        self.object_list = rows
+        self.next_cursor = None
+        self.previous_cursor = None
+        if rows and has_next:
+            self.next_cursor = encode_cursor(getattr(rows[-1], key), NEXT)
+        if rows and has_previous:
+            self.previous_cursor = encode_cursor(getattr(rows[0], key), PREVIOUS)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def approximate_count(queryset):
+    """
+    Row estimate of the PostgreSQL planner for `queryset`, None on other
+    databases. Cheap on large tables where COUNT(*) needs a full scan.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,86 @@
+"""
+Sliding window rate limiter on top of the Django cache.
+
+Hits are counted in fixed windows of `window` seconds. The count of a key
+is the one of the current window plus the previous window weighted by how
+much of it still overlaps the sliding window, so bursts across a window
+boundary are not let through twice. Counters are incremented atomically,
+with Redis they are shared by every process. When the cache cannot be
+reached, a process local memory cache takes over so requests are still
+limited.
+"""
+import hashlib
+import logging
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from redis import exceptions as redis_exceptions
+
+logger = logging.getLogger(__name__)
+
+# Errors of an unreachable cache backend, other errors (such as the
+# ValueError of `incr` on a missing key) are raised as is
+CACHE_ERRORS = (
+    OSError,
+    redis_exceptions.ConnectionError,
+    redis_exceptions.TimeoutError,
+)
+
+_local_cache = LocMemCache("ratelimit", {})
+
+
+class RateLimiter:
+    """Allow `limit` hits per key in any `window` seconds"""
+
+    key_prefix = "ratelimit"
+
+    def __init__(self, scope, limit, window, cache_alias="default"):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.cache_alias = cache_alias
+
+    def make_key(self, key, index):
+        digest = hashlib.sha256(str(key).encode()).hexdigest()[:32]
+        return "{0}:{1}:{2}:{3}".format(self.key_prefix, self.scope, digest, index)
+
+    def _call(self, method, *args):
+        try:
+            return getattr(caches[self.cache_alias], method)(*args)
+        except CACHE_ERRORS as exc:
+            logger.warning("Rate limit cache unavailable, using local memory: %s", exc)
+            return getattr(_local_cache, method)(*args)
+
+    def get_count(self, key, now=None):
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, self.window)
+        current_key = self.make_key(key, int(index))
+        previous_key = self.make_key(key, int(index) - 1)
+
+        counts = self._call("get_many", [current_key, previous_key])
+        weight = 1 - elapsed / self.window
+        return counts.get(current_key, 0) + counts.get(previous_key, 0) * weight
+
+    def is_limited(self, key, now=None):
+        return self.get_count(key, now) >= self.limit
+
+    def hit(self, key, now=None):
+        """Count a hit, return the count of the current window"""
+        now = time.time() if now is None else now
+        cache_key = self.make_key(key, int(now // self.window))
+        # Kept for two windows, the next one weights it
+        self._call("add", cache_key, 0, self.window * 2)
+        try:
+            return self._call("incr", cache_key)
+        except ValueError:
+            # Expired between add and incr
+            self._call("set", cache_key, 1, self.window * 2)
+            return 1
+
+    def reset(self, key, now=None):
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        self._call(
+            "delete_many", [self.make_key(key, index), self.make_key(key, index - 1)]
+        )
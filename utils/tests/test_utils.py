@@ -1,10 +1,23 @@
 import json
+import logging
+import smtplib
+from unittest import mock
 from unittest.mock import Mock
 
 import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.template import engines
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 
-from utils import build_dict_language, decorator
+from utils import build_dict_language
+from utils import cache as utils_cache
+from utils import decorator, email, inertia, pagination
+from utils.ratelimit import RateLimiter
 
 
 def test_build_dict_language_get_dict_language():
@@ -51,3 +64,327 @@ def test_json_format_required_decorator_wrong_format_mock():
     assert response.status_code == 400
     assert data["error"]
     assert data["message"] == "Json format required in data"
+
+
+def test_shared_prop_evaluated_once():
+    """A shared prop is computed on first use and then reused"""
+    func = Mock(return_value={"name": "value"})
+    prop = inertia.SharedProp(func, 1, key="a")
+
+    assert not func.called
+    assert prop() == {"name": "value"}
+    assert prop() == {"name": "value"}
+    func.assert_called_once_with(1, key="a")
+
+
+def test_pagination_cursor_round_trip():
+    cursor = pagination.encode_cursor(42, pagination.NEXT)
+    assert pagination.decode_cursor(cursor) == (42, pagination.NEXT)
+    assert pagination.decode_cursor("not a cursor") is None
+    assert pagination.decode_cursor(pagination.encode_cursor("1", "next")) is None
+
+
+@pytest.mark.django_db
+def test_pagination_cursor_page(create_user):
+    for index in range(5):
+        create_user(email=f"user{index}@test.com")
+    queryset = get_user_model().objects.filter(email__startswith="user")
+    ids = list(queryset.order_by("id").values_list("id", flat=True))
+
+    first = pagination.CursorPage(queryset, None, 2)
+    assert [user.id for user in first] == ids[:2]
+    assert first.previous_cursor is None
+
+    second = pagination.CursorPage(queryset, first.next_cursor, 2)
+    assert [user.id for user in second] == ids[2:4]
+
+    last = pagination.CursorPage(queryset, second.next_cursor, 2)
+    assert [user.id for user in last] == ids[4:]
+    assert last.next_cursor is None
+
+    back = pagination.CursorPage(queryset, second.previous_cursor, 2)
+    assert [user.id for user in back] == ids[:2]
+    assert back.previous_cursor is None
+    assert back.next_cursor == first.next_cursor
+
+
+class FakeConnection:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.opened = 0
+        self.closed = 0
+        self.is_open = False
+        self.sent = []
+
+    def open(self):
+        if not self.is_open:
+            self.is_open = True
+            self.opened += 1
+
+    def close(self):
+        self.is_open = False
+        self.closed += 1
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.sent.extend(messages)
+        return len(messages)
+
+
+def make_email(to="jhondoe@test.com"):
+    message = email.EMail(to=to, subject="Subject")
+    message._text = "Body"
+    return message
+
+
+def test_email_dispatcher_one_connection():
+    connection = FakeConnection()
+    with email.EmailDispatcher(connection=connection, batch_size=2) as dispatcher:
+        for index in range(5):
+            dispatcher.add(make_email(f"user{index}@test.com"))
+        # Two full batches already sent
+        assert len(connection.sent) == 4
+
+    assert dispatcher.sent == 5
+    assert [message.to for message in connection.sent][-1] == ["user4@test.com"]
+    assert connection.opened == 1
+    assert connection.closed == 1
+
+
+def test_email_dispatcher_on_flush():
+    connection = FakeConnection()
+    reports = []
+    with email.EmailDispatcher(
+        connection=connection,
+        batch_size=2,
+        on_flush=lambda dispatcher: reports.append(dispatcher.sent),
+    ) as dispatcher:
+        for index in range(5):
+            dispatcher.add(make_email(f"user{index}@test.com"))
+
+    assert reports == [2, 4, 5]
+
+
+def test_email_dispatcher_retries(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(email.time, "sleep", sleeps.append)
+    connection = FakeConnection(failures=2)
+
+    dispatcher = email.EmailDispatcher(connection=connection, retries=2, backoff=1)
+    dispatcher.add(make_email())
+    assert dispatcher.flush() == 1
+    assert sleeps == [1, 2]
+    assert connection.opened == 3
+
+
+def test_email_dispatcher_failed_message(monkeypatch):
+    monkeypatch.setattr(email.time, "sleep", lambda seconds: None)
+    connection = FakeConnection(failures=2)
+
+    dispatcher = email.EmailDispatcher(connection=connection, retries=1)
+    dispatcher.add(make_email("failed@test.com"))
+    dispatcher.add(make_email("sent@test.com"))
+
+    assert dispatcher.flush() == 1
+    assert [message.to for message, error in dispatcher.failed] == [["failed@test.com"]]
+    assert connection.sent[0].to == ["sent@test.com"]
+
+
+def test_email_dispatcher_permanent_error(monkeypatch):
+    """Refused recipients and 5xx replies are not sent again"""
+    sleeps = []
+    monkeypatch.setattr(email.time, "sleep", sleeps.append)
+    connection = FakeConnection()
+    connection.send_messages = Mock(
+        side_effect=smtplib.SMTPRecipientsRefused(
+            {"failed@test.com": (550, b"No such user")}
+        )
+    )
+
+    dispatcher = email.EmailDispatcher(connection=connection, retries=3)
+    dispatcher.add(make_email("failed@test.com"))
+
+    assert dispatcher.flush() == 0
+    assert len(dispatcher.failed) == 1
+    assert connection.send_messages.call_count == 1
+    assert sleeps == []
+
+
+@pytest.mark.parametrize(
+    "error, transient",
+    [
+        (smtplib.SMTPServerDisconnected("gone"), True),
+        (ConnectionRefusedError(), True),
+        (smtplib.SMTPDataError(451, b"Try again later"), True),
+        (smtplib.SMTPDataError(554, b"Rejected"), False),
+        (smtplib.SMTPSenderRefused(553, b"Bad sender", "from@test.com"), False),
+        (smtplib.SMTPRecipientsRefused({"to@test.com": (450, b"Busy")}), True),
+        (smtplib.SMTPRecipientsRefused({"to@test.com": (550, b"Unknown")}), False),
+    ],
+)
+def test_email_is_transient_error(error, transient):
+    assert email.is_transient_error(error) is transient
+
+
+def test_send_persistent_reuses_connection(mailoutbox):
+    email.send_persistent(make_email("one@test.com"))
+    email.send_persistent(make_email("two@test.com"))
+
+    assert [message.to for message in mailoutbox] == [
+        ["one@test.com"],
+        ["two@test.com"],
+    ]
+    assert email.get_persistent_connection() is email.get_persistent_connection()
+
+
+def test_email_renderer_compiles_once():
+    renderer = email.EmailRenderer()
+    context = {"site_name": "Easystart", "password_reset_url": "http://url"}
+
+    with mock.patch.object(
+        email, "get_template", wraps=email.get_template
+    ) as get_template:
+        first = renderer.render("email/password_reset_key_message.txt", context)
+        second = renderer.render("email/password_reset_key_message.txt", context)
+        for _ in range(2):
+            with pytest.raises(email.TemplateDoesNotExist):
+                renderer.render("email/password_reset_key_message.html", context)
+
+    assert first == second
+    assert "http://url" in first
+    assert get_template.call_count == 2
+
+    metrics = renderer.get_metrics()["email/password_reset_key_message.txt"]
+    assert metrics["count"] == 2
+    assert metrics["max"] >= metrics["mean"] > 0
+
+
+def test_email_renderer_language():
+    renderer = email.EmailRenderer()
+    renderer.templates["lang.txt"] = engines["django"].from_string(
+        "{% load i18n %}{% get_current_language as lang %}{{ lang }}"
+    )
+
+    assert renderer.render("lang.txt", {}, "es") == "es"
+    assert renderer.render("lang.txt", {}, "en-us") == "en-us"
+
+
+def test_email_renderer_warm():
+    renderer = email.EmailRenderer()
+    names = renderer.warm()
+
+    assert "email/password_reset_key_message.txt" in names
+    assert set(names) <= set(renderer.templates)
+
+
+def test_rate_limiter_window():
+    limiter = RateLimiter("test", 3, 60)
+
+    for now in (0, 10, 20):
+        assert not limiter.is_limited("key", now=now)
+        limiter.hit("key", now=now)
+
+    assert limiter.is_limited("key", now=30)
+    assert not limiter.is_limited("other", now=30)
+
+
+def test_rate_limiter_sliding_window():
+    """Hits of the previous window count by how much it still overlaps"""
+    limiter = RateLimiter("test", 3, 60)
+    for now in (50, 55, 58):
+        limiter.hit("key", now=now)
+
+    # Three quarters of the previous window still overlap: 3 * 0.75
+    assert limiter.get_count("key", now=75) == 2.25
+    assert limiter.is_limited("key", now=60)
+    assert not limiter.is_limited("key", now=75)
+    assert limiter.get_count("key", now=125) == 0
+
+
+def test_rate_limiter_reset():
+    limiter = RateLimiter("test", 1, 60)
+    limiter.hit("key", now=0)
+    assert limiter.is_limited("key", now=1)
+
+    limiter.reset("key", now=1)
+
+    assert not limiter.is_limited("key", now=1)
+
+
+def test_rate_limiter_local_fallback():
+    """Hits are still counted when the cache fails"""
+    limiter = RateLimiter("test", 2, 60)
+    broken = Mock()
+    for method in ("get_many", "add", "incr", "set", "delete_many"):
+        getattr(broken, method).side_effect = ConnectionError
+
+    with mock.patch("utils.ratelimit.caches", {"default": broken}), mock.patch(
+        "utils.ratelimit._local_cache", LocMemCache("test", {})
+    ):
+        limiter.hit("key", now=0)
+        limiter.hit("key", now=1)
+
+        assert limiter.is_limited("key", now=2)
+
+
+def test_rate_limiter_expired_key(caplog):
+    """A key expiring between add and incr is set again in the same cache"""
+    limiter = RateLimiter("test", 2, 60)
+    cache_key = limiter.make_key("key", 0)
+
+    with mock.patch.object(
+        caches["default"], "incr", side_effect=ValueError
+    ), caplog.at_level(logging.WARNING, logger="utils.ratelimit"):
+        assert limiter.hit("key", now=0) == 1
+
+    assert caches["default"].get(cache_key) == 1
+    assert "unavailable" not in caplog.text
+
+
+@pytest.mark.django_db
+def test_group_required_decorator(create_user):
+    view = decorator.group_required("management")(lambda request: "ok")
+    request = RequestFactory().get("/")
+
+    request.user = create_user()
+    assert view(request).status_code == 302
+
+    request.user = create_user(email="manager@group.com")
+    request.user.groups.add(Group.objects.get(name="management"))
+    assert view(request) == "ok"
+
+
+@pytest.mark.django_db
+def test_group_required_decorator_one_query(create_user):
+    view = decorator.group_required("management", "customer")(lambda request: "ok")
+    request = RequestFactory().get("/")
+    request.user = create_user()
+
+    with CaptureQueriesContext(connection) as queries:
+        assert view(request) == "ok"
+        assert view(request) == "ok"
+
+    assert len(queries) == 1
+
+
+def test_cache_get_timeout_local(settings):
+    settings.LOCAL_CACHE_TIMEOUT = 10
+
+    assert not utils_cache.is_shared_cache()
+    assert utils_cache.get_timeout(3600) == 10
+    assert utils_cache.get_timeout(5) == 5
+    assert utils_cache.get_timeout(None) == 10
+
+
+def test_cache_get_timeout_shared(settings, tmp_path):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    }
+
+    assert utils_cache.is_shared_cache()
+    assert utils_cache.get_timeout(3600) == 3600
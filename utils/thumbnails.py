@@ -0,0 +1,88 @@
+import hashlib
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+FORMAT_EXTENSIONS = {
+    "WEBP": "webp",
+    "PNG": "png",
+}
+
+
+def get_thumbnail_name(source_name, digest, size, image_format):
+    """
+    Content addressed name of a derivative, stored next to the original so
+    it inherits the same media visibility rules.
+    """
+    return posixpath.join(
+        posixpath.dirname(source_name),
+        "thumbnails",
+        "{0}_{1}.{2}".format(digest, size, FORMAT_EXTENSIONS[image_format]),
+    )
+
+
+def generate_thumbnails(
+    source_name, sizes, image_format="WEBP", crop=False, storage=default_storage
+):
+    """
+    Build a thumbnail of `source_name` for each size and return a dict with
+    the source name and the stored name of every variant.
+
+    With `crop` the image is cut to a square (avatars), otherwise it is
+    scaled to fit in a `size` x `size` box keeping its aspect ratio (logos).
+    Raises PIL.UnidentifiedImageError if the source is not an image.
+    """
+    with storage.open(source_name, "rb") as f:
+        content = f.read()
+
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    image = Image.open(io.BytesIO(content))
+    image = ImageOps.exif_transpose(image).convert("RGBA")
+
+    thumbnails = {"source": source_name}
+    for size in sorted(sizes):
+        name = get_thumbnail_name(source_name, digest, size, image_format)
+        if not storage.exists(name):
+            if crop:
+                thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            else:
+                thumbnail = image.copy()
+                thumbnail.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format=image_format)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+
+        thumbnails[str(size)] = name
+
+    return thumbnails
+
+
+def get_thumbnail(thumbnails, source_name, size):
+    """
+    Name of the smallest stored variant of at least `size` pixels, or None
+    when there is no suitable variant for the current source file.
+    """
+    if not thumbnails or thumbnails.get("source") != source_name:
+        return None
+
+    sizes = sorted(int(key) for key in thumbnails if key.isdigit())
+    for available in sizes:
+        if available >= size:
+            return thumbnails[str(available)]
+
+    return None
+
+
+def delete_thumbnails(thumbnails, keep=None, storage=default_storage):
+    """
+    Delete the stored variants of `thumbnails`, except those also in the
+    `keep` thumbnails, e.g. the ones of a replaced source file.
+    """
+    kept = set((keep or {}).values())
+    for key, name in (thumbnails or {}).items():
+        if key.isdigit() and name not in kept:
+            storage.delete(name)